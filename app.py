@@ -1,16 +1,42 @@
 import os
+import json
+import hashlib
+import threading
 import streamlit as st
 import pandas as pd
 import numpy as np
 
-from scipy.stats import spearmanr, mannwhitneyu, kruskal
-
-# Optional: ADF test (butuh statsmodels)
-try:
-    from statsmodels.tsa.stattools import adfuller
-    HAS_STATSMODELS = True
-except Exception:
-    HAS_STATSMODELS = False
+from kb_engine import sql_store
+from kb_engine.cube import (
+    build_rollup_cube, child_level, child_names, children_table, cube_levels, node_timeseries, node_year_totals,
+    region_fill_values, stock_leaf_sums
+)
+from kb_engine.db1 import (
+    build_stock_timeseries_index, compact_stock_frame, load_db1_stock_timeseries, parse_db1_jobs
+)
+from kb_engine.db1_store import iter_store_parts, read_part, store_fingerprint, store_parts, sync_store
+from kb_engine.db2 import load_db2_people
+from kb_engine.export import EXPORT_FORMATS, write_export
+from kb_engine.leaderboard import leaderboard
+from kb_engine.forecast import FORECAST_HORIZON, FORECAST_VERSION, fit_table, forecast_frame, forecast_result
+from kb_engine.ledger import LEDGER_COLUMNS, new_ledger, sync_ledger
+from kb_engine.model import integrated_model as compute_integrated_model, sql_stock_rows, stock_timeseries_from
+from kb_engine.paging import filtered_rows, page_count, page_view
+from kb_engine.parallel import default_workers, make_process_pool
+from kb_engine.profiling import (
+    annotate_run, begin_run, cache_stats_rows, current_run, end_run, instrument_cache,
+    peak_rss_bytes, rss_bytes, run_history, runs_jsonl, stage, stage_totals_rows
+)
+from kb_engine.resampling import spearman_resampling, kruskal_resampling
+from kb_engine.schema import (
+    DB1_DEFAULT_PROVINCE, KRUSKAL_LABELS, LEADERBOARD_K_OPTIONS, LEADERBOARD_METRICS, PEOPLE_X_OPTIONS, REGION_LEVELS, SQL_PEOPLE_COLUMNS,
+    STOCK_METHODS, STOCK_METHODS_WITH_TOTAL
+)
+from kb_engine.shared import freeze, session_view
+from kb_engine.stats import (
+    compute_ts_statistics, kruskal_by_codes, link_statistics, link_valid_rows,
+    spearman_strength_label, tercile_codes
+)
 
 
 # =========================================================
@@ -22,6 +48,18 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Profiling per rerun (lihat menu Diagnostics: buka dashboard dengan ?diagnostics=1)
+begin_run()
+# Opsional: tiap rerun ditambahkan sebagai 1 baris JSON ke file ini (untuk monitoring)
+PROFILE_LOG_PATH = os.environ.get("KB_PROFILE_LOG")
+
+
+def stop_run() -> None:
+    """st.stop() yang tetap menutup rekaman rerun (berhenti lebih awal juga tercatat di log)."""
+    end_run(log_path=PROFILE_LOG_PATH, stopped=True)
+    st.stop()
+
+
 # =========================================================
 # 2) TEMA (CSS) - khusus tampilan
 # =========================================================
@@ -108,6 +146,10 @@ section.main, section.main *{
   color: rgba(255,255,255,0.92) !important;
 }
 
+/* Sidebar filter (tahun) */
+[data-testid="stSidebar"] .stSelectbox{ padding: 0px 10px; }
+[data-testid="stSidebar"] .stSelectbox label p{ color: rgba(255,255,255,0.80) !important; }
+
 /* Sidebar footer */
 .sidebar-foot{
   margin-top: 10px;
@@ -217,225 +259,628 @@ section.main [data-baseweb="select"] span{ color: var(--text) !important; }
 }
 </style>
 """
-st.markdown(CSS_THEME, unsafe_allow_html=True)
+with stage("css_markdown"):
+    st.markdown(CSS_THEME, unsafe_allow_html=True)
 
 
 # =========================================================
-# 3) KONSTANTA & FUNGSI BANTU
+# 3) KONSTANTA TAMPILAN
 # =========================================================
-MONTH_ORDER = [
-    "JANUARI","FEBRUARI","MARET","APRIL","MEI","JUNI",
-    "JULI","AGUSTUS","SEPTEMBER","OKTOBER","NOVEMBER","DESEMBER"
-]
+# Skema data, loader DB1/DB2, model terintegrasi & statistik ada di kb_engine
+# (schema, db1, db2, model, stats) dan tidak bergantung pada Streamlit.
+# Pilihan jumlah baris per halaman di tabel dataset
+PAGE_SIZE_OPTIONS = [25, 50, 100, 250]
 
-# Kolom detail stok pada DB1 (dipakai untuk hitung agregat SUNTIK/PIL/IMPLAN)
-DB1_NUMERIC_COLUMNS = [
-    "SUNTIKAN 1 BULANAN",
-    "SUNTIKAN 3 BULANAN KOMBINASI",
-    "SUNTIKAN 3 BULANAN PROGESTIN",
-    "PIL KOMBINASI",
-    "PIL PROGESTIN",
-    "KONDOM",
-    "IMPLAN 1 BATANG",
-    "IMPLAN 2 BATANG",
-    "IUD"
-]
+# Resampling (bootstrap CI + p-value permutasi): jumlah resample & seed tetap (hasil reprodusibel)
+RESAMPLING_N = 10_000
+RESAMPLING_SEED = 2025
 
-# Kolom stok agregat yang dipakai di dashboard
-STOCK_METHODS = ["SUNTIK", "PIL", "IMPLAN", "KONDOM", "IUD"]
-STOCK_METHODS_WITH_TOTAL = ["TOTAL_STOK"] + STOCK_METHODS
+# Pilihan "semua" di drill-down wilayah & jumlah wilayah anak yang ditampilkan
+ALL_REGIONS = "(semua)"
+DRILLDOWN_TOP_N = 10
 
+# Jumlah baris tabel risiko stok habis (halaman Prakiraan)
+RISK_TOP_N = 20
 
-def normalize_text(x) -> str:
-    """Rapikan teks: hapus spasi depan/belakang + ubah jadi HURUF BESAR."""
-    return str(x).strip().upper()
+
+# =========================================================
+# 4) LOAD FILE DARI FOLDER REPO (data/)
+# =========================================================
+DB1_PATH = os.path.join("data", "DATA KETERSEDIAAN ALAT DAN OBAT KONTRASEPSI.xlsx")
+DB2_PATH = os.path.join("data", "Jumlah tempat pelayanan kb yang memiliki tenaga kesehatan dan administrasi.xlsx")
+# Workbook DB1 tambahan (tahun lain / file per tahun) cukup ditaruh di folder ini
+DB1_DIR = os.path.join("data", "db1")
 
 
-def spearman_strength_label(rho: float) -> str:
-    """Label kekuatan korelasi Spearman (berdasar nilai absolut rho)."""
-    a = abs(rho)
-    if a < 0.2: return "sangat lemah"
-    if a < 0.4: return "lemah"
-    if a < 0.6: return "sedang"
-    if a < 0.8: return "kuat"
-    return "sangat kuat"
+# Hanya .xlsx yang dibaca (openpyxl); .xls butuh xlrd yang tidak ada di requirements.txt
+DB1_EXTENSIONS = (".xlsx",)
 
 
-def adf_test_result(series: pd.Series):
+def scan_db1_sources() -> tuple:
     """
-    Uji stasioneritas ADF untuk deret waktu.
-    Mengembalikan (p_value, kesimpulan).
+    File DB1: workbook utama + semua .xlsx di data/db1/ (urut nama).
+    Mengembalikan (paths, peringatan): file .xls dilewati, dan nama file yang sama
+    di kedua lokasi hanya dipakai sekali (file di data/db1/ menang).
     """
-    if not HAS_STATSMODELS:
-        return np.nan, "statsmodels belum terpasang"
+    paths = [DB1_PATH] if os.path.exists(DB1_PATH) else []
+    warnings = []
+    if os.path.isdir(DB1_DIR):
+        for name in sorted(os.listdir(DB1_DIR)):
+            if name.startswith("~$"):
+                continue
+            if name.lower().endswith(DB1_EXTENSIONS):
+                paths.append(os.path.join(DB1_DIR, name))
+            elif name.lower().endswith(".xls"):
+                warnings.append(f"DB1: {name} dilewati, format .xls tidak didukung (simpan ulang sebagai .xlsx).")
+
+    by_name = {}
+    for p in paths:
+        name = os.path.basename(p)
+        if name in by_name:
+            warnings.append(
+                f"DB1: nama file {name} ada di 2 lokasi, hanya {p} yang dipakai ({by_name[name]} diabaikan)."
+            )
+        by_name[name] = p
+    return list(by_name.values()), warnings
 
-    s = series.dropna().astype(float)
-    if len(s) < 6:
-        return np.nan, "data terlalu sedikit"
 
-    p_value = adfuller(s)[1]
-    conclusion = "stasioner" if p_value < 0.05 else "tidak stasioner (perlu differencing)"
-    return p_value, conclusion
+def list_db1_sources() -> list:
+    """File DB1 yang dipakai (lihat scan_db1_sources)."""
+    return scan_db1_sources()[0]
 
 
-# =========================================================
-# 4) MEMBACA & MENYIAPKAN DB1 (STOK)
-# =========================================================
-@st.cache_data(ttl=300)
-def load_db1_stock_timeseries(excel_path_or_file) -> pd.DataFrame:
+DB1_SOURCES, db1_source_warnings = scan_db1_sources()
+for warning in db1_source_warnings:
+    st.warning(warning)
+if not DB1_SOURCES:
+    st.error(f"File DB1 tidak ditemukan: {DB1_PATH} (atau folder {DB1_DIR}/)")
+    stop_run()
+
+if not os.path.exists(DB2_PATH):
+    st.error(f"File DB2 tidak ditemukan: {DB2_PATH}")
+    stop_run()
+
+# Cache kolumnar (Parquet) hasil parsing, disimpan di samping file Excel
+CACHE_DIR = os.path.join("data", ".cache")
+# Naikkan versi ini bila logika pembersihan DB1/DB2 berubah (cache lama otomatis diabaikan)
+CACHE_VERSION = 4
+
+FRAME_PARSERS = {
+    "db2": load_db2_people,
+}
+
+
+@instrument_cache(st.cache_data(show_spinner=False))
+def _content_sha256(path: str, size: int, mtime_ns: int) -> str:
+    """Hash isi file; di-memo per (size, mtime) supaya file tidak di-hash ulang tiap rerun."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def file_fingerprint(path: str) -> str:
+    """Sidik file = ukuran + mtime + hash isi. Berubah hanya jika file Excel berubah."""
+    stat = os.stat(path)
+    sha = _content_sha256(path, stat.st_size, stat.st_mtime_ns)
+    return f"{stat.st_size}-{stat.st_mtime_ns}-{sha}"
+
+
+def _frame_cache_paths(kind: str):
+    base = os.path.join(CACHE_DIR, f"{kind}.parquet")
+    return base, base + ".json"
+
+
+def read_frame_cache(kind: str, fingerprint: str):
+    """
+    Ambil frame dari cache Parquet bila isi file sumber sama (hash sama).
+    Mengembalikan None bila cache tidak ada / kedaluwarsa / gagal dibaca.
+    """
+    data_path, meta_path = _frame_cache_paths(kind)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        # Cukup bandingkan hash isi: file yang hanya "tersentuh" (mtime berubah) tetap valid
+        if meta.get("version") != CACHE_VERSION or meta.get("sha256") != fingerprint.rsplit("-", 1)[-1]:
+            return None
+        return pd.read_parquet(data_path)
+    except Exception:
+        return None
+
+
+def write_frame_cache(kind: str, fingerprint: str, df: pd.DataFrame) -> None:
+    """Simpan frame ke Parquet secara atomik (tulis file sementara lalu os.replace)."""
+    data_path, meta_path = _frame_cache_paths(kind)
+    size, mtime_ns, sha = fingerprint.split("-", 2)
+    meta = {"version": CACHE_VERSION, "size": int(size), "mtime_ns": int(mtime_ns), "sha256": sha}
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        df.to_parquet(data_path + ".tmp", index=False)
+        os.replace(data_path + ".tmp", data_path)
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(meta_path + ".tmp", meta_path)
+    except Exception:
+        # Cache hanya optimasi: folder read-only / pyarrow tidak ada -> lewati saja
+        pass
+
+
+@instrument_cache(st.cache_resource(show_spinner="Membaca data...", max_entries=4))
+def load_frame(kind: str, path: str, fingerprint: str) -> pd.DataFrame:
     """
-    DB1 dibaca dari Excel multi-sheet.
-    Nama sheet dianggap sebagai BULAN.
+    Baca DB1/DB2 lewat cache Parquet; parse Excel hanya jika cache tidak valid.
+    fingerprint ikut jadi kunci cache Streamlit, jadi data otomatis dimuat ulang
+    saat file berubah (tanpa TTL).
     """
-    xls = pd.ExcelFile(excel_path_or_file)
+    df = read_frame_cache(kind, fingerprint)
+    if df is None:
+        df = FRAME_PARSERS[kind](path)
+        write_frame_cache(kind, fingerprint, df)
+    return freeze(df)
 
-    monthly_frames = []
-    for sheet_name in xls.sheet_names:
-        df_sheet = pd.read_excel(excel_path_or_file, sheet_name=sheet_name)
-        df_sheet["BULAN"] = normalize_text(sheet_name)
-        monthly_frames.append(df_sheet)
 
-    stock_raw = pd.concat(monthly_frames, ignore_index=True)
+# Store DB1 per sheet (Parquet): sheet bulan baru / berubah saja yang di-parse ulang
+DB1_STORE_DIR = os.path.join(CACHE_DIR, "db1_store")
 
-    # Validasi kolom numerik wajib ada
-    missing_cols = [c for c in DB1_NUMERIC_COLUMNS if c not in stock_raw.columns]
-    if missing_cols:
-        raise ValueError(f"DB1: kolom numerik tidak ditemukan: {missing_cols}")
 
-    # Pastikan kolom stok berupa angka
-    stock_raw[DB1_NUMERIC_COLUMNS] = (
-        stock_raw[DB1_NUMERIC_COLUMNS]
-        .apply(pd.to_numeric, errors="coerce")
-        .fillna(0)
-    )
+@st.cache_resource(show_spinner=False)
+def _db1_store_lock() -> threading.Lock:
+    """Satu sinkronisasi store pada satu waktu (beberapa sesi bisa rerun bersamaan)."""
+    return threading.Lock()
+
+
+def db1_sources_key(paths: list) -> tuple:
+    """Kunci murah daftar file DB1: (path, ukuran, mtime) -> berubah bila ada file ditambah/diubah."""
+    return tuple((p, os.stat(p).st_size, os.stat(p).st_mtime_ns) for p in paths)
+
+
+# Worker process pool bersama: 0 = otomatis (core CPU, dibatasi), 1 = serial (tanpa process pool)
+POOL_WORKERS = int(os.environ.get("KB_POOL_WORKERS", "0"))
+
+
+@st.cache_resource(show_spinner=False)
+def get_process_pool():
+    """
+    Process pool bersama untuk parsing DB1, resampling & fitting prakiraan (dipakai ulang
+    lintas rerun & sesi). None -> jalan serial (1 worker / forkserver tidak ada).
+    """
+    return make_process_pool(POOL_WORKERS or default_workers())
+
+
+@instrument_cache(st.cache_data(show_spinner="Membaca data..."))
+def sync_db1(sources_key: tuple) -> tuple:
+    """
+    Sinkronkan store DB1 dengan file sumber.
+    Mengembalikan (fingerprint_isi, manifest); manifest None bila store tidak bisa ditulis.
+    Fingerprint hanya berubah bila isi sheet berubah, jadi file yang sekadar
+    "tersentuh" tidak membuat model & statistik turunan dihitung ulang.
+    """
+    paths = [p for p, _, _ in sources_key]
+    try:
+        with _db1_store_lock():
+            manifest = sync_store(
+                paths, DB1_STORE_DIR,
+                lambda jobs: parse_db1_jobs(jobs, executor=get_process_pool()),
+                CACHE_VERSION
+            )
+        return store_fingerprint(manifest), manifest
+    except OSError:
+        # Store hanya optimasi: folder read-only / disk penuh -> parse langsung (pyarrow wajib, lihat requirements.txt)
+        fingerprint = hashlib.sha256("|".join(file_fingerprint(p) for p in paths).encode()).hexdigest()
+        return fingerprint, None
+
+
+def iter_db1_frames(manifest: dict, paths: list, columns: list = None):
+    """Frame DB1 satu per satu: partisi store (per sheet) atau, tanpa store, hasil parse per file."""
+    if manifest is not None:
+        yield from iter_store_parts(DB1_STORE_DIR, manifest, columns=columns)
+    else:
+        for p in paths:
+            df = load_db1_stock_timeseries(p)
+            yield df if columns is None else df[columns]
+
+
+@st.cache_resource(show_spinner=False)
+def kpi_ledger() -> dict:
+    """
+    Ledger KPI inkremental (kb_engine.ledger), 1 per proses. Hanya diubah di
+    build_data_snapshot, yang selalu berjalan di bawah kunci data_watcher.
+    """
+    return new_ledger()
+
+
+def db1_ledger_parts(manifest: dict, paths: list) -> dict:
+    """
+    Partisi DB1 untuk ledger: {id: pembaca}. Dengan store, 1 partisi per sheet (nama file
+    Parquet baru setiap kali sheet berubah); tanpa store, 1 partisi per file (id = sidik file).
+    """
+    if manifest is not None:
+        return {
+            part: (lambda part=part: read_part(DB1_STORE_DIR, part, columns=LEDGER_COLUMNS))
+            for part in store_parts(manifest)
+        }
+    return {
+        f"{p}|{file_fingerprint(p)}": (lambda p=p: load_db1_stock_timeseries(p)[LEDGER_COLUMNS])
+        for p in paths
+    }
+
+
+@instrument_cache(st.cache_resource(show_spinner="Membaca data...", max_entries=2))
+def load_db1_frame(db1_fingerprint: str, _manifest: dict, _paths: list) -> pd.DataFrame:
+    """Frame stok semua bulan & tahun di memori (backend pandas, tipe data dipadatkan), 1 salinan per proses."""
+    return freeze(compact_stock_frame(pd.concat(list(iter_db1_frames(_manifest, _paths)), ignore_index=True)))
+
+
+# Backend agregasi: "pandas" (default, frame stok di memori) atau
+# "sql" (database embedded SQLite, atau DuckDB dengan KB_SQL_ENGINE=duckdb, di data/.cache/analytics/;
+# memori worker tetap kecil)
+ANALYTICS_BACKEND = os.environ.get("KB_ANALYTICS_BACKEND", "pandas").strip().lower()
+ANALYTICS_DIR = os.path.join(CACHE_DIR, "analytics")
+
+
+def _sql_stock_frames(manifest: dict, paths: list):
+    """Partisi DB1 -> baris tabel stok database analitik (kolom wilayah opsional bisa beda per partisi)."""
+    for df in iter_db1_frames(manifest, paths):
+        yield sql_stock_rows(df)
+
+
+@instrument_cache(st.cache_resource(show_spinner="Menyiapkan database analitik...", max_entries=1))
+def analytics_store(db1_fingerprint: str, db2_fingerprint: str, _manifest: dict, _paths: list, _people: pd.DataFrame) -> str:
+    """
+    File database analitik untuk 1 versi data (dibagi semua sesi, dipakai ulang lintas restart).
+    Stok dimuat per partisi, jadi frame DB1 utuh tidak pernah ada di memori.
+    """
+    version = hashlib.sha256(
+        f"{CACHE_VERSION}|{sql_store.SCHEMA_VERSION}|{db1_fingerprint}|{db2_fingerprint}".encode()
+    ).hexdigest()[:16]
+    path = os.path.join(ANALYTICS_DIR, f"kb_{version}.{sql_store.STORE_EXT}")
+    if not os.path.exists(path):
+        os.makedirs(ANALYTICS_DIR, exist_ok=True)
+        # Buang database versi lama
+        for name in os.listdir(ANALYTICS_DIR):
+            if name != os.path.basename(path):
+                os.remove(os.path.join(ANALYTICS_DIR, name))
+        sql_store.build_store(path, _sql_stock_frames(_manifest, _paths), _people[SQL_PEOPLE_COLUMNS])
+    return path
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def build_integrated_model(
+    db1_fingerprint: str, db2_fingerprint: str, tahun: int,
+    _stock_all: pd.DataFrame, _people: pd.DataFrame, _analytics_db: str = None, _ledger: dict = None
+) -> dict:
+    """
+    Model terintegrasi 1 tahun (kb_engine.model.integrated_model).
+    Tidak bergantung pada widget lain, jadi cukup dihitung sekali per (versi data, tahun)
+    (kunci cache = fingerprint DB1 & DB2 + tahun; frame berawalan _ tidak di-hash).
+    Disimpan 1 salinan per proses (read-only); sesi memakai session_view.
+    Dengan _analytics_db, describe dijalankan sebagai query SQL.
+    Total stok per kabupaten & KPI dibaca dari _ledger (sudah disinkronkan ke versi data ini).
+    """
+    model = compute_integrated_model(_stock_all, _people, tahun, _analytics_db, _ledger)
+    # Kunci cache untuk semua statistik turunan model ini
+    model["fingerprint"] = hashlib.sha256(f"{db1_fingerprint}|{db2_fingerprint}|{tahun}".encode()).hexdigest()
+    return freeze(model)
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=2))
+def load_stock_timeseries_index(db1_fingerprint: str, _stock_all: pd.DataFrame) -> dict:
+    """Indeks deret waktu per kabupaten, dibangun sekali per versi DB1 (dibagi semua sesi)."""
+    return freeze(build_stock_timeseries_index(_stock_all))
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=2))
+def load_rollup_cube(db1_fingerprint: str, _stock_all: pd.DataFrame, _analytics_db: str = None) -> dict:
+    """
+    Rollup cube wilayah × bulan × metode (kb_engine.cube), dibangun sekali per versi DB1.
+    Drill-down SUMMARY & deret waktu per wilayah di halaman TS hanya membaca cube ini.
+    Backend SQL: level sama dengan backend pandas; kecamatan/fasilitas ikut bila kolomnya berisi.
+    """
+    if _analytics_db:
+        optional = [lvl for lvl in REGION_LEVELS if lvl not in ("PROVINSI", "KABUPATEN")]
+        levels = cube_levels(sql_store.non_empty_columns(_analytics_db, sql_store.STOCK_TABLE, optional))
+        leaf = sql_store.stock_leaf_sums(_analytics_db, STOCK_METHODS, levels, region_fill_values(levels))
+    else:
+        leaf = stock_leaf_sums(_stock_all)
+    return freeze(build_rollup_cube(leaf))
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=64))
+def load_region_ts_statistics(db1_fingerprint: str, path: tuple, _cube: dict) -> dict:
+    """MA3 + ADF untuk 1 node wilayah cube (provinsi/kecamatan/fasilitas), dihitung sekali per node."""
+    return compute_ts_statistics(node_timeseries(_cube, path))
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=2))
+def ts_statistics_store(db1_fingerprint: str, _ts_source, _kabupaten: tuple) -> dict:
+    """
+    Memo MA3 + ADF per kabupaten untuk 1 versi DB1 (dibagi semua sesi).
+    Dibuat saat halaman TS pertama kali dibuka; job latar lalu mengisi semua
+    kabupaten sekaligus, jadi ganti kabupaten / toggle
+    variabel di halaman TS cukup membaca angka yang sudah ada.
+    _ts_source: indeks deret waktu (dict) atau path database analitik.
+    """
+    store = {}
+
+    def warm_up():
+        for kab in _kabupaten:
+            if kab not in store:
+                store[kab] = compute_ts_statistics(stock_timeseries_from(_ts_source, kab))
+
+    threading.Thread(target=warm_up, name="ts-statistics-warmup", daemon=True).start()
+    return store
+
+
+def get_ts_statistics(store: dict, ts_source, kabupaten: str) -> dict:
+    """Ambil statistik TS dari memo; hitung langsung bila job latar belum sampai kabupaten ini."""
+    stats = store.get(kabupaten)
+    if stats is None:
+        stats = compute_ts_statistics(stock_timeseries_from(ts_source, kabupaten))
+        store[kabupaten] = stats
+    return stats
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=8))
+def load_link_statistics(model_fingerprint: str, _integrated: pd.DataFrame) -> dict:
+    """Semua statistik halaman Keterkaitan (Spearman + Mann–Whitney), dihitung sekali per versi data."""
+    return link_statistics(_integrated)
+
 
-    # Buat agregat metode
-    stock_raw["SUNTIK"] = (
-        stock_raw["SUNTIKAN 1 BULANAN"]
-        + stock_raw["SUNTIKAN 3 BULANAN KOMBINASI"]
-        + stock_raw["SUNTIKAN 3 BULANAN PROGESTIN"]
+@instrument_cache(st.cache_data(show_spinner="Menghitung bootstrap & permutasi..."))
+def load_spearman_resampling(model_fingerprint: str, x_var: str, y_var: str, _integrated: pd.DataFrame) -> dict:
+    """CI bootstrap + p-value permutasi rho Spearman, di-cache per (versi data, X, Y)."""
+    valid = link_valid_rows(_integrated, x_var, y_var)
+    return spearman_resampling(
+        valid[x_var], valid[y_var],
+        n_resamples=RESAMPLING_N, seed=RESAMPLING_SEED, executor=get_process_pool()
     )
-    stock_raw["PIL"] = stock_raw["PIL KOMBINASI"] + stock_raw["PIL PROGESTIN"]
-    stock_raw["IMPLAN"] = stock_raw["IMPLAN 1 BATANG"] + stock_raw["IMPLAN 2 BATANG"]
-
-    # Urutan bulan (supaya grafik deret waktu rapi)
-    stock_raw["BULAN"] = pd.Categorical(
-        stock_raw["BULAN"].apply(normalize_text),
-        categories=MONTH_ORDER,
-        ordered=True
+
+
+@instrument_cache(st.cache_data(show_spinner="Menghitung bootstrap & permutasi..."))
+def load_kruskal_resampling(model_fingerprint: str, group_base: str, y_var: str, _groups: list) -> dict:
+    """CI bootstrap + p-value permutasi H Kruskal–Wallis, di-cache per (versi data, grup, Y)."""
+    return kruskal_resampling(
+        _groups, n_resamples=RESAMPLING_N, seed=RESAMPLING_SEED, executor=get_process_pool()
     )
 
-    # Pastikan ada kolom kabupaten untuk proses join
-    if "KABUPATEN" not in stock_raw.columns:
-        raise ValueError("DB1: kolom 'KABUPATEN' tidak ditemukan (dibutuhkan untuk keterkaitan).")
 
-    stock_raw["KABUPATEN"] = stock_raw["KABUPATEN"].astype(str).str.strip().str.upper()
-    return stock_raw
+def show_dataframe(df, **kwargs) -> None:
+    """st.dataframe + timer (konversi Arrow & pengiriman ke browser terjadi di panggilan ini)."""
+    with stage("st.dataframe"):
+        st.dataframe(df, **kwargs)
 
 
-def get_stock_timeseries_for_kabupaten(stock_all: pd.DataFrame, kabupaten: str) -> pd.DataFrame:
-    """Ambil stok per bulan untuk 1 kabupaten."""
-    df = stock_all[stock_all["KABUPATEN"] == kabupaten][["BULAN"] + STOCK_METHODS].copy()
-    return df.groupby("BULAN", as_index=False).sum().sort_values("BULAN")
+def render_resampling_metrics(result: dict, statistic_label: str) -> None:
+    """Tampilkan CI bootstrap + p-value permutasi."""
+    r1, r2 = st.columns(2)
+    r1.metric(f"CI 95% {statistic_label} (bootstrap)", f"[{result['ci_low']:.3f}, {result['ci_high']:.3f}]")
+    r2.metric("p-value permutasi", f"{result['p_permutation']:.4f}")
+    st.caption(f"{result['n_resamples']:,} resample, seed {RESAMPLING_SEED}.")
 
 
-def aggregate_stock_by_kabupaten(stock_all: pd.DataFrame) -> pd.DataFrame:
-    """Agregasi stok setahun per kabupaten (menjumlahkan semua bulan)."""
-    out = stock_all[["KABUPATEN"] + STOCK_METHODS].groupby("KABUPATEN", as_index=False).sum()
-    out["TOTAL_STOK"] = out[STOCK_METHODS].sum(axis=1)
-    return out
+FORECAST_DIR = os.path.join(CACHE_DIR, "forecast")
 
 
-# =========================================================
-# 5) MEMBACA & MENYIAPKAN DB2 (SDM + ADMIN)
-# =========================================================
-@st.cache_data(ttl=300)
-def load_db2_people(excel_path_or_file) -> pd.DataFrame:
-    """
-    DB2 berisi jumlah tempat KB dan SDM per kabupaten.
-    Menghasilkan kolom tambahan:
-    - tenaga_kesehatan_total
-    - sdm_per_tempat
-    - admin_per_tempat
-    """
-    df = pd.read_excel(excel_path_or_file)
-
-    # Samakan nama kolom agar gampang dipakai
-    df.columns = [
-        "kode", "kabupaten", "tempat_kb",
-        "dok_kandungan", "dok_urologi", "dok_umum",
-        "bidan", "perawat", "administrasi"
-    ]
-
-    # Buang baris yang kabupatennya kosong / header / bukan teks kabupaten
-    df = df[df["kabupaten"].notna()]
-    df["kabupaten"] = df["kabupaten"].astype(str).str.strip()
-    df = df[df["kabupaten"].str.upper() != "KABUPATEN"]
-    df = df[df["kabupaten"].str.isalpha()]
-    df = df.reset_index(drop=True)
-
-    # Ubah semua kolom angka jadi numeric
-    numeric_cols = df.columns[2:]
-    df[numeric_cols] = df[numeric_cols].apply(lambda x: pd.to_numeric(x, errors="coerce"))
-
-    # Total tenaga kesehatan = dokter + bidan + perawat
-    df["tenaga_kesehatan_total"] = (
-        df["dok_kandungan"].fillna(0)
-        + df["dok_urologi"].fillna(0)
-        + df["dok_umum"].fillna(0)
-        + df["bidan"].fillna(0)
-        + df["perawat"].fillna(0)
-    )
+def load_forecast_table(db1_fingerprint: str, cube: dict) -> pd.DataFrame:
+    """
+    Tabel fit prakiraan (kb_engine.forecast.fit_table) untuk 1 versi DB1. Disimpan sebagai
+    Parquet di data/.cache/forecast/ (nama file = sidik isi DB1 + versi model), supaya
+    restart dengan data yang sama tidak memfit ulang.
+    """
+    version = hashlib.sha256(f"{CACHE_VERSION}|{FORECAST_VERSION}|{db1_fingerprint}".encode()).hexdigest()[:16]
+    path = os.path.join(FORECAST_DIR, f"forecast_{version}.parquet")
+    try:
+        return pd.read_parquet(path)
+    except (OSError, ValueError):
+        pass
 
-    # Hindari pembagian nol (tempat_kb = 0)
-    df["tempat_kb_safe"] = df["tempat_kb"].replace({0: np.nan})
-    df["sdm_per_tempat"] = (df["tenaga_kesehatan_total"] / df["tempat_kb_safe"]).round(3)
-    df["admin_per_tempat"] = (df["administrasi"] / df["tempat_kb_safe"]).round(3)
+    table = fit_table(cube, executor=get_process_pool())
+    try:
+        os.makedirs(FORECAST_DIR, exist_ok=True)
+        # Buang hasil versi lama
+        for name in os.listdir(FORECAST_DIR):
+            os.remove(os.path.join(FORECAST_DIR, name))
+        table.to_parquet(path + ".tmp", index=False)
+        os.replace(path + ".tmp", path)
+    except OSError:
+        # Cache hanya optimasi: folder read-only -> lewati saja
+        pass
+    return table
+
+
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=2))
+def forecast_store(db1_fingerprint: str, _cube: dict) -> dict:
+    """
+    Prakiraan + tabel risiko stok habis (kb_engine.forecast) untuk 1 versi DB1 (dibagi semua sesi).
+    Dimulai saat snapshot data dibangun: semua deret difit sekali di thread latar (process pool),
+    halaman Prakiraan hanya membaca hasil yang sudah jadi.
+    state: result (None selama fitting berjalan), error.
+    """
+    state = {"result": None, "error": None}
 
-    # Format kolom integer (rapi)
-    int_cols = [
-        "tempat_kb", "dok_kandungan", "dok_urologi", "dok_umum",
-        "bidan", "perawat", "administrasi", "tenaga_kesehatan_total"
-    ]
-    df[int_cols] = df[int_cols].round(0).astype("Int64")
+    def fit():
+        try:
+            state["result"] = freeze(forecast_result(_cube, load_forecast_table(db1_fingerprint, _cube)))
+        except Exception as e:
+            state["error"] = str(e)
 
-    # Siapkan kunci join
-    df["KABUPATEN"] = df["kabupaten"].str.upper()
-    return df
+    threading.Thread(target=fit, name="forecast-fit", daemon=True).start()
+    return state
 
 
-# =========================================================
-# 6) LOAD FILE DARI FOLDER REPO (data/)
-# =========================================================
-DB1_PATH = os.path.join("data", "DATA KETERSEDIAAN ALAT DAN OBAT KONTRASEPSI.xlsx")
-DB2_PATH = os.path.join("data", "Jumlah tempat pelayanan kb yang memiliki tenaga kesehatan dan administrasi.xlsx")
+@instrument_cache(st.cache_resource(show_spinner=False, max_entries=32))
+def load_tercile_codes(model_fingerprint: str, group_base: str, _integrated: pd.DataFrame) -> np.ndarray:
+    """Kode kategori Kruskal per group_base, dihitung sekali per versi data (array read-only)."""
+    return freeze(tercile_codes(_integrated[group_base]))
 
-if not os.path.exists(DB1_PATH):
-    st.error(f"File DB1 tidak ditemukan: {DB1_PATH}")
-    st.stop()
 
-if not os.path.exists(DB2_PATH):
-    st.error(f"File DB2 tidak ditemukan: {DB2_PATH}")
-    st.stop()
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+# Naikkan bila isi sheet ekspor berubah (file ekspor lama otomatis dibuat ulang)
+EXPORT_VERSION = 2
 
-# Baca data
-stock_all_months_df = load_db1_stock_timeseries(DB1_PATH)
-people_df = load_db2_people(DB2_PATH)
 
-# Agregasi stok tahunan per kabupaten
-stock_yearly_by_kab_df = aggregate_stock_by_kabupaten(stock_all_months_df)
+def ensure_export(fmt: str, model_fingerprint: str, tahun: int, make_sheets) -> str:
+    """
+    Path file ekspor untuk versi model ini. Dibuat sekali (per chunk, langsung ke disk)
+    lalu dipakai ulang oleh semua sesi sampai file DB1/DB2 berubah.
+    make_sheets() -> {nama_sheet: DataFrame}, hanya dipanggil bila file belum ada.
+    """
+    prefix = f"dataset_terintegrasi_kb_{tahun}_"
+    ext = EXPORT_FORMATS[fmt][1]
+    path = os.path.join(EXPORT_DIR, f"{prefix}v{EXPORT_VERSION}_{model_fingerprint[:16]}.{ext}")
+    if not os.path.exists(path):
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        # Buang ekspor versi lama dengan tahun & format yang sama
+        for name in os.listdir(EXPORT_DIR):
+            if name.startswith(prefix) and name.endswith(f".{ext}") and name != os.path.basename(path):
+                os.remove(os.path.join(EXPORT_DIR, name))
+        write_export(make_sheets(), fmt, path)
+    return path
 
-# Gabungkan (join) DB1 + DB2 berdasarkan kabupaten yang sama
-integrated_df = people_df.merge(stock_yearly_by_kab_df, on="KABUPATEN", how="inner")
 
-kabupaten_list = sorted(integrated_df["KABUPATEN"].unique().tolist())
-if not kabupaten_list:
-    st.error("Tidak ada kabupaten yang terhubung. Pastikan penulisan kabupaten DB1 & DB2 sama.")
-    st.stop()
+# Pemantau folder data/: cek perubahan file tiap interval ini (detik)
+DATA_WATCH_INTERVAL_S = 5
+
+
+def data_source_state() -> tuple:
+    """Kunci murah semua file sumber (path, ukuran, mtime); berubah bila file DB1/DB2 ditambah/diubah."""
+    return db1_sources_key(list_db1_sources()), db1_sources_key([DB2_PATH])
+
+
+def build_data_snapshot(source_state: tuple) -> dict:
+    """
+    Snapshot data lengkap untuk 1 versi file: frame bersih, indeks deret waktu
+    dan model terintegrasi untuk SEMUA tahun. Semua objek read-only & dibagi semua sesi.
+    """
+    db1_key, _ = source_state
+    db1_paths = [p for p, _, _ in db1_key]
+    db1_fingerprint, db1_manifest = sync_db1(db1_key)
+    db2_fingerprint = file_fingerprint(DB2_PATH)
+    people = load_frame("db2", DB2_PATH, db2_fingerprint)
+
+    if ANALYTICS_BACKEND == "sql":
+        # Frame stok tidak dimuat ke memori; agregasi & deret waktu dibaca lewat query
+        analytics_db = analytics_store(db1_fingerprint, db2_fingerprint, db1_manifest, db1_paths, people)
+        stock_all = None
+        ts_source = analytics_db
+        ts_kabupaten = tuple(sql_store.distinct_values(analytics_db, sql_store.STOCK_TABLE, "KABUPATEN"))
+        tahun_list = [int(t) for t in sql_store.distinct_values(analytics_db, sql_store.STOCK_TABLE, "TAHUN")]
+    else:
+        analytics_db = None
+        stock_all = load_db1_frame(db1_fingerprint, db1_manifest, db1_paths)
+        ts_source = load_stock_timeseries_index(db1_fingerprint, stock_all)
+        ts_kabupaten = tuple(ts_source["positions"])
+        tahun_list = sorted(int(t) for t in stock_all["TAHUN"].unique())
+
+    cube = load_rollup_cube(db1_fingerprint, stock_all, analytics_db)
+    # Prakiraan difit di latar sekali per versi DB1 (tidak menahan snapshot maupun rerun pengguna)
+    forecasts = forecast_store(db1_fingerprint, cube)
+    # Hanya partisi DB1 baru/berubah & baris DB2 yang berubah yang diterapkan ke ledger
+    ledger = kpi_ledger()
+    with stage("kpi_ledger_sync"):
+        ledger_sync = sync_ledger(ledger, db1_ledger_parts(db1_manifest, db1_paths), people)
+    models = {
+        tahun: build_integrated_model(db1_fingerprint, db2_fingerprint, tahun, stock_all, people, analytics_db, ledger)
+        for tahun in tahun_list
+    }
+    # Job latar MA3/ADF baru dimulai saat halaman TS pertama kali dibuka
+    # (ADF butuh statsmodels; start dashboard tidak ikut memuatnya)
+
+    return {
+        "db1_fingerprint": db1_fingerprint,
+        "db1_manifest": db1_manifest,
+        "db1_paths": db1_paths,
+        "db2_fingerprint": db2_fingerprint,
+        "people": people,
+        "analytics_db": analytics_db,
+        "stock_all": stock_all,
+        "ts_source": ts_source,
+        "ts_kabupaten": ts_kabupaten,
+        "tahun_list": tahun_list,
+        "cube": cube,
+        "forecasts": forecasts,
+        "ledger_sync": ledger_sync,
+        "models": models,
+    }
+
+
+def refresh_data_snapshot(state: dict) -> dict:
+    """
+    Bangun snapshot baru bila file sumber berubah, lalu tukar referensinya sekaligus.
+    Sesi yang sedang jalan tetap memakai snapshot lama yang sudah dipegangnya.
+    Gagal (mis. file masih disalin) -> snapshot lama dipertahankan, dicoba lagi saat file berubah lagi.
+    """
+    source_state = data_source_state()
+    if source_state in (state["source_state"], state["failed_state"]):
+        return state["snapshot"]
+
+    with state["lock"]:
+        # Watcher yang sudah dihentikan tidak membangun snapshot lagi (ledger sudah milik watcher baru)
+        if state["stop"].is_set():
+            return state["snapshot"]
+        if source_state not in (state["source_state"], state["failed_state"]):
+            try:
+                snapshot = build_data_snapshot(source_state)
+            except Exception as e:
+                if state["snapshot"] is None:
+                    raise
+                state["failed_state"], state["error"] = source_state, str(e)
+            else:
+                state["snapshot"], state["source_state"] = snapshot, source_state
+                state["failed_state"], state["error"] = None, None
+    return state["snapshot"]
+
+
+def stop_data_watcher(state: dict) -> None:
+    """Hentikan thread pemantau lama saat resource data_watcher dibuang (cache di-clear)."""
+    state["stop"].set()
+
+
+@st.cache_resource(show_spinner=False, on_release=stop_data_watcher)
+def data_watcher() -> dict:
+    """
+    Pemantau latar folder data/ (1 per proses). Perubahan file diproses di thread
+    ini, bukan di rerun pengguna: pengguna selalu melihat snapshot lama atau baru,
+    tidak pernah menunggu parsing Excel. Thread berhenti begitu flag "stop" di-set
+    (cache di-clear -> watcher baru dibuat, yang lama tidak boleh ikut memproses).
+    """
+    state = {
+        "snapshot": None, "source_state": None, "failed_state": None, "error": None,
+        "lock": threading.Lock(), "stop": threading.Event(),
+    }
+
+    def watch():
+        while not state["stop"].wait(DATA_WATCH_INTERVAL_S):
+            try:
+                refresh_data_snapshot(state)
+            except Exception as e:
+                state["error"] = str(e)
+
+    threading.Thread(target=watch, name="data-watcher", daemon=True).start()
+    return state
+
+
+# Baca data: pakai snapshot terbaru (hanya rerun pertama di proses ini yang membangunnya)
+data_state = data_watcher()
+snapshot = data_state["snapshot"] or refresh_data_snapshot(data_state)
+
+db1_fingerprint = snapshot["db1_fingerprint"]
+db1_manifest = snapshot["db1_manifest"]
+db2_fingerprint = snapshot["db2_fingerprint"]
+analytics_db = snapshot["analytics_db"]
+stock_ts_source = snapshot["ts_source"]
+ts_kabupaten = snapshot["ts_kabupaten"]
+tahun_list = snapshot["tahun_list"]
+# Cube read-only (hanya array & dict kunci), dibaca langsung tanpa view per sesi
+rollup_cube = snapshot["cube"]
+# Objek di bawah dibagi semua sesi; session_view = view Copy-on-Write per sesi (tanpa salin data)
+people_df = session_view(snapshot["people"])
+stock_all_months_df = session_view(snapshot["stock_all"])
 
 
 # =========================================================
-# 7) SIDEBAR MENU
+# 5) SIDEBAR MENU
 # =========================================================
 MENU_ITEMS = [
     ("SUMMARY",  "📊  Dashboard"),
@@ -443,8 +888,12 @@ MENU_ITEMS = [
     ("PEOPLE",   "👥  People Analytics"),
     ("LINK",     "🔗  Keterkaitan"),
     ("KRUSKAL",  "🧪  Kruskal–Wallis"),
+    ("FORECAST", "📉  Prakiraan"),
     ("DATASET",  "🗂️  Dataset"),
 ]
+# Menu tersembunyi untuk operator: buka dashboard dengan ?diagnostics=1 (atau env KB_DIAGNOSTICS=1)
+if st.query_params.get("diagnostics") == "1" or os.environ.get("KB_DIAGNOSTICS") == "1":
+    MENU_ITEMS.append(("DIAGNOSTICS", "🩺  Diagnostics"))
 MENU_LABEL = {key: label for key, label in MENU_ITEMS}
 
 with st.sidebar:
@@ -457,6 +906,16 @@ with st.sidebar:
         format_func=lambda k: MENU_LABEL[k],
         label_visibility="collapsed"
     )
+    annotate_run(label=active_menu)
+
+    # Pilihan tahun hanya muncul bila DB1 memuat lebih dari 1 tahun (default: tahun terbaru)
+    if len(tahun_list) > 1:
+        selected_tahun = st.selectbox("Tahun", tahun_list, index=len(tahun_list) - 1)
+    else:
+        selected_tahun = tahun_list[0]
+
+    if data_state["error"]:
+        st.warning(f"Data baru di folder data/ gagal dimuat, menampilkan data sebelumnya. ({data_state['error']})")
 
     st.markdown(
         "<div class='sidebar-foot'>Data dibaca dari folder <b>data/</b> di repo.</div>",
@@ -464,15 +923,25 @@ with st.sidebar:
     )
 
 
+# Model terintegrasi untuk tahun terpilih
+integrated_model = session_view(snapshot["models"][selected_tahun])
+integrated_df = integrated_model["integrated_df"]
+model_fingerprint = integrated_model["fingerprint"]
+kabupaten_list = integrated_model["kabupaten_list"]
+if not kabupaten_list:
+    st.error("Tidak ada kabupaten yang terhubung. Pastikan penulisan kabupaten DB1 & DB2 sama.")
+    stop_run()
+
+
 # =========================================================
-# 8) TOPBAR + FILTER KABUPATEN
+# 6) TOPBAR + FILTER KABUPATEN
 # =========================================================
 top_left, top_right = st.columns([2.4, 1.2], vertical_alignment="center")
 
 with top_left:
     crumb = MENU_LABEL[active_menu]
     # hilangkan emoji di crumb agar lebih clean
-    for emoji in ["📊", "📈", "👥", "🔗", "🧪", "🗂️"]:
+    for emoji in ["📊", "📈", "👥", "🔗", "🧪", "📉", "🗂️", "🩺"]:
         crumb = crumb.replace(emoji, "").strip()
 
     st.markdown(
@@ -483,15 +952,23 @@ with top_left:
 
 with top_right:
     selected_kabupaten = st.selectbox("Kabupaten", kabupaten_list, index=0)
+    # DB2 hanya memuat nama kabupaten: nama yang ada di beberapa provinsi DB1 dipilih provinsinya
+    kabupaten_paths = rollup_cube["kabupaten_paths"].get(selected_kabupaten, [(DB1_DEFAULT_PROVINCE, selected_kabupaten)])
+    selected_kabupaten_path = kabupaten_paths[0]
+    if len(kabupaten_paths) > 1:
+        provinsi_options = [path[0] for path in kabupaten_paths]
+        provinsi = st.selectbox("Provinsi", provinsi_options, key="kabupaten_provinsi")
+        selected_kabupaten_path = kabupaten_paths[provinsi_options.index(provinsi)]
 
 
 # =========================================================
-# 9) KPI UTAMA (RINGKASAN ANGKA)
+# 7) KPI UTAMA (RINGKASAN ANGKA)
 # =========================================================
-jumlah_kabupaten_terhubung = integrated_df["KABUPATEN"].nunique()
-total_tempat_kb = int(integrated_df["tempat_kb"].fillna(0).sum())
-total_tenaga_kesehatan = int(integrated_df["tenaga_kesehatan_total"].fillna(0).sum())
-total_stok_setahun = float(integrated_df["TOTAL_STOK"].fillna(0).sum())
+kpi = integrated_model["kpi"]
+jumlah_kabupaten_terhubung = kpi["jumlah_kabupaten_terhubung"]
+total_tempat_kb = kpi["total_tempat_kb"]
+total_tenaga_kesehatan = kpi["total_tenaga_kesehatan"]
+total_stok_setahun = kpi["total_stok_setahun"]
 
 st.markdown(
     f"""
@@ -523,69 +1000,118 @@ st.markdown(
 
 
 # =========================================================
-# 10) ISI HALAMAN (BERDASARKAN MENU)
+# 8) ISI HALAMAN (BERDASARKAN MENU)
 # =========================================================
 if active_menu == "SUMMARY":
+    # Leaderboard: ganti metrik / K hanya mengiris indeks top-K model (tanpa sort tabel)
+    top_k = st.selectbox("Jumlah kabupaten (K)", LEADERBOARD_K_OPTIONS, index=LEADERBOARD_K_OPTIONS.index(10))
     left, right = st.columns(2, gap="large")
 
-    with left:
-        st.markdown("<div class='card'><b>Top 10 — Tenaga Kesehatan Total</b></div>", unsafe_allow_html=True)
-        top10_sdm = integrated_df.sort_values("tenaga_kesehatan_total", ascending=False).head(10)
-        st.dataframe(
-            top10_sdm[["KABUPATEN", "tempat_kb", "tenaga_kesehatan_total", "administrasi"]],
-            use_container_width=True,
-            height=360
-        )
+    for col, default_metric, key in [
+        (left, "tenaga_kesehatan_total", "leaderboard_left"),
+        (right, "TOTAL_STOK", "leaderboard_right"),
+    ]:
+        with col:
+            metric = st.selectbox(
+                "Peringkat berdasarkan", LEADERBOARD_METRICS,
+                index=LEADERBOARD_METRICS.index(default_metric), key=key
+            )
+            board = leaderboard(integrated_df, integrated_model["leaderboard"], metric, top_k)
+            st.markdown(f"<div class='card'><b>Top {top_k} — {metric}</b></div>", unsafe_allow_html=True)
+            show_dataframe(board, use_container_width=True, height=360, hide_index=True)
 
-        st.markdown("<div class='chart-card'><b>Grafik Top 10 — Tenaga Kesehatan</b></div>", unsafe_allow_html=True)
-        st.bar_chart(top10_sdm.set_index("KABUPATEN")[["tenaga_kesehatan_total"]], use_container_width=True)
+            st.markdown(f"<div class='chart-card'><b>Grafik Top {top_k} — {metric}</b></div>", unsafe_allow_html=True)
+            st.bar_chart(board.set_index("KABUPATEN")[[metric]], use_container_width=True)
 
-    with right:
-        st.markdown("<div class='card'><b>Top 10 — Total Stok Setahun</b></div>", unsafe_allow_html=True)
-        top10_stok = integrated_df.sort_values("TOTAL_STOK", ascending=False).head(10)
-        st.dataframe(
-            top10_stok[["KABUPATEN", "TOTAL_STOK", "SUNTIK", "PIL", "IMPLAN", "KONDOM", "IUD"]],
-            use_container_width=True,
-            height=360
+    # Drill-down / roll-up stok per wilayah: hanya membaca total tahunan di rollup cube
+    st.markdown(
+        f"<div class='card'><b>Drill-down stok per wilayah</b><br/>"
+        f"<span style='color:rgba(15,23,42,0.62)'>Tahun {selected_tahun}</span></div>",
+        unsafe_allow_html=True
+    )
+    region_path = ()
+    for col, level in zip(st.columns(len(rollup_cube["levels"])), rollup_cube["levels"]):
+        with col:
+            choice = st.selectbox(level.title(), [ALL_REGIONS] + child_names(rollup_cube, region_path), key=f"drill_{level}")
+        if choice == ALL_REGIONS:
+            break
+        region_path += (choice,)
+
+    node_totals = node_year_totals(rollup_cube, region_path, selected_tahun)
+    metric_cols = st.columns(len(STOCK_METHODS_WITH_TOTAL))
+    for col, method in zip(metric_cols, ["TOTAL_STOK"] + STOCK_METHODS):
+        col.metric(method, f"{node_totals[method]:,.0f}")
+
+    drill_level = child_level(rollup_cube, region_path)
+    if drill_level is not None:
+        drill_df = children_table(rollup_cube, region_path, selected_tahun).head(DRILLDOWN_TOP_N)
+        st.markdown(
+            f"<div class='chart-card'><b>Top {DRILLDOWN_TOP_N} {drill_level.title()} — Total Stok</b></div>",
+            unsafe_allow_html=True
         )
-
-        st.markdown("<div class='chart-card'><b>Grafik Top 10 — Total Stok</b></div>", unsafe_allow_html=True)
-        st.bar_chart(top10_stok.set_index("KABUPATEN")[["TOTAL_STOK"]], use_container_width=True)
+        show_dataframe(drill_df, use_container_width=True)
+        st.bar_chart(drill_df.set_index(drill_level)[["TOTAL_STOK"]], use_container_width=True)
 
 
 elif active_menu == "TS":
+    # Tingkat wilayah: kabupaten (filter topbar), provinsinya, atau kecamatan/fasilitas di dalamnya
+    ts_level = st.selectbox(
+        "Tingkat wilayah", rollup_cube["levels"], index=rollup_cube["levels"].index("KABUPATEN"),
+        format_func=str.title
+    )
+    ts_path = selected_kabupaten_path[:rollup_cube["levels"].index(ts_level) + 1]
+    for level in rollup_cube["levels"][len(ts_path):rollup_cube["levels"].index(ts_level) + 1]:
+        options = child_names(rollup_cube, ts_path)
+        if not options:
+            st.info(f"Tidak ada data {level.title()} untuk {ts_path[-1]}.")
+            stop_run()
+        ts_path += (st.selectbox(level.title(), options, key=f"ts_{level}"),)
+
     st.markdown(
         f"<div class='card'><b>Deret Waktu Persediaan</b><br/>"
-        f"<span style='color:rgba(15,23,42,0.62)'>{selected_kabupaten}</span></div>",
+        f"<span style='color:rgba(15,23,42,0.62)'>{' › '.join(ts_path)}</span></div>",
         unsafe_allow_html=True
     )
 
-    ts_df = get_stock_timeseries_for_kabupaten(stock_all_months_df, selected_kabupaten)
+    # Indeks deret waktu per kabupaten dikunci nama: nama di beberapa provinsi dibaca dari cube per path
+    kabupaten_by_name = ts_level == "KABUPATEN" and len(kabupaten_paths) == 1
+    if kabupaten_by_name:
+        ts_df = stock_timeseries_from(stock_ts_source, selected_kabupaten)
+    else:
+        ts_df = node_timeseries(rollup_cube, ts_path)
+    # Lebih dari 1 tahun -> sumbu waktu pakai tanggal periode (BULAN saja akan bertumpuk)
+    ts_axis = "BULAN" if len(tahun_list) == 1 else "PERIODE"
 
     selected_stock_vars = st.multiselect("Variabel stok", STOCK_METHODS, default=STOCK_METHODS)
 
     if selected_stock_vars:
         st.markdown("<div class='chart-card'><b>Grafik Deret Waktu</b></div>", unsafe_allow_html=True)
-        st.line_chart(ts_df.set_index("BULAN")[selected_stock_vars], use_container_width=True)
+        st.line_chart(ts_df.set_index(ts_axis)[selected_stock_vars], use_container_width=True)
     else:
         st.info("Pilih minimal 1 variabel.")
 
     # Moving Average (3 bulan)
     st.markdown("<div class='chart-card'><b>Moving Average (3 bulan)</b></div>", unsafe_allow_html=True)
-    ma_df = ts_df.copy()
-    for v in STOCK_METHODS:
-        ma_df[f"MA3_{v}"] = ma_df[v].rolling(3).mean()
+    if kabupaten_by_name:
+        ts_stats = get_ts_statistics(
+            ts_statistics_store(db1_fingerprint, stock_ts_source, ts_kabupaten),
+            stock_ts_source,
+            selected_kabupaten
+        )
+    else:
+        ts_stats = load_region_ts_statistics(db1_fingerprint, ts_path, rollup_cube)
+    ma_df = ts_df[[ts_axis]].assign(**{f"MA3_{v}": ts_stats["ma3"][v] for v in STOCK_METHODS})
 
     show_ma_cols = [f"MA3_{v}" for v in selected_stock_vars] if selected_stock_vars else [f"MA3_{v}" for v in STOCK_METHODS]
-    st.line_chart(ma_df.set_index("BULAN")[show_ma_cols], use_container_width=True)
+    st.line_chart(ma_df.set_index(ts_axis)[show_ma_cols], use_container_width=True)
 
     # ADF
     st.markdown("<div class='card'><b>Uji stasioneritas (ADF)</b></div>", unsafe_allow_html=True)
     rows = []
     for v in STOCK_METHODS:
-        p_value, conclusion = adf_test_result(ts_df[v])
+        p_value, conclusion = ts_stats["adf"][v]
         rows.append({"Variabel": v, "p-value": p_value, "Kesimpulan": conclusion})
-    st.dataframe(pd.DataFrame(rows), use_container_width=True)
+    show_dataframe(pd.DataFrame(rows), use_container_width=True)
 
 
 elif active_menu == "PEOPLE":
@@ -609,16 +1135,13 @@ elif active_menu == "PEOPLE":
     })
 
     st.markdown("<div class='card'><b>Komposisi stok setahun</b></div>", unsafe_allow_html=True)
-    st.dataframe(composition_df, use_container_width=True)
+    show_dataframe(composition_df, use_container_width=True)
 
     st.markdown("<div class='chart-card'><b>Grafik komposisi stok</b></div>", unsafe_allow_html=True)
     st.bar_chart(composition_df.set_index("Metode"), use_container_width=True)
 
     st.markdown("<div class='card'><b>Deskriptif variabel kunci</b></div>", unsafe_allow_html=True)
-    st.dataframe(
-        integrated_df[["tempat_kb", "tenaga_kesehatan_total", "administrasi", "sdm_per_tempat", "admin_per_tempat", "TOTAL_STOK"]].describe(),
-        use_container_width=True
-    )
+    show_dataframe(integrated_model["describe_df"], use_container_width=True)
 
 
 elif active_menu == "LINK":
@@ -628,45 +1151,63 @@ elif active_menu == "LINK":
         unsafe_allow_html=True
     )
 
-    people_x_options = ["tempat_kb", "tenaga_kesehatan_total", "administrasi", "sdm_per_tempat", "admin_per_tempat"]
+    link_stats = session_view(load_link_statistics(model_fingerprint, integrated_df))
     stock_y_options = STOCK_METHODS_WITH_TOTAL
 
     col1, col2 = st.columns(2)
     with col1:
-        x_var = st.selectbox("Variabel People (X)", people_x_options, index=1)
+        x_var = st.selectbox("Variabel People (X)", PEOPLE_X_OPTIONS, index=1)
     with col2:
         y_var = st.selectbox("Variabel Stok (Y)", stock_y_options, index=0)
 
-    valid_df = integrated_df[[x_var, y_var, "KABUPATEN", "administrasi"]].dropna()
+    pair_stats = link_stats["spearman"].loc[(x_var, y_var)]
 
-    if len(valid_df) < 5:
+    if pair_stats["n"] < 5:
         st.warning("Data valid terlalu sedikit untuk analisis korelasi.")
     else:
-        rho, p_value = spearmanr(valid_df[x_var], valid_df[y_var], nan_policy="omit")
+        rho, p_value = float(pair_stats["rho"]), float(pair_stats["p_value"])
         a, b, c = st.columns(3)
         a.metric("Spearman rho", f"{rho:.3f}")
         b.metric("p-value", f"{p_value:.4f}")
         c.metric("Kekuatan", spearman_strength_label(rho))
 
+        if st.checkbox("CI bootstrap & p-value permutasi untuk rho"):
+            render_resampling_metrics(
+                load_spearman_resampling(model_fingerprint, x_var, y_var, integrated_df),
+                "rho"
+            )
+
+        valid_df = link_valid_rows(integrated_df, x_var, y_var)
         st.markdown("<div class='chart-card'><b>Scatter</b></div>", unsafe_allow_html=True)
         st.scatter_chart(valid_df.set_index("KABUPATEN")[[x_var, y_var]], use_container_width=True)
 
+    if st.checkbox("Tampilkan semua pasangan (matriks Spearman)"):
+        st.markdown("<div class='card'><b>Matriks Spearman rho (People × Stok)</b></div>", unsafe_allow_html=True)
+        show_dataframe(
+            link_stats["spearman"]["rho"].unstack("y_var")
+            .reindex(index=PEOPLE_X_OPTIONS, columns=stock_y_options).round(3),
+            use_container_width=True
+        )
+        st.markdown("<div class='card'><b>Matriks p-value</b></div>", unsafe_allow_html=True)
+        show_dataframe(
+            link_stats["spearman"]["p_value"].unstack("y_var")
+            .reindex(index=PEOPLE_X_OPTIONS, columns=stock_y_options).round(4),
+            use_container_width=True
+        )
+
     # Mann–Whitney: bandingkan stok ketika admin ada vs tidak
     st.markdown("<div class='card'><b>Uji beda (Mann–Whitney): Admin ada vs tidak</b></div>", unsafe_allow_html=True)
 
-    mw_df = integrated_df[[y_var, "administrasi"]].dropna()
-    group_admin_exists = mw_df[mw_df["administrasi"].astype(float) > 0][y_var].astype(float)
-    group_admin_none = mw_df[mw_df["administrasi"].astype(float) == 0][y_var].astype(float)
+    mw = link_stats["mannwhitney"].loc[y_var]
 
-    if len(group_admin_exists) == 0 or len(group_admin_none) == 0:
+    if mw["n_admin_ada"] == 0 or mw["n_admin_tidak"] == 0:
         st.warning("Tidak cukup data untuk membagi grup admin > 0 vs admin = 0.")
     else:
-        u_stat, p_mw = mannwhitneyu(group_admin_exists, group_admin_none, alternative="two-sided")
         m1, m2, m3, m4 = st.columns(4)
-        m1.metric("U", f"{u_stat:.3f}")
-        m2.metric("p-value", f"{p_mw:.4f}")
-        m3.metric("Median (Admin ada)", f"{float(np.median(group_admin_exists)):.3f}")
-        m4.metric("Median (Admin tidak)", f"{float(np.median(group_admin_none)):.3f}")
+        m1.metric("U", f"{mw['U']:.3f}")
+        m2.metric("p-value", f"{mw['p_value']:.4f}")
+        m3.metric("Median (Admin ada)", f"{mw['median_admin_ada']:.3f}")
+        m4.metric("Median (Admin tidak)", f"{mw['median_admin_tidak']:.3f}")
 
 
 elif active_menu == "KRUSKAL":
@@ -683,19 +1224,8 @@ elif active_menu == "KRUSKAL":
         index=0
     )
 
-    # Buat kategori 3 level (Rendah/Sedang/Tinggi)
-    try:
-        integrated_df["_kategori_base"] = pd.qcut(
-            integrated_df[group_base].astype(float),
-            q=3,
-            labels=["Rendah", "Sedang", "Tinggi"]
-        )
-    except Exception:
-        integrated_df["_kategori_base"] = pd.cut(
-            integrated_df[group_base].astype(float),
-            bins=3,
-            labels=["Rendah", "Sedang", "Tinggi"]
-        )
+    # Kategori 3 level (Rendah/Sedang/Tinggi) sebagai kode 0/1/2; integrated_df tidak diubah
+    kategori_codes = load_tercile_codes(model_fingerprint, group_base, integrated_df)
 
     tab1, tab2 = st.tabs(["Kruskal DB2 (People)", "Kruskal DB1 (Stok)"])
 
@@ -703,28 +1233,38 @@ elif active_menu == "KRUSKAL":
         st.markdown("<div class='card'><b>DB2 — Rasio per Fasilitas</b></div>", unsafe_allow_html=True)
         y_people = st.selectbox("Variabel people", ["sdm_per_tempat", "admin_per_tempat"], index=0)
 
-        d = integrated_df[[y_people, "_kategori_base"]].dropna()
-        labels = ["Rendah", "Sedang", "Tinggi"]
-        groups = [d[d["_kategori_base"] == lab][y_people].astype(float).dropna().values for lab in labels]
+        kw = kruskal_by_codes(
+            integrated_df[y_people].to_numpy(dtype=float, na_value=np.nan),
+            kategori_codes
+        )
 
-        if sum(len(g) > 0 for g in groups) < 2:
+        if len(kw["groups"]) < 2:
             st.warning("Data tidak cukup untuk Kruskal (minimal 2 grup).")
         else:
-            g_use = [g for g in groups if len(g) > 0]
-            h_stat, p_kw = kruskal(*g_use)
+            h_stat, p_kw = kw["h_stat"], kw["p_value"]
 
             a, b = st.columns(2)
             a.metric("H statistic", f"{h_stat:.3f}")
             b.metric("p-value", f"{p_kw:.4f}")
 
+            if st.checkbox("CI bootstrap & p-value permutasi untuk H", key="kruskal_resampling_people"):
+                render_resampling_metrics(
+                    load_kruskal_resampling(model_fingerprint, group_base, y_people, kw["groups"]),
+                    "H"
+                )
+
             if p_kw < 0.05:
                 st.success("Ada perbedaan signifikan antar kategori (α=5%).")
             else:
                 st.info("Tidak ada perbedaan signifikan antar kategori (α=5%).")
 
-            med = d.groupby("_kategori_base")[y_people].median().reindex(labels)
-            st.dataframe(
-                med.reset_index().rename(columns={"_kategori_base": "Kategori", y_people: "Median"}),
+            med = pd.Series(
+                kw["median"],
+                index=pd.Index(KRUSKAL_LABELS, name="Kategori"),
+                name=y_people
+            )
+            show_dataframe(
+                med.reset_index().rename(columns={y_people: "Median"}),
                 use_container_width=True
             )
             st.markdown("<div class='chart-card'><b>Grafik median</b></div>", unsafe_allow_html=True)
@@ -734,46 +1274,228 @@ elif active_menu == "KRUSKAL":
         st.markdown("<div class='card'><b>DB1 — Stok Kontrasepsi</b></div>", unsafe_allow_html=True)
         y_stok = st.selectbox("Variabel stok", ["TOTAL_STOK", "SUNTIK", "PIL", "IMPLAN", "KONDOM", "IUD"], index=0)
 
-        d = integrated_df[[y_stok, "_kategori_base"]].dropna()
-        labels = ["Rendah", "Sedang", "Tinggi"]
-        groups = [d[d["_kategori_base"] == lab][y_stok].astype(float).dropna().values for lab in labels]
+        kw = kruskal_by_codes(
+            integrated_df[y_stok].to_numpy(dtype=float, na_value=np.nan),
+            kategori_codes
+        )
 
-        if sum(len(g) > 0 for g in groups) < 2:
+        if len(kw["groups"]) < 2:
             st.warning("Data tidak cukup untuk Kruskal (minimal 2 grup).")
         else:
-            g_use = [g for g in groups if len(g) > 0]
-            h_stat, p_kw = kruskal(*g_use)
+            h_stat, p_kw = kw["h_stat"], kw["p_value"]
 
             a, b = st.columns(2)
             a.metric("H statistic", f"{h_stat:.3f}")
             b.metric("p-value", f"{p_kw:.4f}")
 
+            if st.checkbox("CI bootstrap & p-value permutasi untuk H", key="kruskal_resampling_stok"):
+                render_resampling_metrics(
+                    load_kruskal_resampling(model_fingerprint, group_base, y_stok, kw["groups"]),
+                    "H"
+                )
+
             if p_kw < 0.05:
                 st.success("Ada perbedaan signifikan stok antar kategori (α=5%).")
             else:
                 st.info("Tidak ada perbedaan signifikan stok antar kategori (α=5%).")
 
-            med = d.groupby("_kategori_base")[y_stok].median().reindex(labels)
-            st.dataframe(
-                med.reset_index().rename(columns={"_kategori_base": "Kategori", y_stok: "Median"}),
+            med = pd.Series(
+                kw["median"],
+                index=pd.Index(KRUSKAL_LABELS, name="Kategori"),
+                name=y_stok
+            )
+            show_dataframe(
+                med.reset_index().rename(columns={y_stok: "Median"}),
                 use_container_width=True
             )
             st.markdown("<div class='chart-card'><b>Grafik median stok</b></div>", unsafe_allow_html=True)
             st.bar_chart(med, use_container_width=True)
 
-    # Bersihkan kolom sementara
-    if "_kategori_base" in integrated_df.columns:
-        integrated_df.drop(columns=["_kategori_base"], inplace=True)
+
+elif active_menu == "FORECAST":
+    st.markdown(
+        f"<div class='card'><b>Prakiraan Stok & Risiko Stok Habis</b><br/>"
+        f"<span style='color:rgba(15,23,42,0.62)'>{selected_kabupaten} — {FORECAST_HORIZON} bulan ke depan</span></div>",
+        unsafe_allow_html=True
+    )
+
+    # Semua model difit di latar per versi data; tiap klik hanya mengindeks hasil
+    forecasts = snapshot["forecasts"]["result"]
+    if forecasts is None:
+        if snapshot["forecasts"]["error"]:
+            st.error(f"Prakiraan gagal dihitung: {snapshot['forecasts']['error']}")
+        else:
+            st.info("Model prakiraan sedang difit di latar (sekali per versi data). Muat ulang halaman sebentar lagi.")
+        stop_run()
+    fc_method = st.selectbox("Metode", STOCK_METHODS)
+
+    if selected_kabupaten_path not in forecasts["positions"]:
+        st.info("Kabupaten ini tidak punya deret stok di DB1.")
+    else:
+        i, j = forecasts["positions"][selected_kabupaten_path], forecasts["methods"].index(fc_method)
+        fc_df = forecast_frame(forecasts, selected_kabupaten_path, fc_method)
+
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Stok terakhir", f"{forecasts['last'][i, j]:,.0f}")
+        c2.metric("Prakiraan bulan depan", f"{forecasts['forecast'][i, j, 0]:,.0f}")
+        c3.metric("Pita 95%", f"{forecasts['lower'][i, j, 0]:,.0f} – {forecasts['upper'][i, j, 0]:,.0f}")
+        c4.metric("P(stok habis)", f"{forecasts['p_stockout'][i, j]:.1%}")
+        st.caption(f"Model: {forecasts['model'][i, j]}")
+
+        history_df = node_timeseries(rollup_cube, selected_kabupaten_path)
+        chart_df = pd.concat([
+            history_df[["PERIODE", fc_method]].rename(columns={fc_method: "AKTUAL"}),
+            fc_df
+        ], ignore_index=True)
+        st.markdown("<div class='chart-card'><b>Aktual + prakiraan (pita 95%)</b></div>", unsafe_allow_html=True)
+        st.line_chart(chart_df.set_index("PERIODE"), use_container_width=True)
+
+    st.markdown(
+        f"<div class='card'><b>Top {RISK_TOP_N} risiko stok habis bulan depan</b><br/>"
+        f"<span style='color:rgba(15,23,42,0.62)'>urut P(stok &le; 0) menurun, lalu rasio prakiraan / stok terakhir</span></div>",
+        unsafe_allow_html=True
+    )
+    risk_method = st.selectbox("Metode (tabel risiko)", list(forecasts["risk"]))
+    show_dataframe(forecasts["risk"][risk_method].head(RISK_TOP_N), use_container_width=True, hide_index=True)
 
 
 elif active_menu == "DATASET":
     st.markdown("<div class='card'><b>Dataset Terintegrasi (hasil join)</b></div>", unsafe_allow_html=True)
 
-    st.dataframe(integrated_df, use_container_width=True, height=520)
+    all_columns = integrated_df.columns.tolist()
+    f1, f2, f3, f4 = st.columns([2, 1.4, 0.8, 0.8])
+    with f1:
+        search_query = st.text_input("Cari kabupaten", placeholder="mis. MALANG")
+    with f2:
+        sort_col = st.selectbox("Urutkan berdasarkan", all_columns, index=all_columns.index("KABUPATEN"))
+    with f3:
+        sort_desc = st.checkbox("Menurun", value=False)
+    with f4:
+        page_size = st.selectbox("Baris/halaman", PAGE_SIZE_OPTIONS, index=1)
+    shown_columns = st.multiselect("Kolom", all_columns, default=all_columns) or all_columns
+
+    # Urutan + filter dari indeks sort yang sudah dihitung; hanya 1 halaman yang dikirim ke browser
+    rows = filtered_rows(
+        integrated_df, integrated_model["sort_index"],
+        sort_col=sort_col, descending=sort_desc,
+        search_col="KABUPATEN", query=search_query
+    )
+    total_rows, n_pages = len(rows), page_count(len(rows), page_size)
+    page = int(st.number_input("Halaman", min_value=1, max_value=n_pages, value=1, step=1))
+    page_df = page_view(integrated_df, rows, shown_columns, page=page, page_size=page_size)
+
+    show_dataframe(page_df, use_container_width=True, height=520)
+    first_row = (page - 1) * page_size + 1 if total_rows else 0
+    last_row = first_row + len(page_df) - 1 if total_rows else 0
+    st.caption(f"Baris {first_row:,}–{last_row:,} dari {total_rows:,} (halaman {page}/{n_pages}).")
+
+    export_fmt = st.selectbox(
+        "Format unduhan",
+        list(EXPORT_FORMATS),
+        format_func=lambda k: EXPORT_FORMATS[k][0]
+    )
+    export_label, export_ext, export_mime = EXPORT_FORMATS[export_fmt]
+
+    def export_sheets() -> dict:
+        # CSV / Parquet hanya memuat tabel terintegrasi: sheet DB1 & DB2 tidak dibangun
+        if export_fmt != "xlsx":
+            return {"Terintegrasi": integrated_df}
+        # Stok DB1 hanya tahun terpilih; backend SQL membaca per partisi, hanya bila file ekspor belum ada
+        if stock_all_months_df is not None:
+            stock_year = stock_all_months_df[stock_all_months_df["TAHUN"] == selected_tahun]
+        else:
+            stock_year = pd.concat(
+                [df[df["TAHUN"] == selected_tahun] for df in iter_db1_frames(db1_manifest, snapshot["db1_paths"])],
+                ignore_index=True
+            )
+        return {
+            "Terintegrasi": integrated_df,
+            f"DB1 Stok Bulanan {selected_tahun}": stock_year,
+            "DB2 SDM": people_df,
+        }
+
+    def open_export_file():
+        # Dipanggil Streamlit hanya saat tombol diklik (bukan tiap rerun); file diberikan
+        # sebagai handle, tidak dibaca dulu ke memori di sini
+        return open(ensure_export(export_fmt, model_fingerprint, selected_tahun, export_sheets), "rb")
 
     st.download_button(
-        "⬇️ Download dataset terintegrasi (CSV)",
-        data=integrated_df.to_csv(index=False).encode("utf-8"),
-        file_name="dataset_terintegrasi_kb.csv",
-        mime="text/csv"
+        f"⬇️ Download dataset terintegrasi ({export_label})",
+        data=open_export_file,
+        file_name=f"dataset_terintegrasi_kb.{export_ext}",
+        mime=export_mime
+    )
+
+    # Laporan memori frame stok DB1 (backend pandas)
+    memory_report = stock_all_months_df.attrs.get("memory_report") if stock_all_months_df is not None else None
+    if memory_report:
+        before_mb = memory_report["before_bytes"] / 1e6
+        after_mb = memory_report["after_bytes"] / 1e6
+        st.caption(
+            f"Memori frame stok DB1: {after_mb:,.2f} MB "
+            f"(sebelum dipadatkan {before_mb:,.2f} MB, {before_mb / max(after_mb, 1e-9):.1f}× lebih kecil)."
+        )
+
+
+# ---------------------------------------------------------
+# DIAGNOSTICS (profiling per rerun)
+# ---------------------------------------------------------
+elif active_menu == "DIAGNOSTICS":
+    st.markdown("### Diagnostics")
+    st.caption(
+        "Durasi tahap per rerun, hit/miss loader ber-cache, dan memori proses. "
+        "Rerun yang sedang berjalan hanya memuat tahap sebelum halaman ini dirender."
     )
+
+    rss_now, rss_peak = rss_bytes(), peak_rss_bytes()
+    c1, c2, c3 = st.columns(3)
+    c1.metric("RSS sekarang", f"{rss_now / 1e6:,.1f} MB" if rss_now is not None else "-")
+    c2.metric("RSS puncak", f"{rss_peak / 1e6:,.1f} MB" if rss_peak is not None else "-")
+    c3.metric("Rerun tercatat", f"{len(run_history())}")
+
+    history = run_history()
+    st.markdown("#### Rerun ini")
+    this_run = current_run()
+    if this_run is not None and this_run["stages"]:
+        show_dataframe(pd.DataFrame(this_run["stages"]), use_container_width=True, hide_index=True)
+
+    if history:
+        last = history[-1]
+        st.markdown(f"#### Rerun terakhir selesai ({last.get('label')}, {last['total_ms']:,.1f} ms)")
+        show_dataframe(pd.DataFrame(last["stages"]), use_container_width=True, hide_index=True)
+
+    st.markdown("#### Sinkronisasi ledger KPI (snapshot data ini)")
+    show_dataframe(pd.DataFrame([snapshot["ledger_sync"]]), use_container_width=True, hide_index=True)
+
+    st.markdown("#### Cache loader (sejak proses start)")
+    show_dataframe(pd.DataFrame(cache_stats_rows()), use_container_width=True, hide_index=True)
+
+    st.markdown("#### Total durasi per tahap (sejak proses start)")
+    show_dataframe(pd.DataFrame(stage_totals_rows()), use_container_width=True, hide_index=True)
+
+    if history:
+        st.markdown("#### Riwayat rerun")
+        show_dataframe(
+            pd.DataFrame([
+                {
+                    "run_id": r["run_id"],
+                    "label": r.get("label"),
+                    "mulai": pd.Timestamp(r["started_at"], unit="s"),
+                    "total_ms": r["total_ms"],
+                    "tahap": len(r["stages"]),
+                    "rss_end_mb": r["rss_end"] / 1e6 if r["rss_end"] is not None else None,
+                }
+                for r in reversed(history)
+            ]),
+            use_container_width=True, hide_index=True
+        )
+        st.download_button(
+            "⬇️ Download riwayat rerun (JSON lines)",
+            data=lambda: runs_jsonl(run_history()),
+            file_name="kb_profile_runs.jsonl",
+            mime="application/x-ndjson"
+        )
+
+
+# Tutup rekaman rerun (tambahkan ke log JSON lines bila KB_PROFILE_LOG diisi)
+end_run(log_path=PROFILE_LOG_PATH)
@@ -0,0 +1,4 @@
+"""
+Komputasi berat dashboard KB yang tidak bergantung pada Streamlit.
+Modul di sini bisa di-import oleh process pool (worker tidak menjalankan app.py).
+"""
@@ -0,0 +1,224 @@
+"""
+Benchmark headless dashboard KB (tanpa browser) di atas data sintetis.
+
+Tiap skala (jumlah kabupaten × jumlah bulan) dijalankan di proses terpisah:
+1. folder data/ sintetis dibuat (kb_engine.synthetic)
+2. app.py dijalankan dengan streamlit.testing AppTest: rerun pertama (cold:
+   baca Excel, store DB1, agregasi, join), lalu tiap halaman `--repeat` kali
+3. durasi per tahap diambil dari log profiling (KB_PROFILE_LOG, lihat
+   kb_engine.profiling): loader, agregasi, merge, statistik tiap halaman.
+
+Hasil ditambahkan sebagai 1 baris JSON per skala ke file output supaya
+run berbeda (commit/mesin) bisa dibandingkan.
+
+Contoh:
+    python -m kb_engine.bench --scale 30x12 --scale 500x24 --output bench_output.txt
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_PATH = os.path.join(REPO_DIR, "app.py")
+
+DEFAULT_SCALES = ["30x12", "500x12", "500x60"]
+# Dependensi statistik berat yang seharusnya belum dimuat setelah render pertama (SUMMARY)
+HEAVY_MODULES = ["scipy.stats", "statsmodels"]
+PAGES = ["SUMMARY", "TS", "PEOPLE", "LINK", "KRUSKAL", "FORECAST", "DATASET"]
+RUN_TIMEOUT_S = 1800
+
+
+def parse_scale(text: str) -> tuple:
+    """"500x24" -> (500 kabupaten, 24 bulan)."""
+    try:
+        n_kab, n_months = (int(part) for part in text.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"skala harus berbentuk KABUPATENxBULAN, mis. 500x24: {text!r}")
+    if n_kab < 1 or n_months < 1:
+        raise argparse.ArgumentTypeError(f"skala tidak valid: {text!r}")
+    return n_kab, n_months
+
+
+def _git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_DIR,
+            capture_output=True, text=True, timeout=10,
+        )
+        return out.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def _sum_stages(stages: list) -> dict:
+    totals = {}
+    for s in stages:
+        totals[s["stage"]] = round(totals.get(s["stage"], 0.0) + s["ms"], 3)
+    return totals
+
+
+def run_scale(
+    n_kabupaten: int, n_months: int, workdir: str, repeat: int = 2, seed: int = 0, facilities: int = 0
+) -> dict:
+    """Jalankan 1 skala di proses ini (dipanggil dari subprocess, karena cache Streamlit per proses)."""
+    import warnings
+    from kb_engine.profiling import peak_rss_bytes
+    from kb_engine.synthetic import make_dataset
+
+    warnings.filterwarnings("ignore")
+    t0 = time.perf_counter()
+    make_dataset(workdir, n_kabupaten, n_months, seed=seed, facilities_per_kabupaten=facilities)
+    generate_s = time.perf_counter() - t0
+
+    # app.py membaca data/ relatif terhadap working directory
+    log_path = os.path.join(workdir, "profile.jsonl")
+    os.environ["KB_PROFILE_LOG"] = log_path
+    os.chdir(workdir)
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=RUN_TIMEOUT_S)
+    steps = [("cold", "SUMMARY")] + [(f"warm{i + 1}", page) for i in range(repeat) for page in PAGES]
+    errors = []
+    walls = []
+    cold_modules, cold_rss = None, None
+    for phase, page in steps:
+        if phase != "cold":
+            at.sidebar.radio[0].set_value(page)
+        t = time.perf_counter()
+        at.run()
+        walls.append((phase, page, (time.perf_counter() - t) * 1000.0))
+        if phase == "cold":
+            cold_modules = {name: name in sys.modules for name in HEAVY_MODULES}
+            cold_rss = peak_rss_bytes()
+        errors += [f"{page}: {e.value}" for e in at.exception]
+        errors += [f"{page}: {e.value}" for e in at.error]
+
+    records = []
+    if os.path.exists(log_path):
+        with open(log_path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+
+    runs = []
+    for (phase, page, wall_ms), record in zip(walls, records):
+        runs.append({
+            "phase": phase,
+            "page": page,
+            "wall_ms": round(wall_ms, 3),
+            "script_ms": record.get("total_ms"),
+            "stages": _sum_stages(record.get("stages", [])),
+        })
+    if len(records) != len(walls):
+        errors.append(f"jumlah log profiling ({len(records)}) != jumlah rerun ({len(walls)})")
+
+    return {
+        "n_kabupaten": n_kabupaten,
+        "n_months": n_months,
+        "facilities_per_kabupaten": facilities,
+        "generate_s": round(generate_s, 3),
+        "runs": runs,
+        "cold_modules": cold_modules,
+        "cold_peak_rss_mb": round(cold_rss / 1e6, 1) if cold_rss else None,
+        "peak_rss_mb": round(peak_rss_bytes() / 1e6, 1) if peak_rss_bytes() else None,
+        "errors": errors,
+    }
+
+
+def _run_in_subprocess(
+    n_kabupaten: int, n_months: int, repeat: int, seed: int, facilities: int = 0, keep_dir: str = None
+) -> dict:
+    with tempfile.TemporaryDirectory(prefix="kb_bench_") as tmp:
+        workdir = keep_dir or tmp
+        os.makedirs(workdir, exist_ok=True)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = REPO_DIR + os.pathsep + env.get("PYTHONPATH", "")
+        cmd = [
+            sys.executable, "-m", "kb_engine.bench", "--worker",
+            "--scale", f"{n_kabupaten}x{n_months}", "--repeat", str(repeat),
+            "--seed", str(seed), "--facilities", str(facilities), "--workdir", workdir,
+        ]
+        proc = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=RUN_TIMEOUT_S * 4)
+        if proc.returncode != 0:
+            return {
+                "n_kabupaten": n_kabupaten, "n_months": n_months, "runs": [],
+                "errors": [f"worker gagal (exit {proc.returncode}): {proc.stderr.strip()[-2000:]}"],
+            }
+        return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def format_summary(result: dict) -> str:
+    """Ringkasan teks 1 skala: durasi rerun per halaman + tahap terlama saat cold start."""
+    lines = [
+        f"== {result['n_kabupaten']} kabupaten x {result['n_months']} bulan "
+        f"(generate {result.get('generate_s', '-')} s, RSS puncak {result.get('peak_rss_mb', '-')} MB)"
+    ]
+    if result.get("cold_modules") is not None:
+        loaded = [name for name, on in result["cold_modules"].items() if on]
+        lines.append(
+            f"  cold start: RSS puncak {result.get('cold_peak_rss_mb', '-')} MB, "
+            f"modul berat dimuat: {', '.join(loaded) or 'tidak ada'}"
+        )
+    for run in result["runs"]:
+        lines.append(f"  {run['phase']:<6} {run['page']:<8} {run['wall_ms']:>10.1f} ms")
+    cold = next((r for r in result["runs"] if r["phase"] == "cold"), None)
+    if cold:
+        top = sorted(cold["stages"].items(), key=lambda kv: -kv[1])[:8]
+        lines.append("  tahap terlama (cold): " + ", ".join(f"{k} {v:.1f} ms" for k, v in top))
+    for err in result["errors"]:
+        lines.append(f"  ERROR {err}")
+    return "\n".join(lines)
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark headless dashboard KB dengan data sintetis.")
+    parser.add_argument("--scale", action="append", type=parse_scale,
+                        help=f"KABUPATENxBULAN, boleh diulang (default: {' '.join(DEFAULT_SCALES)})")
+    parser.add_argument("--repeat", type=int, default=2, help="jumlah putaran warm per halaman")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--facilities", type=int, default=0,
+                        help="DB2 per fasilitas: jumlah fasilitas per kabupaten (0 = ringkasan per kabupaten)")
+    parser.add_argument("--output", default=os.path.join(REPO_DIR, "bench_output.txt"),
+                        help="file hasil (JSON lines, ditambahkan)")
+    parser.add_argument("--keep-dir", help="simpan data sintetis di folder ini (default: folder sementara)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--workdir", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    scales = args.scale or [parse_scale(s) for s in DEFAULT_SCALES]
+
+    if args.worker:
+        n_kab, n_months = scales[0]
+        print(json.dumps(run_scale(
+            n_kab, n_months, args.workdir, repeat=args.repeat, seed=args.seed, facilities=args.facilities
+        )))
+        return 0
+
+    import numpy as np
+    import pandas as pd
+
+    meta = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "cpu_count": os.cpu_count(),
+        "repeat": args.repeat,
+        "seed": args.seed,
+    }
+    failed = False
+    for n_kab, n_months in scales:
+        keep = os.path.join(args.keep_dir, f"{n_kab}x{n_months}") if args.keep_dir else None
+        result = _run_in_subprocess(n_kab, n_months, args.repeat, args.seed, args.facilities, keep)
+        failed = failed or bool(result["errors"])
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**meta, **result}) + "\n")
+        print(format_summary(result), flush=True)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Rollup cube stok: wilayah (provinsi -> kabupaten -> kecamatan -> fasilitas)
+× periode (bulan) × metode.
+
+Dibangun sekali per versi data dari jumlah per node terbawah; tiap level di
+atasnya dijumlahkan dari level di bawahnya (np.add.at), beserta total per tahun.
+Drill-down / roll-up saat interaksi hanya membaca array cube, tanpa agregasi
+ulang baris mentah.
+
+Node dikenali dari path wilayahnya, mis. ("JAWA TIMUR", "MALANG"); path () = akar
+(semua provinsi). Level yang tidak ada di data (mis. DB1 tanpa KECAMATAN) tidak
+ikut di cube.
+"""
+import numpy as np
+import pandas as pd
+
+from kb_engine.db1 import timeseries_frame
+from kb_engine.schema import DB1_DEFAULT_PROVINCE, REGION_LEVELS, STOCK_METHODS
+
+# Label wilayah untuk sel kosong di level bawah (stok tetap terhitung di level atasnya)
+UNKNOWN_REGION = "(TIDAK DIKETAHUI)"
+
+
+def cube_levels(columns) -> list:
+    """Level wilayah yang dipakai: PROVINSI & KABUPATEN selalu, KECAMATAN/FASILITAS bila kolomnya ada."""
+    return [lvl for lvl in REGION_LEVELS if lvl in ("PROVINSI", "KABUPATEN") or lvl in columns]
+
+
+def region_fill_values(levels: list) -> dict:
+    """Pengganti sel wilayah kosong per level (KABUPATEN tidak diisi: baris tanpa kabupaten dibuang)."""
+    return {lvl: DB1_DEFAULT_PROVINCE if lvl == "PROVINSI" else UNKNOWN_REGION for lvl in levels if lvl != "KABUPATEN"}
+
+
+def stock_leaf_sums(stock_all: pd.DataFrame, methods: list = STOCK_METHODS) -> pd.DataFrame:
+    """
+    Jumlah stok per (node terbawah, TAHUN, BULAN) dari frame stok DB1.
+    Kolom: level wilayah + TAHUN + BULAN_IDX (0..11) + metode. Baris tanpa nama bulan
+    atau tanpa kabupaten (mis. baris jumlah total) dibuang, sama seperti agregat per kabupaten.
+    """
+    levels = cube_levels(stock_all.columns)
+    fill = region_fill_values(levels)
+    keys = {}
+    for lvl in levels:
+        col = stock_all[lvl].astype(object) if lvl in stock_all.columns else pd.Series(None, index=stock_all.index)
+        keys[lvl] = col.where(col.notna(), fill[lvl]) if lvl in fill else col
+    frame = stock_all[["TAHUN"] + list(methods)].assign(
+        BULAN_IDX=stock_all["BULAN"].cat.codes.astype(np.int64), **keys
+    )
+    frame = frame[(frame["BULAN_IDX"] >= 0) & frame["KABUPATEN"].notna()]
+    return frame.groupby(levels + ["TAHUN", "BULAN_IDX"], sort=True)[list(methods)].sum().reset_index()
+
+
+def _level_node(keys: list, parent: np.ndarray, values: np.ndarray, present: np.ndarray,
+                year_starts: np.ndarray) -> dict:
+    return {
+        "keys": keys,
+        "positions": {key: i for i, key in enumerate(keys)},
+        "parent": parent,
+        "values": values,
+        "present": present,
+        # Total per tahun (node x tahun x metode), dijumlahkan sekali di sini
+        "year_totals": np.add.reduceat(values, year_starts, axis=1),
+    }
+
+
+def build_rollup_cube(leaf: pd.DataFrame, methods: list = STOCK_METHODS) -> dict:
+    """
+    Cube dari hasil stock_leaf_sums (atau query setara dari database analitik).
+    nodes[level]: keys (path tuple), positions, parent (indeks node di level atas),
+    children (indeks node di level bawah per node), values (node x periode x metode),
+    present (periode yang ada datanya), year_totals (node x tahun x metode).
+    """
+    levels = [lvl for lvl in REGION_LEVELS if lvl in leaf.columns]
+    period_keys = leaf["TAHUN"].to_numpy(dtype=np.int64) * 12 + leaf["BULAN_IDX"].to_numpy(dtype=np.int64)
+    periods = np.unique(period_keys)
+    years, year_starts = np.unique(periods // 12, return_index=True)
+
+    # Level terbawah: 1 node per path unik
+    paths = pd.MultiIndex.from_frame(leaf[levels])
+    leaf_codes, leaf_keys = pd.factorize(paths, sort=True)
+    leaf_values = leaf[list(methods)].to_numpy()
+    values = np.zeros((len(leaf_keys), len(periods), len(methods)), dtype=leaf_values.dtype)
+    present = np.zeros((len(leaf_keys), len(periods)), dtype=bool)
+    period_pos = np.searchsorted(periods, period_keys)
+    np.add.at(values, (leaf_codes, period_pos), leaf_values)
+    present[leaf_codes, period_pos] = True
+
+    nodes = {}
+    child_keys = [tuple(k) for k in leaf_keys]
+    for depth in range(len(levels) - 1, -1, -1):
+        if depth == 0:
+            parent = np.zeros(len(child_keys), dtype=np.int64)
+            nodes[levels[depth]] = _level_node(child_keys, parent, values, present, year_starts)
+            break
+        # Roll-up: jumlahkan node anak ke node induk (path tanpa elemen terakhir)
+        parent_codes, parent_keys = pd.factorize(pd.Index([k[:-1] for k in child_keys], tupleize_cols=False), sort=True)
+        nodes[levels[depth]] = _level_node(child_keys, parent_codes, values, present, year_starts)
+
+        parent_values = np.zeros((len(parent_keys), len(periods), len(methods)), dtype=values.dtype)
+        np.add.at(parent_values, parent_codes, values)
+        parent_present = np.zeros((len(parent_keys), len(periods)), dtype=bool)
+        np.logical_or.at(parent_present, parent_codes, present)
+        child_keys, values, present = [tuple(k) for k in parent_keys], parent_values, parent_present
+
+    # Anak tiap node (urut path), untuk drill-down
+    for depth, lvl in enumerate(levels):
+        if depth + 1 < len(levels):
+            child_parent = nodes[levels[depth + 1]]["parent"]
+            order = np.argsort(child_parent, kind="stable")
+            bounds = np.cumsum(np.bincount(child_parent, minlength=len(nodes[lvl]["keys"])))[:-1]
+            nodes[lvl]["children"] = np.split(order, bounds)
+        else:
+            nodes[lvl]["children"] = [np.empty(0, dtype=np.int64)] * len(nodes[lvl]["keys"])
+
+    return {
+        "levels": levels,
+        "methods": list(methods),
+        "periods": periods,
+        "years": years,
+        "nodes": nodes,
+        # Path kabupaten per nama (kunci join DB2 hanya nama kabupaten); nama yang sama bisa
+        # ada di beberapa provinsi, jadi tiap nama -> semua path-nya
+        "kabupaten_paths": kabupaten_paths_by_name(nodes["KABUPATEN"]["keys"]),
+    }
+
+
+def kabupaten_paths_by_name(keys: list) -> dict:
+    """{nama kabupaten: [path (provinsi, kabupaten), ...]} urut path."""
+    paths = {}
+    for key in sorted(keys):
+        paths.setdefault(key[-1], []).append(key)
+    return paths
+
+
+def _locate(cube: dict, path: tuple) -> tuple:
+    level = cube["levels"][len(path) - 1]
+    return level, cube["nodes"][level]["positions"][tuple(path)]
+
+
+def node_timeseries(cube: dict, path: tuple) -> pd.DataFrame:
+    """Deret waktu stok 1 node (TAHUN, BULAN, PERIODE + metode); path () = semua provinsi."""
+    if not path:
+        top = cube["nodes"][cube["levels"][0]]
+        values, present = top["values"].sum(axis=0), top["present"].any(axis=0)
+    else:
+        level, i = _locate(cube, path)
+        values, present = cube["nodes"][level]["values"][i], cube["nodes"][level]["present"][i]
+    keys = cube["periods"][present]
+    return timeseries_frame(keys // 12, keys % 12, values[present])
+
+
+def node_year_totals(cube: dict, path: tuple, tahun: int) -> dict:
+    """Total stok setahun 1 node per metode + TOTAL_STOK (0 bila tahun tidak ada)."""
+    year_pos = np.searchsorted(cube["years"], tahun)
+    if year_pos >= len(cube["years"]) or cube["years"][year_pos] != tahun:
+        totals = np.zeros(len(cube["methods"]))
+    elif not path:
+        totals = cube["nodes"][cube["levels"][0]]["year_totals"][:, year_pos].sum(axis=0)
+    else:
+        level, i = _locate(cube, path)
+        totals = cube["nodes"][level]["year_totals"][i, year_pos]
+    out = dict(zip(cube["methods"], totals.tolist()))
+    out["TOTAL_STOK"] = totals.sum().item()
+    return out
+
+
+def child_level(cube: dict, path: tuple):
+    """Nama level anak dari node path (None bila node sudah di level terbawah)."""
+    return cube["levels"][len(path)] if len(path) < len(cube["levels"]) else None
+
+
+def child_names(cube: dict, path: tuple) -> list:
+    """Nama node anak (urut abjad) untuk pilihan drill-down."""
+    return [key[-1] for key in _child_keys(cube, path)[1]]
+
+
+def _child_keys(cube: dict, path: tuple) -> tuple:
+    level = child_level(cube, path)
+    if level is None:
+        return None, [], np.empty(0, dtype=np.int64)
+    nodes = cube["nodes"][level]
+    if not path:
+        idx = np.arange(len(nodes["keys"]))
+    else:
+        parent_level, i = _locate(cube, path)
+        idx = cube["nodes"][parent_level]["children"][i]
+    return level, [nodes["keys"][j] for j in idx], idx
+
+
+def children_table(cube: dict, path: tuple, tahun: int) -> pd.DataFrame:
+    """
+    Total stok setahun per node anak (drill-down 1 level), urut TOTAL_STOK menurun.
+    Kolom: <nama level anak>, TOTAL_STOK + metode.
+    """
+    level, keys, idx = _child_keys(cube, path)
+    columns = [level or "WILAYAH", "TOTAL_STOK"] + cube["methods"]
+    year_pos = np.searchsorted(cube["years"], tahun)
+    if level is None or year_pos >= len(cube["years"]) or cube["years"][year_pos] != tahun:
+        return pd.DataFrame(columns=columns)
+
+    totals = cube["nodes"][level]["year_totals"][idx, year_pos]
+    df = pd.DataFrame(totals, columns=cube["methods"])
+    df.insert(0, "TOTAL_STOK", totals.sum(axis=1))
+    df.insert(0, level, [key[-1] for key in keys])
+    return df.sort_values("TOTAL_STOK", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,278 @@
+"""
+DB1 (stok alat & obat kontrasepsi): baca workbook multi-sheet (1 sheet = 1 bulan),
+bersihkan, padatkan tipe data, agregasi per kabupaten & indeks deret waktu.
+"""
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from kb_engine.db1_store import year_from_name
+from kb_engine.profiling import timed
+from kb_engine.schema import (
+    DB1_DEFAULT_YEAR, DB1_ID_COLUMNS, DB1_NUMERIC_COLUMNS, DB1_READ_COLUMNS, DB1_REGION_COLUMNS,
+    MONTH_ORDER, STOCK_METHODS, normalize_text
+)
+from kb_engine.sheets import read_sheets
+
+
+def _read_sheets_streaming(excel_path_or_file, sheet_names: list = None, usecols: list = None) -> list:
+    """
+    Baca sheet langsung via openpyxl mode read-only (baris di-stream, tanpa style).
+    Catatan: sel teks tidak dikonversi jadi angka otomatis; kolom angka tetap dikonversi loader.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(excel_path_or_file, read_only=True, data_only=True, keep_links=False)
+    try:
+        sheets = []
+        for ws in wb.worksheets:
+            if sheet_names is not None and ws.title not in sheet_names:
+                continue
+            rows = ws.iter_rows(values_only=True)
+            header = next(rows, None) or ()
+            columns = [
+                f"Unnamed: {i}" if h is None else h
+                for i, h in enumerate(header)
+            ]
+            keep = [i for i, c in enumerate(columns) if usecols is None or c in usecols]
+            # Lewati baris yang seluruh selnya kosong (sama seperti read_excel)
+            body = [r for r in rows if any(v is not None for v in r)]
+            df = pd.DataFrame(body, columns=columns)
+            sheets.append((ws.title, df.iloc[:, keep] if usecols is not None else df))
+        return sheets
+    finally:
+        wb.close()
+
+
+def read_excel_sheets(
+    excel_path_or_file, streaming: bool = False, sheet_names: list = None, usecols: list = None
+) -> list:
+    """
+    Baca sheet workbook dengan sekali buka (workbook hanya di-parse satu kali).
+    Mengembalikan list (nama_sheet, DataFrame) sesuai urutan sheet di file.
+    sheet_names membatasi sheet yang dibaca (None = semua sheet).
+    usecols membatasi kolom (nama header); kolom lain tidak pernah masuk frame.
+    streaming=True memakai openpyxl read-only secara langsung (hemat memori untuk file besar).
+    """
+    if hasattr(excel_path_or_file, "seek"):
+        excel_path_or_file.seek(0)
+
+    if streaming:
+        return _read_sheets_streaming(excel_path_or_file, sheet_names=sheet_names, usecols=usecols)
+
+    pick = None if usecols is None else (lambda c: c in usecols)
+    with pd.ExcelFile(excel_path_or_file) as xls:
+        return [
+            (name, xls.parse(name, usecols=pick))
+            for name in xls.sheet_names
+            if sheet_names is None or name in sheet_names
+        ]
+
+
+def parse_period(sheet_name, source_name: str = "") -> tuple:
+    """
+    Tentukan (TAHUN, BULAN) dari nama sheet, mis. "Januari", "JANUARI 2024", "2024-Januari".
+    Tahun dicari di nama sheet, lalu nama file, lalu DB1_DEFAULT_YEAR.
+    Bila tidak ada nama bulan, BULAN = nama sheet (nanti jadi kosong di kategori bulan).
+    """
+    text = normalize_text(sheet_name)
+    tokens = re.findall(r"[A-Z]+", text)
+    bulan = next((t for t in tokens if t in MONTH_ORDER), text)
+    tahun = year_from_name(text) or year_from_name(source_name) or DB1_DEFAULT_YEAR
+    return tahun, bulan
+
+
+def clean_db1_sheets(sheets: list, source_name: str = "") -> list:
+    """
+    Bersihkan sheet-sheet DB1 (satu sheet = satu bulan).
+    Mengembalikan list (nama_sheet, DataFrame bersih) dengan kolom TAHUN & BULAN.
+    """
+    all_columns = set().union(*(df.columns for _, df in sheets)) if sheets else set()
+
+    # Validasi kolom numerik wajib ada
+    missing_cols = [c for c in DB1_NUMERIC_COLUMNS if c not in all_columns]
+    if missing_cols:
+        raise ValueError(f"DB1: kolom numerik tidak ditemukan: {missing_cols}")
+
+    # Pastikan ada kolom kabupaten untuk proses join
+    if "KABUPATEN" not in all_columns:
+        raise ValueError("DB1: kolom 'KABUPATEN' tidak ditemukan (dibutuhkan untuk keterkaitan).")
+
+    cleaned = []
+    for sheet_name, stock_raw in sheets:
+        # Kolom yang tidak ada di sheet ini dianggap kosong (sama seperti hasil concat)
+        stock_raw = stock_raw.reindex(columns=list(dict.fromkeys(
+            list(stock_raw.columns) + DB1_NUMERIC_COLUMNS + ["KABUPATEN"]
+        )))
+
+        tahun, bulan = parse_period(sheet_name, source_name)
+
+        # Urutan bulan (supaya grafik deret waktu rapi)
+        stock_raw["BULAN"] = pd.Categorical([bulan] * len(stock_raw), categories=MONTH_ORDER, ordered=True)
+        stock_raw["TAHUN"] = tahun
+
+        # Pastikan kolom stok berupa angka
+        stock_raw[DB1_NUMERIC_COLUMNS] = (
+            stock_raw[DB1_NUMERIC_COLUMNS]
+            .apply(pd.to_numeric, errors="coerce")
+            .fillna(0)
+        )
+
+        # Buat agregat metode
+        stock_raw["SUNTIK"] = (
+            stock_raw["SUNTIKAN 1 BULANAN"]
+            + stock_raw["SUNTIKAN 3 BULANAN KOMBINASI"]
+            + stock_raw["SUNTIKAN 3 BULANAN PROGESTIN"]
+        )
+        stock_raw["PIL"] = stock_raw["PIL KOMBINASI"] + stock_raw["PIL PROGESTIN"]
+        stock_raw["IMPLAN"] = stock_raw["IMPLAN 1 BATANG"] + stock_raw["IMPLAN 2 BATANG"]
+
+        stock_raw["KABUPATEN"] = stock_raw["KABUPATEN"].astype(str).str.strip().str.upper()
+        # Kolom wilayah opsional: rapikan seperti KABUPATEN, sel kosong tetap kosong
+        for col in DB1_REGION_COLUMNS:
+            if col in stock_raw.columns:
+                values = stock_raw[col]
+                stock_raw[col] = values.where(values.isna(), values.astype(str).str.strip().str.upper())
+        cleaned.append((sheet_name, stock_raw))
+    return cleaned
+
+
+@timed("excel_load_db1")
+def load_db1_stock_timeseries(excel_path_or_file, streaming: bool = False, sheet_names: list = None) -> pd.DataFrame:
+    """
+    DB1 dibaca dari Excel multi-sheet.
+    Nama sheet dianggap sebagai BULAN (boleh memuat tahun, mis. "JANUARI 2024").
+    """
+    source_name = os.path.basename(excel_path_or_file) if isinstance(excel_path_or_file, str) else ""
+    sheets = read_excel_sheets(
+        excel_path_or_file, streaming=streaming, sheet_names=sheet_names, usecols=DB1_READ_COLUMNS
+    )
+    cleaned = clean_db1_sheets(sheets, source_name)
+    return compact_stock_frame(pd.concat([df for _, df in cleaned], ignore_index=True))
+
+
+@timed("excel_load_db1")
+def parse_db1_jobs(jobs: list, executor=None) -> list:
+    """
+    Parser untuk store DB1: jobs = list (path, [nama_sheet]) -> per job list (nama_sheet, frame bersih).
+    Dengan executor, semua sheet dari semua file dibaca paralel (1 task per sheet);
+    tanpa executor, tiap workbook dibaca sekali jalan secara serial.
+    """
+    if executor is None:
+        raw = [read_excel_sheets(path, sheet_names=names, usecols=DB1_READ_COLUMNS) for path, names in jobs]
+    else:
+        tasks = [(path, name) for path, names in jobs for name in names]
+        frames = iter(read_sheets(tasks, usecols=DB1_READ_COLUMNS, executor=executor))
+        raw = [[(name, next(frames)) for name in names] for _, names in jobs]
+    return [clean_db1_sheets(sheets, os.path.basename(path)) for (path, _), sheets in zip(jobs, raw)]
+
+
+def _downcast_lossless(s: pd.Series) -> pd.Series:
+    """int32 bila semua nilai bulat & muat, float32 bila bolak-balik float32 tidak mengubah nilai."""
+    values = s.to_numpy()
+    if values.dtype.kind not in "iuf" or len(values) == 0:
+        return s
+    if values.dtype.kind == "f" and not np.isfinite(values).all():
+        f32 = values.astype(np.float32)
+        return s.astype("float32") if np.array_equal(f32, values, equal_nan=True) else s
+
+    info = np.iinfo(np.int32)
+    if (values == np.round(values)).all() and values.min() >= info.min and values.max() <= info.max:
+        return s.astype("int32")
+    if values.dtype.kind == "f" and np.array_equal(values.astype(np.float32), values):
+        return s.astype("float32")
+    return s
+
+
+def compact_stock_frame(stock_all: pd.DataFrame) -> pd.DataFrame:
+    """
+    Representasi hemat memori frame stok DB1:
+    kolom identitas -> category, TAHUN -> int16, stok -> int32/float32 bila tanpa kehilangan nilai.
+    Ukuran sebelum/sesudah (byte) dicatat di attrs["memory_report"].
+    (Agregasi groupby tetap aman: jumlah int32 dihitung & dikembalikan sebagai int64.)
+    """
+    before = int(stock_all.memory_usage(deep=True).sum())
+    columns = {}
+    for col in DB1_ID_COLUMNS + DB1_REGION_COLUMNS:
+        if col in stock_all.columns:
+            columns[col] = stock_all[col].astype("category")
+    if "TAHUN" in stock_all.columns:
+        columns["TAHUN"] = stock_all["TAHUN"].astype("int16")
+    for col in DB1_NUMERIC_COLUMNS + ["SUNTIK", "PIL", "IMPLAN"]:
+        columns[col] = _downcast_lossless(stock_all[col])
+
+    out = stock_all.assign(**columns)
+    out.attrs["memory_report"] = {
+        "before_bytes": before,
+        "after_bytes": int(out.memory_usage(deep=True).sum()),
+    }
+    return out
+
+
+def build_stock_timeseries_index(stock_all: pd.DataFrame) -> dict:
+    """
+    Indeks deret waktu stok: array 3-D (kabupaten x periode x metode) + posisi kabupaten.
+    Periode = (TAHUN, BULAN) yang ada di data, urut waktu.
+    Dibangun sekali per versi DB1, sehingga lookup 1 kabupaten tidak perlu scan semua baris.
+    """
+    sums = stock_all.groupby(["KABUPATEN", "TAHUN", "BULAN"], observed=True, sort=True)[STOCK_METHODS].sum()
+
+    kab_values = sums.index.get_level_values("KABUPATEN")
+    kabupaten = kab_values.unique()
+    # Kunci periode = tahun * 12 + indeks bulan (urut waktu)
+    period_keys = (
+        sums.index.get_level_values("TAHUN").to_numpy(dtype=np.int64) * 12
+        + sums.index.get_level_values("BULAN").codes
+    )
+    periods = np.unique(period_keys)
+
+    kab_pos = kabupaten.get_indexer(kab_values)
+    period_pos = np.searchsorted(periods, period_keys)
+    values = np.zeros((len(kabupaten), len(periods), len(STOCK_METHODS)), dtype=sums.to_numpy().dtype)
+    values[kab_pos, period_pos] = sums.to_numpy()
+    # Periode yang benar-benar ada datanya (periode tanpa baris tidak ditampilkan)
+    present = np.zeros((len(kabupaten), len(periods)), dtype=bool)
+    present[kab_pos, period_pos] = True
+
+    return {
+        "positions": {kab: i for i, kab in enumerate(kabupaten)},
+        "periods": periods,
+        "values": values,
+        "present": present,
+    }
+
+
+def timeseries_frame(tahun: np.ndarray, bulan_idx: np.ndarray, values: np.ndarray) -> pd.DataFrame:
+    """Frame deret waktu: TAHUN, BULAN (kategori), PERIODE (tanggal awal bulan) + kolom metode."""
+    df = pd.DataFrame(values, columns=STOCK_METHODS)
+    df.insert(0, "TAHUN", tahun)
+    df.insert(1, "BULAN", pd.Categorical(
+        np.asarray(MONTH_ORDER)[bulan_idx],
+        categories=MONTH_ORDER,
+        ordered=True
+    ))
+    df.insert(2, "PERIODE", pd.to_datetime(pd.DataFrame({"year": tahun, "month": bulan_idx + 1, "day": 1})))
+    return df
+
+
+def get_stock_timeseries_for_kabupaten(ts_index: dict, kabupaten: str) -> pd.DataFrame:
+    """Ambil stok per periode (TAHUN, BULAN) untuk 1 kabupaten dari indeks deret waktu (O(1))."""
+    i = ts_index["positions"].get(kabupaten)
+    if i is None:
+        return pd.DataFrame(columns=["TAHUN", "BULAN", "PERIODE"] + STOCK_METHODS)
+
+    present = ts_index["present"][i]
+    keys = ts_index["periods"][present]
+    return timeseries_frame(keys // 12, keys % 12, ts_index["values"][i][present])
+
+
+@timed()
+def aggregate_stock_by_kabupaten(stock_all: pd.DataFrame) -> pd.DataFrame:
+    """Agregasi stok setahun per kabupaten (menjumlahkan semua bulan)."""
+    out = stock_all[["KABUPATEN"] + STOCK_METHODS].groupby("KABUPATEN", as_index=False, observed=True).sum()
+    # KABUPATEN bisa berupa category (frame dipadatkan) -> samakan tipe dengan kunci join DB2
+    out["KABUPATEN"] = out["KABUPATEN"].astype(str)
+    out["TOTAL_STOK"] = out[STOCK_METHODS].sum(axis=1)
+    return out
@@ -0,0 +1,205 @@
+"""
+Store persisten DB1 (stok bulanan) untuk banyak file & banyak tahun.
+
+Setiap sheet bulan dari setiap workbook disimpan sebagai 1 partisi Parquet.
+manifest.json mencatat tanda tangan tiap file & sheet, sehingga sinkronisasi
+hanya mem-parse sheet yang baru/berubah; riwayat lama tidak dibaca ulang dari Excel.
+"""
+import os
+import re
+import json
+import uuid
+import hashlib
+import zipfile
+import xml.etree.ElementTree as ET
+
+import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+PARTS_DIR = "parts"
+
+_NS_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_NS_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_NS_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def workbook_sheet_signatures(path: str) -> dict:
+    """
+    Tanda tangan per sheet tanpa mem-parse sel: CRC32 + ukuran XML sheet di dalam zip xlsx,
+    digabung CRC sharedStrings (teks sel bisa disimpan di sana).
+    File non-xlsx (mis. .xls) memakai hash seluruh file untuk semua sheet.
+    """
+    try:
+        with zipfile.ZipFile(path) as z:
+            workbook = ET.fromstring(z.read("xl/workbook.xml"))
+            rels = ET.fromstring(z.read("xl/_rels/workbook.xml.rels"))
+            targets = {r.get("Id"): r.get("Target") for r in rels.iter(f"{_NS_PKG_REL}Relationship")}
+            shared = z.getinfo("xl/sharedStrings.xml").CRC if "xl/sharedStrings.xml" in z.namelist() else 0
+
+            signatures = {}
+            for sheet in workbook.iter(f"{_NS_MAIN}sheet"):
+                target = targets[sheet.get(f"{_NS_REL}id")]
+                member = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+                info = z.getinfo(member)
+                signatures[sheet.get("name")] = f"{info.CRC:08x}-{info.file_size}-{shared:08x}"
+            return signatures
+    except (zipfile.BadZipFile, KeyError, ET.ParseError):
+        sha = _file_sha256(path)
+        return {name: sha for name in pd.ExcelFile(path).sheet_names}
+
+
+def _file_key(path: str) -> str:
+    return hashlib.sha1(os.path.basename(path).encode("utf-8")).hexdigest()[:12]
+
+
+def _empty_manifest(version) -> dict:
+    return {"version": version, "files": {}}
+
+
+def load_manifest(store_dir: str, version) -> dict:
+    """Baca manifest; versi berbeda (logika pembersihan berubah) -> mulai dari kosong."""
+    try:
+        with open(os.path.join(store_dir, MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") == version:
+            return manifest
+    except (OSError, ValueError):
+        pass
+    return _empty_manifest(version)
+
+
+def _save_manifest(store_dir: str, manifest: dict) -> None:
+    path = os.path.join(store_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _collect_garbage(store_dir: str, keep: set) -> None:
+    """Hapus file partisi yang tidak ada di keep (termasuk sisa parse yang gagal di tengah jalan)."""
+    parts_dir = os.path.join(store_dir, PARTS_DIR)
+    for name in os.listdir(parts_dir):
+        if name not in keep:
+            try:
+                os.remove(os.path.join(parts_dir, name))
+            except OSError:
+                pass
+
+
+def sync_store(source_paths: list, store_dir: str, parse_fn, version) -> dict:
+    """
+    Samakan store dengan daftar file sumber.
+    parse_fn(jobs) dengan jobs = list (path, [nama_sheet]) -> list (sejajar jobs) berisi
+    list (nama_sheet, DataFrame bersih). Hanya sheet yang baru/berubah yang masuk jobs;
+    semua file dikirim sekaligus supaya parser bisa memparalelkan antar file & sheet.
+    File/sheet yang hilang dari sumber dibuang dari store. Mengembalikan manifest terbaru.
+
+    Partisi baru & manifest ditulis dulu (manifest secara atomik); baru setelah itu file
+    partisi yang tidak dirujuk manifest baru maupun manifest sebelumnya dihapus. Jadi
+    parse yang gagal tidak merusak manifest yang berlaku, dan snapshot yang masih dilayani
+    (dibangun dari manifest sebelumnya) tetap bisa membaca partisinya.
+    """
+    os.makedirs(os.path.join(store_dir, PARTS_DIR), exist_ok=True)
+    manifest = load_manifest(store_dir, version)
+    previous_parts = set(store_parts(manifest))
+    files = manifest["files"]
+    changed = False
+
+    current_names = {os.path.basename(p) for p in source_paths}
+    for name in [n for n in files if n not in current_names]:
+        files.pop(name)
+        changed = True
+
+    pending = []
+    for path in source_paths:
+        name = os.path.basename(path)
+        stat = os.stat(path)
+        entry = files.get(name, {"size": None, "mtime_ns": None, "sheets": {}})
+        if entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            continue  # file tidak tersentuh sejak sinkronisasi terakhir
+
+        signatures = workbook_sheet_signatures(path)
+        for sheet_name in [s for s in entry["sheets"] if s not in signatures]:
+            entry["sheets"].pop(sheet_name)
+
+        todo = [s for s, sig in signatures.items() if entry["sheets"].get(s, {}).get("signature") != sig]
+        pending.append((path, entry, signatures, todo, stat))
+
+    jobs = [(path, todo) for path, _, _, todo, _ in pending if todo]
+    parsed = iter(parse_fn(jobs) if jobs else [])
+
+    for path, entry, signatures, todo, stat in pending:
+        if todo:
+            positions = {s: i for i, s in enumerate(signatures)}
+            for sheet_name, df in next(parsed):
+                part = f"{_file_key(path)}_{positions[sheet_name]:03d}_{uuid.uuid4().hex[:8]}.parquet"
+                df.to_parquet(os.path.join(store_dir, PARTS_DIR, part), index=False)
+                entry["sheets"][sheet_name] = {
+                    "signature": signatures[sheet_name],
+                    "part": part,
+                    "position": positions[sheet_name],
+                    "rows": int(len(df)),
+                }
+
+        entry.update({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+        files[os.path.basename(path)] = entry
+        changed = True
+
+    if changed:
+        _save_manifest(store_dir, manifest)
+        _collect_garbage(store_dir, previous_parts | set(store_parts(manifest)))
+    return manifest
+
+
+def store_fingerprint(manifest: dict) -> str:
+    """Sidik isi store: berubah hanya bila ada sheet yang ditambah/diubah/dihapus."""
+    items = sorted(
+        (name, sheet, info["signature"])
+        for name, entry in manifest["files"].items()
+        for sheet, info in entry["sheets"].items()
+    )
+    return hashlib.sha256(json.dumps([manifest["version"], items]).encode("utf-8")).hexdigest()
+
+
+def store_parts(manifest: dict) -> list:
+    """Nama file partisi (urut nama file lalu posisi sheet); nama baru setiap kali sheet di-parse ulang."""
+    files = manifest["files"]
+    return [
+        info["part"]
+        for name in sorted(files)
+        for info in sorted(files[name]["sheets"].values(), key=lambda i: i["position"])
+    ]
+
+
+def read_part(store_dir: str, part: str, columns: list = None) -> pd.DataFrame:
+    """Baca 1 partisi; columns membatasi kolom."""
+    return pd.read_parquet(os.path.join(store_dir, PARTS_DIR, part), columns=columns)
+
+
+def iter_store_parts(store_dir: str, manifest: dict, columns: list = None):
+    """Baca partisi satu per satu (urut nama file lalu posisi sheet); columns membatasi kolom."""
+    for part in store_parts(manifest):
+        yield read_part(store_dir, part, columns=columns)
+
+
+def read_store(store_dir: str, manifest: dict) -> pd.DataFrame:
+    """Gabungkan semua partisi menjadi 1 frame."""
+    frames = list(iter_store_parts(store_dir, manifest))
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True)
+
+
+def year_from_name(name: str):
+    """Ambil tahun 4 digit (19xx/20xx) dari nama file/sheet, None bila tidak ada."""
+    match = re.search(r"(?<!\d)(19|20)\d{2}(?!\d)", str(name))
+    return int(match.group(0)) if match else None
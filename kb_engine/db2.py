@@ -0,0 +1,188 @@
+"""
+DB2 (jumlah tempat pelayanan KB + tenaga kesehatan & administrasi).
+
+Parser berbasis skema: kolom dikenali dari teks header (bukan posisi), baris
+header bertingkat/penomoran/total dilewati, angka dikonversi sekali untuk semua
+kolom. File bisa berupa ringkasan per kabupaten (layout asli, 1 baris per
+kabupaten) atau per fasilitas (puluhan ribu baris, dijumlahkan per kabupaten).
+"""
+import numpy as np
+import pandas as pd
+
+from kb_engine.profiling import timed
+from kb_engine.schema import normalize_text
+
+KABUPATEN_ALIASES = ["KABUPATEN", "KABUPATEN/KOTA", "KAB/KOTA"]
+# Spesifikasi kolom DB2: nama kolom hasil, teks header yang dikenali (huruf besar),
+# wajib ada atau tidak, dan angka atau teks
+DB2_COLUMN_SPECS = [
+    {"name": "kode", "aliases": ["KODE", "KODE KABUPATEN"], "required": False, "numeric": False},
+    {"name": "kabupaten", "aliases": KABUPATEN_ALIASES, "required": True, "numeric": False},
+    {"name": "kecamatan", "aliases": ["KECAMATAN"], "required": False, "numeric": False},
+    {"name": "fasilitas", "aliases": ["FASILITAS", "NAMA FASILITAS", "FASKES", "NAMA FASKES"],
+     "required": False, "numeric": False},
+    {"name": "tempat_kb", "aliases": ["JUMLAH TEMPAT PELAYANAN KB", "TEMPAT PELAYANAN KB", "TEMPAT KB"],
+     "required": False, "numeric": True},
+    {"name": "dok_kandungan", "aliases": ["KEBIDANAN DAN KANDUNGAN", "DOKTER KANDUNGAN", "DOKTER SPOG"],
+     "required": True, "numeric": True},
+    {"name": "dok_urologi", "aliases": ["BEDAH/UROLOGI", "UROLOGI", "DOKTER UROLOGI"],
+     "required": True, "numeric": True},
+    {"name": "dok_umum", "aliases": ["UMUM", "DOKTER UMUM"], "required": True, "numeric": True},
+    {"name": "bidan", "aliases": ["BIDAN"], "required": True, "numeric": True},
+    {"name": "perawat", "aliases": ["PERAWAT"], "required": True, "numeric": True},
+    {"name": "administrasi", "aliases": ["ADMINISTRASI", "TENAGA ADMINISTRASI"], "required": True, "numeric": True},
+]
+DB2_NUMERIC_COLUMNS = [spec["name"] for spec in DB2_COLUMN_SPECS if spec["numeric"]]
+# Tenaga kesehatan total = dokter + bidan + perawat
+DB2_HEALTH_STAFF_COLUMNS = ["dok_kandungan", "dok_urologi", "dok_umum", "bidan", "perawat"]
+# Kolom bilangan bulat di hasil (nullable Int64)
+DB2_INT_COLUMNS = DB2_NUMERIC_COLUMNS + ["tenaga_kesehatan_total"]
+
+# Baris header dicari di sejumlah baris awal sheet ini
+HEADER_SCAN_ROWS = 50
+# Baris ringkasan (bukan data kabupaten/fasilitas)
+TOTAL_ROW_PATTERN = r"^(JUMLAH|TOTAL)\b"
+
+
+def _is_label(value) -> bool:
+    """Sel header yang berisi teks (bukan kosong & bukan nomor kolom 1, 2, 3, ...)."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return False
+    text = str(value).strip()
+    return bool(text) and not text.replace(".", "", 1).isdigit()
+
+
+def detect_db2_header(raw: pd.DataFrame) -> tuple:
+    """
+    Cari header DB2 di sheet mentah (header=None).
+    Mengembalikan (baris_data_pertama, {nama_kolom: posisi_kolom}).
+    Header boleh bertingkat (mis. DOKTER -> UMUM); tiap kolom dikenali dari label
+    paling bawah, lalu dari gabungan semua labelnya.
+    """
+    head = raw.head(HEADER_SCAN_ROWS)
+    found = next(
+        ((i, j) for i in range(len(head)) for j, v in enumerate(head.iloc[i])
+         if _is_label(v) and normalize_text(v) in KABUPATEN_ALIASES),
+        None
+    )
+    if found is None:
+        raise ValueError("DB2: baris header dengan kolom 'KABUPATEN' tidak ditemukan.")
+    header_row, kab_pos = found
+
+    # Data mulai di baris pertama setelah header yang kolom kabupatennya berisi teks
+    data_row = next(
+        (i for i in range(header_row + 1, len(raw)) if _is_label(raw.iat[i, kab_pos])),
+        len(raw)
+    )
+    block = raw.iloc[header_row:data_row]
+    labels = [[normalize_text(v) for v in block.iloc[:, j] if _is_label(v)] for j in range(raw.shape[1])]
+
+    positions = {}
+    for spec in DB2_COLUMN_SPECS:
+        aliases = spec["aliases"]
+        free = [j for j in range(len(labels)) if labels[j] and j not in positions.values()]
+        pos = next((j for j in free if labels[j][-1] in aliases), None)
+        if pos is None:
+            pos = next((j for j in free if " ".join(labels[j]) in aliases), None)
+        if pos is not None:
+            positions[spec["name"]] = pos
+
+    missing = [spec["name"] for spec in DB2_COLUMN_SPECS if spec["required"] and spec["name"] not in positions]
+    if missing:
+        raise ValueError(f"DB2: kolom tidak ditemukan di header: {missing}")
+    return data_row, positions
+
+
+def parse_db2_rows(raw: pd.DataFrame) -> pd.DataFrame:
+    """
+    Baris data DB2 (per kabupaten atau per fasilitas) dari sheet mentah.
+    Kolom teks dirapikan, kolom angka float64 (sel bukan angka -> NaN).
+    """
+    data_row, positions = detect_db2_header(raw)
+    body = raw.iloc[data_row:]
+
+    kab_raw = body.iloc[:, positions["kabupaten"]]
+    kab = kab_raw.where(kab_raw.notna(), "").astype("str").str.strip()
+    kab_upper = kab.str.upper()
+    # Baris data = nama kabupaten berisi huruf; lewati header berulang & baris jumlah/total
+    keep = (
+        kab.str.contains(r"[A-Za-z]", regex=True).to_numpy(dtype=bool)
+        & ~kab_upper.str.match(TOTAL_ROW_PATTERN).to_numpy(dtype=bool)
+        & ~kab_upper.isin(KABUPATEN_ALIASES).to_numpy(dtype=bool)
+    )
+
+    numeric = [name for name in DB2_NUMERIC_COLUMNS if name in positions]
+    # Satu konversi angka untuk semua kolom sekaligus
+    cells = body.iloc[keep, [positions[name] for name in numeric]].to_numpy(dtype=object)
+    values = pd.to_numeric(pd.Series(cells.ravel()), errors="coerce").to_numpy(dtype=float).reshape(cells.shape)
+
+    columns = {"kabupaten": kab[keep].to_numpy()}
+    for spec in DB2_COLUMN_SPECS:
+        name = spec["name"]
+        if name in positions and not spec["numeric"] and name != "kabupaten":
+            col = body.iloc[keep, positions[name]]
+            columns[name] = col.where(col.notna()).astype("str").str.strip().to_numpy()
+    for j, name in enumerate(numeric):
+        columns[name] = values[:, j]
+    return pd.DataFrame(columns)
+
+
+def summarize_db2(rows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame people per kabupaten dari baris DB2 + kolom turunan:
+    tenaga_kesehatan_total, sdm_per_tempat, admin_per_tempat, KABUPATEN (kunci join).
+    Layout ditentukan dari header: ada kolom KECAMATAN / NAMA FASKES -> per fasilitas
+    (dijumlahkan per kabupaten; tanpa kolom tempat_kb, tiap baris dihitung sebagai
+    1 tempat pelayanan), selain itu ringkasan 1 baris per kabupaten.
+    """
+    key = rows["kabupaten"].str.upper().to_numpy()
+    codes, kabupaten_keys = pd.factorize(key)
+    facility_level = "fasilitas" in rows.columns or "kecamatan" in rows.columns
+    if not facility_level:
+        if "tempat_kb" not in rows.columns:
+            raise ValueError("DB2: kolom 'JUMLAH TEMPAT PELAYANAN KB' tidak ditemukan.")
+        if len(kabupaten_keys) < len(rows):
+            duplicates = sorted(set(key[pd.Series(key).duplicated().to_numpy()]))
+            raise ValueError(f"DB2: kabupaten muncul lebih dari 1 kali di ringkasan per kabupaten: {duplicates}")
+
+    # Nama tampilan & kode = baris pertama tiap kabupaten
+    first = np.unique(codes, return_index=True)[1]
+    numeric = {}
+    for name in DB2_NUMERIC_COLUMNS:
+        if name in rows.columns:
+            col = rows[name].to_numpy(dtype=float)
+            numeric[name] = np.bincount(codes, weights=np.nan_to_num(col)) if facility_level else col
+        else:
+            numeric[name] = np.bincount(codes).astype(float)  # tempat_kb: jumlah fasilitas
+
+    staff = np.nansum(np.column_stack([numeric[c] for c in DB2_HEALTH_STAFF_COLUMNS]), axis=1)
+    tempat = numeric["tempat_kb"]
+    # Hindari pembagian nol (tempat_kb = 0 -> rasio kosong)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        sdm_ratio = np.where(tempat != 0, staff / tempat, np.nan).round(3)
+        admin_ratio = np.where(tempat != 0, numeric["administrasi"] / tempat, np.nan).round(3)
+    numeric["tenaga_kesehatan_total"] = staff
+
+    out = {
+        "kode": rows["kode"].to_numpy()[first] if "kode" in rows.columns else None,
+        "kabupaten": rows["kabupaten"].to_numpy()[first],
+    }
+    for name in DB2_INT_COLUMNS:
+        out[name] = pd.array(np.round(numeric[name]), dtype="Int64")
+    out["sdm_per_tempat"] = sdm_ratio
+    out["admin_per_tempat"] = admin_ratio
+    out["KABUPATEN"] = kabupaten_keys
+    return pd.DataFrame(out)
+
+
+@timed("excel_load_db2")
+def load_db2_people(excel_path_or_file, sheet_name=0) -> pd.DataFrame:
+    """
+    DB2 berisi jumlah tempat KB dan SDM per kabupaten (atau per fasilitas).
+    Menghasilkan 1 baris per kabupaten dengan kolom tambahan:
+    - tenaga_kesehatan_total
+    - sdm_per_tempat
+    - admin_per_tempat
+    """
+    raw = pd.read_excel(excel_path_or_file, sheet_name=sheet_name, header=None, dtype=object)
+    return summarize_db2(parse_db2_rows(raw))
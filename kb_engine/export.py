@@ -0,0 +1,81 @@
+"""
+Ekspor dataset ke CSV / Parquet / XLSX multi-sheet.
+Ditulis per chunk baris langsung ke file, jadi tabel besar tidak pernah
+diserialisasi utuh di memori.
+"""
+import os
+import uuid
+
+import pandas as pd
+
+# format -> (label tampilan, ekstensi, MIME)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+    "xlsx": ("Excel (multi-sheet)", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+EXPORT_CHUNK_ROWS = 50_000
+
+# Batas baris 1 sheet Excel (termasuk header)
+XLSX_MAX_ROWS = 1_048_576
+
+
+def _chunks(df: pd.DataFrame, chunk_rows: int):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+def _write_csv(df: pd.DataFrame, path: str, chunk_rows: int) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        df.head(0).to_csv(f, index=False)
+        for chunk in _chunks(df, chunk_rows):
+            chunk.to_csv(f, index=False, header=False)
+
+
+def _write_parquet(df: pd.DataFrame, path: str, chunk_rows: int) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def _write_xlsx(sheets: dict, path: str, chunk_rows: int) -> None:
+    from openpyxl import Workbook
+
+    # write_only: baris di-stream ke file, tidak disimpan di objek workbook
+    wb = Workbook(write_only=True)
+    for sheet_name, df in sheets.items():
+        rows_per_sheet = XLSX_MAX_ROWS - 1
+        for part, start in enumerate(range(0, max(len(df), 1), rows_per_sheet)):
+            title = sheet_name if part == 0 else f"{sheet_name} ({part + 1})"
+            ws = wb.create_sheet(title=title[:31])
+            ws.append([str(c) for c in df.columns])
+            for chunk in _chunks(df.iloc[start:start + rows_per_sheet], chunk_rows):
+                clean = chunk.astype(object).where(chunk.notna(), None)
+                for row in clean.itertuples(index=False, name=None):
+                    ws.append(row)
+    wb.save(path)
+
+
+def write_export(sheets: dict, fmt: str, path: str, chunk_rows: int = EXPORT_CHUNK_ROWS) -> str:
+    """
+    Tulis ekspor ke `path` secara atomik (file sementara lalu os.replace).
+    sheets: {nama_sheet: DataFrame}; CSV/Parquet hanya memakai sheet pertama.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    main_df = next(iter(sheets.values()))
+    if fmt == "csv":
+        _write_csv(main_df, tmp_path, chunk_rows)
+    elif fmt == "parquet":
+        _write_parquet(main_df, tmp_path, chunk_rows)
+    else:
+        _write_xlsx(sheets, tmp_path, chunk_rows)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,289 @@
+"""
+Prakiraan stok per (kabupaten, metode) + risiko stok habis bulan depan.
+
+Tiap deret bulanan difit sekali per versi DB1:
+- ETS (Holt, tren teredam; + musiman aditif bila ada >= 3 tahun data) via statsmodels,
+  hanya bila ada >= 2 tahun data (tren dari ~12 titik mudah terekstrapolasi negatif)
+- kurang dari 2 tahun / tanpa statsmodels / fit gagal: simple exponential smoothing (NumPy)
+- deret sangat pendek: naive (nilai terakhir)
+Deret difit pada rentang bulan kontinu sampai periode terakhirnya sendiri; bulan kosong
+di tengah diisi interpolasi linear. Prakiraan dipotong di 0 (stok tidak mungkin negatif).
+Pita prakiraan 95% dari simpangan baku residual in-sample (melebar dengan akar horizon).
+Risiko stok habis = P(stok bulan depan <= 0) dengan asumsi galat normal, dihitung dari
+prakiraan yang sama dengan yang ditampilkan.
+
+Deret dikirim ke process pool per batch (banyak model kecil per task), sehingga
+overhead antar-proses tidak mendominasi. Hasil fit berupa tabel datar (fit_table,
+bisa disimpan sebagai Parquet); forecast_result menyusunnya jadi array & tabel
+peringkat yang sudah jadi: dashboard cukup mengindeks (waktu konstan per klik).
+"""
+import functools
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from kb_engine.parallel import run_tasks
+from kb_engine.profiling import timed
+
+# Naikkan bila model/rumus prakiraan berubah (hasil tersimpan lama otomatis diabaikan)
+FORECAST_VERSION = 3
+FORECAST_HORIZON = 3
+# z untuk pita prakiraan 95%
+BAND_Z = 1.96
+SEASON_LENGTH = 12
+# Komponen tren (Holt) baru dipakai setelah sekian musim penuh; lebih pendek -> SES (level saja)
+MIN_TREND_SEASONS = 2
+# Komponen musiman baru dipakai setelah sekian musim penuh (2 musim masih terlalu sedikit: overfit)
+MIN_SEASONS = 3
+# Minimal jumlah bulan untuk ETS / SES; lebih pendek -> naive
+MIN_MODEL_POINTS = 6
+# Jumlah deret per task process pool
+SERIES_PER_TASK = 64
+SES_ALPHAS = np.linspace(0.05, 0.95, 19)
+
+
+@functools.lru_cache(maxsize=None)
+def _load_ets():
+    """ExponentialSmoothing statsmodels (di-import sekali saat pertama dipakai); None bila tidak ada."""
+    try:
+        from statsmodels.tsa.holtwinters import ExponentialSmoothing
+    except Exception:
+        return None
+    return ExponentialSmoothing
+
+
+def _ses(y: np.ndarray) -> tuple:
+    """Simple exponential smoothing, alpha dipilih dari grid (SSE galat 1 langkah terkecil)."""
+    best = None
+    for alpha in SES_ALPHAS:
+        level = y[0]
+        errors = np.empty(len(y) - 1)
+        for t in range(1, len(y)):
+            errors[t - 1] = y[t] - level
+            level = level + alpha * errors[t - 1]
+        sse = float(errors @ errors)
+        if best is None or sse < best[0]:
+            best = (sse, level, errors)
+    _, level, errors = best
+    return np.full(FORECAST_HORIZON, level), errors
+
+
+def _fit_series(y: np.ndarray, ets) -> tuple:
+    """1 deret -> (prakiraan[h], sigma[h], nama model)."""
+    steps = np.sqrt(np.arange(1, FORECAST_HORIZON + 1))
+    if len(y) == 0:
+        return np.full(FORECAST_HORIZON, np.nan), np.full(FORECAST_HORIZON, np.nan), "tanpa data"
+    if len(y) < MIN_MODEL_POINTS:
+        resid = np.diff(y)
+        sigma = resid.std(ddof=1) if len(resid) > 1 else np.nan
+        return np.full(FORECAST_HORIZON, y[-1]), sigma * steps, "naive"
+
+    if ets is not None and np.ptp(y) > 0 and len(y) >= MIN_TREND_SEASONS * SEASON_LENGTH:
+        seasonal = "add" if len(y) >= MIN_SEASONS * SEASON_LENGTH else None
+        try:
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                fit = ets(
+                    y, trend="add", damped_trend=True, seasonal=seasonal,
+                    seasonal_periods=SEASON_LENGTH if seasonal else None,
+                    initialization_method="estimated"
+                ).fit()
+            forecast = np.asarray(fit.forecast(FORECAST_HORIZON), dtype=float)
+            resid = y - np.asarray(fit.fittedvalues, dtype=float)
+            if np.all(np.isfinite(forecast)):
+                name = "ETS Holt teredam + musiman" if seasonal else "ETS Holt teredam"
+                return forecast, resid.std(ddof=1) * steps, name
+        except Exception:
+            pass
+
+    forecast, resid = _ses(y)
+    return forecast, resid.std(ddof=1) * steps, "SES"
+
+
+def contiguous_series(values: np.ndarray, present: np.ndarray, periods: np.ndarray) -> np.ndarray:
+    """
+    Deret bulanan kontinu dari periode pertama s.d. terakhir yang ada datanya.
+    Bulan tanpa data di tengah diisi interpolasi linear, supaya sumbu waktu tidak terpadatkan.
+    """
+    keys = periods[present]
+    if len(keys) == 0:
+        return np.empty(0)
+    return np.interp(np.arange(keys[0], keys[-1] + 1), keys, values[present].astype(float))
+
+
+def fit_batch(values: np.ndarray, present: np.ndarray, periods: np.ndarray) -> tuple:
+    """
+    Fit sekumpulan deret (1 task process pool).
+    values: deret x periode, present: periode yang ada datanya, periods: kunci periode
+    (tahun*12 + bulan) tiap kolom. Mengembalikan (prakiraan, sigma, nama_model) sejajar deret.
+    """
+    ets = _load_ets()
+    forecast = np.empty((len(values), FORECAST_HORIZON))
+    sigma = np.empty((len(values), FORECAST_HORIZON))
+    names = []
+    for i in range(len(values)):
+        forecast[i], sigma[i], name = _fit_series(contiguous_series(values[i], present[i], periods), ets)
+        names.append(name)
+    return forecast, sigma, names
+
+
+def _normal_cdf(z: np.ndarray) -> np.ndarray:
+    from scipy.special import ndtr  # import saat pertama dipakai (lihat kb_engine.stats)
+
+    return ndtr(z)
+
+
+def risk_table(result: dict) -> pd.DataFrame:
+    """
+    Peringkat risiko stok habis bulan depan untuk semua (provinsi, kabupaten, metode):
+    P_HABIS menurun, lalu rasio prakiraan terhadap stok terakhir menaik.
+    """
+    n_kab, n_methods = result["last"].shape
+    df = pd.DataFrame({
+        "PROVINSI": np.repeat(np.asarray([path[0] for path in result["paths"]], dtype=object), n_methods),
+        "KABUPATEN": np.repeat(np.asarray(result["kabupaten"], dtype=object), n_methods),
+        "METODE": np.tile(np.asarray(result["methods"], dtype=object), n_kab),
+        "PERIODE": np.repeat(period_timestamps(result["periods"][:, 0]), n_methods),
+        "STOK_TERAKHIR": result["last"].ravel(),
+        "PRAKIRAAN": result["forecast"][:, :, 0].ravel(),
+        "BATAS_BAWAH": result["lower"][:, :, 0].ravel(),
+        "BATAS_ATAS": result["upper"][:, :, 0].ravel(),
+        "P_HABIS": result["p_stockout"].ravel(),
+        "MODEL": np.asarray(result["model"], dtype=object).ravel(),
+    })
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["RASIO_PRAKIRAAN"] = df["PRAKIRAAN"] / df["STOK_TERAKHIR"].where(df["STOK_TERAKHIR"] > 0)
+    df = df.sort_values(["P_HABIS", "RASIO_PRAKIRAAN"], ascending=[False, True], na_position="last", kind="stable")
+    df.insert(0, "PERINGKAT", np.arange(1, len(df) + 1))
+    return df.reset_index(drop=True)
+
+
+def _series_keys(cube: dict) -> tuple:
+    """Path kabupaten (urut cube) & metode; 1 deret = (kabupaten, metode), urut kabupaten lalu metode."""
+    paths = tuple(tuple(key) for key in cube["nodes"]["KABUPATEN"]["keys"])
+    return paths, list(cube["methods"])
+
+
+def _horizon_columns(prefix: str) -> list:
+    return [f"{prefix}_{h}" for h in range(1, FORECAST_HORIZON + 1)]
+
+
+@timed("forecast_fit")
+def fit_table(cube: dict, executor=None) -> pd.DataFrame:
+    """
+    Fit semua deret (kabupaten, metode) dari level KABUPATEN rollup cube (kb_engine.cube).
+    Tabel datar (bisa disimpan sebagai Parquet): PROVINSI, KABUPATEN, METODE, MODEL,
+    PRAKIRAAN_1..h (belum dipotong di 0) dan SIGMA_1..h.
+    """
+    nodes = cube["nodes"]["KABUPATEN"]
+    paths, methods = _series_keys(cube)
+    values, present = nodes["values"], nodes["present"]
+    n_kab, n_methods = len(paths), len(methods)
+
+    series = values.transpose(0, 2, 1).reshape(n_kab * n_methods, -1)
+    series_present = np.repeat(present, n_methods, axis=0)
+    tasks = [
+        (series[i:i + SERIES_PER_TASK], series_present[i:i + SERIES_PER_TASK], cube["periods"])
+        for i in range(0, len(series), SERIES_PER_TASK)
+    ]
+    fitted = run_tasks(fit_batch, tasks, executor=executor)
+    forecast = np.concatenate([f for f, _, _ in fitted]) if fitted else np.empty((0, FORECAST_HORIZON))
+    sigma = np.concatenate([s for _, s, _ in fitted]) if fitted else np.empty((0, FORECAST_HORIZON))
+
+    table = pd.DataFrame({
+        "PROVINSI": np.repeat(np.asarray([path[0] for path in paths], dtype=object), n_methods),
+        "KABUPATEN": np.repeat(np.asarray([path[-1] for path in paths], dtype=object), n_methods),
+        "METODE": np.tile(np.asarray(methods, dtype=object), n_kab),
+        "MODEL": [name for _, _, names in fitted for name in names],
+    })
+    table[_horizon_columns("PRAKIRAAN")] = forecast
+    table[_horizon_columns("SIGMA")] = sigma
+    return table
+
+
+def forecast_result(cube: dict, table: pd.DataFrame) -> dict:
+    """
+    Hasil prakiraan siap tampil dari fit_table (baru difit atau dibaca dari cache).
+    Hasil: paths (path (provinsi, kabupaten) tiap baris), kabupaten (nama), methods,
+    positions (path -> baris), periods (kabupaten x horizon, kunci periode
+    prakiraan tahun*12 + bulan, dihitung dari periode terakhir tiap kabupaten),
+    last, forecast/lower/upper (kabupaten x metode x horizon), p_stockout, model, dan
+    risk (tabel peringkat per metode + "SEMUA").
+    """
+    nodes = cube["nodes"]["KABUPATEN"]
+    paths, methods = _series_keys(cube)
+    kabupaten = tuple(path[-1] for path in paths)
+    values, present = nodes["values"], nodes["present"]
+    n_kab, n_methods = len(paths), len(methods)
+
+    # Baris tabel disusun ulang mengikuti urutan deret cube
+    wanted = pd.MultiIndex.from_arrays([
+        [path[0] for path in paths for _ in methods],
+        [path[-1] for path in paths for _ in methods],
+        methods * n_kab,
+    ])
+    order = pd.MultiIndex.from_frame(table[["PROVINSI", "KABUPATEN", "METODE"]]).get_indexer(wanted)
+    if (order < 0).any():
+        raise ValueError("Tabel prakiraan tidak cocok dengan cube (deret hilang)")
+    rows = table.iloc[order]
+    forecast = rows[_horizon_columns("PRAKIRAAN")].to_numpy(dtype=float).reshape(n_kab, n_methods, FORECAST_HORIZON)
+    sigma = rows[_horizon_columns("SIGMA")].to_numpy(dtype=float).reshape(forecast.shape)
+    model = rows["MODEL"].to_numpy(dtype=object).reshape(n_kab, n_methods)
+
+    # Stok terakhir = nilai periode terakhir yang ada datanya
+    last_pos = np.where(present.any(axis=1), present.shape[1] - 1 - np.argmax(present[:, ::-1], axis=1), 0)
+    last = values[np.arange(n_kab), last_pos].astype(float) if n_kab else np.empty((0, n_methods))
+
+    # Stok tidak mungkin negatif: prakiraan dipotong di 0; pita & P_HABIS dihitung dari nilai yang sama
+    forecast = np.maximum(forecast, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        p_stockout = _normal_cdf(-forecast[:, :, 0] / sigma[:, :, 0])
+    # sigma 0 (deret datar): pasti habis bila prakiraan <= 0, tidak bila > 0
+    p_stockout = np.where(sigma[:, :, 0] == 0, (forecast[:, :, 0] <= 0).astype(float), p_stockout)
+
+    # Periode prakiraan per kabupaten: lanjut dari periode terakhir kabupaten itu sendiri
+    last_period = cube["periods"][last_pos] if len(cube["periods"]) else np.zeros(n_kab, dtype=np.int64)
+    periods = last_period[:, None] + np.arange(1, FORECAST_HORIZON + 1)
+    result = {
+        "paths": paths,
+        "kabupaten": kabupaten,
+        "methods": methods,
+        # Kunci = path lengkap: nama kabupaten yang sama di provinsi lain tidak bertabrakan
+        "positions": {path: i for i, path in enumerate(paths)},
+        "periods": periods,
+        "last": last,
+        "forecast": forecast,
+        "lower": np.maximum(forecast - BAND_Z * sigma, 0.0),
+        "upper": forecast + BAND_Z * sigma,
+        "p_stockout": p_stockout,
+        "model": model,
+    }
+    ranked = risk_table(result)
+    result["risk"] = {"SEMUA": ranked}
+    for method in methods:
+        subset = ranked[ranked["METODE"] == method].reset_index(drop=True)
+        result["risk"][method] = subset.assign(PERINGKAT=np.arange(1, len(subset) + 1))
+    return result
+
+
+def forecast_all(cube: dict, executor=None) -> dict:
+    """fit_table + forecast_result sekaligus (tanpa cache)."""
+    return forecast_result(cube, fit_table(cube, executor=executor))
+
+
+def period_timestamps(periods: np.ndarray) -> pd.Series:
+    """Kunci periode (tahun*12 + bulan) -> tanggal awal bulan."""
+    periods = np.asarray(periods, dtype=np.int64)
+    return pd.to_datetime(pd.DataFrame({"year": periods // 12, "month": periods % 12 + 1, "day": 1}))
+
+
+def forecast_frame(result: dict, path: tuple, method: str) -> pd.DataFrame:
+    """Prakiraan 1 (path kabupaten, metode): PERIODE, PRAKIRAAN, BATAS_BAWAH, BATAS_ATAS."""
+    i, j = result["positions"][tuple(path)], result["methods"].index(method)
+    return pd.DataFrame({
+        "PERIODE": period_timestamps(result["periods"][i]),
+        "PRAKIRAAN": result["forecast"][i, j],
+        "BATAS_BAWAH": result["lower"][i, j],
+        "BATAS_ATAS": result["upper"][i, j],
+    })
@@ -0,0 +1,51 @@
+"""
+Leaderboard top-K per metrik (halaman SUMMARY).
+
+Indeks dibangun sekali per versi data: untuk tiap metrik, kandidat K_max teratas
+dipilih dengan np.argpartition (O(n)), lalu hanya kandidat itu yang diurutkan.
+Ganti metrik / K saat interaksi cukup mengiris indeks, tanpa sort tabel penuh.
+"""
+import numpy as np
+import pandas as pd
+
+from kb_engine.schema import LEADERBOARD_PEOPLE_COLUMNS, LEADERBOARD_STOCK_COLUMNS, STOCK_METHODS_WITH_TOTAL
+
+
+def top_k_positions(values: np.ndarray, k: int) -> np.ndarray:
+    """
+    Posisi k nilai terbesar, urut menurun (nilai seri -> urutan baris; NaN tidak ikut).
+    Nilai seri di batas ke-k ikut jadi kandidat, jadi hasilnya sama dengan sort stabil penuh.
+    """
+    valid = np.flatnonzero(~np.isnan(values))
+    k = min(k, len(valid))
+    if k == 0:
+        return np.empty(0, dtype=np.int64)
+    v = values[valid]
+    if k < len(v):
+        # Setelah argpartition, posisi k-1 berisi nilai terbesar ke-k
+        kth = v[np.argpartition(-v, k - 1)[k - 1]]
+        keep = v >= kth
+        valid, v = valid[keep], v[keep]
+    return valid[np.lexsort((valid, -v))[:k]]
+
+
+def build_leaderboard_index(df: pd.DataFrame, metrics: list, k_max: int) -> dict:
+    """{metrik: posisi baris top-k_max (menurun)} untuk semua metrik sekaligus."""
+    return {
+        metric: top_k_positions(df[metric].to_numpy(dtype=float, na_value=np.nan), k_max)
+        for metric in metrics
+    }
+
+
+def leaderboard_columns(metric: str) -> list:
+    """Kolom yang ditampilkan: metrik stok -> rincian stok, metrik people -> SDM & rasio."""
+    base = LEADERBOARD_STOCK_COLUMNS if metric in STOCK_METHODS_WITH_TOTAL else LEADERBOARD_PEOPLE_COLUMNS
+    return base if metric in base else base + [metric]
+
+
+def leaderboard(df: pd.DataFrame, index: dict, metric: str, k: int) -> pd.DataFrame:
+    """Top-k 1 metrik dari indeks (k <= k_max saat indeks dibangun) + kolom PERINGKAT."""
+    rows = index[metric][:k]
+    out = df.iloc[rows][leaderboard_columns(metric)].reset_index(drop=True)
+    out.insert(0, "PERINGKAT", np.arange(1, len(rows) + 1))
+    return out
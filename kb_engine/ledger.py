@@ -0,0 +1,171 @@
+"""
+Ledger KPI inkremental: total stok setahun per (tahun, kabupaten) + KPI per tahun
+(kabupaten terhubung, tempat KB, tenaga kesehatan, total stok hasil join DB1 & DB2).
+
+Kontribusi tiap partisi DB1 (1 sheet bulan di store, atau 1 file tanpa store)
+disimpan terpisah. Saat data dimuat ulang hanya partisi baru/berubah yang dibaca:
+kontribusi lama dikurangkan, kontribusi baru ditambahkan. Baris DB2 yang berubah
+(mis. 1 kabupaten dikoreksi) diterapkan sebagai selisih ke KPI tahun terkait.
+Tidak ada groupby semua baris stok maupun join ulang untuk menghitung KPI.
+
+Ledger tidak thread-safe: pemanggil memegang kunci selama sinkronisasi.
+"""
+import numpy as np
+import pandas as pd
+
+from kb_engine.schema import STOCK_METHODS
+
+# Kolom partisi DB1 yang dibaca ledger
+LEDGER_COLUMNS = ["KABUPATEN", "TAHUN"] + STOCK_METHODS
+# Kolom DB2 yang ikut dijumlahkan di KPI
+PEOPLE_KPI_COLUMNS = ["tempat_kb", "tenaga_kesehatan_total"]
+
+
+def new_ledger() -> dict:
+    """
+    Ledger kosong.
+    parts: {id_partisi: (kunci (tahun, kabupaten), jumlah metode, jumlah baris)}
+    stock: {(tahun, kabupaten): array jumlah metode}, rows: jumlah baris per kunci
+    people: {kabupaten: (tempat_kb, tenaga_kesehatan_total)}
+    kpi: {tahun: {kabupaten, tempat_kb, tenaga_kesehatan, total_stok}}
+    """
+    return {"parts": {}, "stock": {}, "rows": {}, "people": {}, "kpi": {}, "last_sync": {}}
+
+
+def partition_sums(df: pd.DataFrame) -> tuple:
+    """Jumlah stok 1 partisi per (TAHUN, KABUPATEN) -> (kunci, array jumlah, array jumlah baris)."""
+    grouped = df[LEDGER_COLUMNS].groupby(["TAHUN", "KABUPATEN"], observed=True, sort=True)
+    sums = grouped[STOCK_METHODS].sum()
+    counts = grouped.size().reindex(sums.index).to_numpy(dtype=np.int64)
+    keys = [(int(t), str(k)) for t, k in sums.index]
+    # Kolom stok dipadatkan (mis. int32): akumulasi lintas partisi dalam int64/float64 supaya tidak overflow
+    values = sums.to_numpy()
+    return keys, values.astype(np.int64 if values.dtype.kind in "biu" else np.float64), counts
+
+
+def _kpi_year(ledger: dict, tahun: int) -> dict:
+    return ledger["kpi"].setdefault(tahun, {"kabupaten": 0, "tempat_kb": 0, "tenaga_kesehatan": 0, "total_stok": 0})
+
+
+def _apply_stock(ledger: dict, keys: list, sums: np.ndarray, counts: np.ndarray, sign: int) -> set:
+    """Tambah (sign=1) / kurangi (sign=-1) kontribusi 1 partisi; KPI disesuaikan per kunci."""
+    touched = set()
+    for key, values, n in zip(keys, sums, counts):
+        tahun, kab = key
+        old_rows = ledger["rows"].get(key, 0)
+        new_rows = old_rows + sign * int(n)
+        current = ledger["stock"].get(key)
+        updated = values * sign if current is None else current + values * sign
+        person = ledger["people"].get(kab)
+        if person is not None:
+            kpi = _kpi_year(ledger, tahun)
+            kpi["total_stok"] += (values * sign).sum().item()
+            # Kabupaten masuk / keluar dari hasil join tahun ini
+            if old_rows == 0 and new_rows > 0:
+                kpi["kabupaten"] += 1
+                kpi["tempat_kb"] += person[0]
+                kpi["tenaga_kesehatan"] += person[1]
+            elif old_rows > 0 and new_rows == 0:
+                kpi["kabupaten"] -= 1
+                kpi["tempat_kb"] -= person[0]
+                kpi["tenaga_kesehatan"] -= person[1]
+        if new_rows > 0:
+            ledger["stock"][key], ledger["rows"][key] = updated, new_rows
+        else:
+            ledger["stock"].pop(key, None)
+            ledger["rows"].pop(key, None)
+        touched.add(key)
+    return touched
+
+
+def sync_stock_parts(ledger: dict, parts: dict) -> dict:
+    """
+    Samakan kontribusi stok dengan daftar partisi saat ini.
+    parts: {id_partisi: fungsi tanpa argumen -> DataFrame partisi}; fungsi hanya dipanggil
+    untuk partisi yang belum ada di ledger (id partisi berubah bila isinya berubah).
+    Mengembalikan ringkasan perubahan (jumlah partisi ditambah/dibuang, kunci tersentuh).
+    """
+    removed = [pid for pid in ledger["parts"] if pid not in parts]
+    added = [pid for pid in parts if pid not in ledger["parts"]]
+    touched = set()
+    for pid in removed:
+        keys, sums, counts = ledger["parts"].pop(pid)
+        touched |= _apply_stock(ledger, keys, sums, counts, -1)
+    for pid in added:
+        contribution = partition_sums(parts[pid]())
+        ledger["parts"][pid] = contribution
+        touched |= _apply_stock(ledger, *contribution, 1)
+    return {"parts_added": len(added), "parts_removed": len(removed), "stock_keys_touched": len(touched)}
+
+
+def _people_values(people: pd.DataFrame) -> dict:
+    values = people[PEOPLE_KPI_COLUMNS].fillna(0).astype("int64").to_numpy()
+    return {kab: (int(v[0]), int(v[1])) for kab, v in zip(people["KABUPATEN"].tolist(), values)}
+
+
+def sync_people(ledger: dict, people: pd.DataFrame) -> dict:
+    """
+    Terapkan perubahan DB2 (frame people per kabupaten) sebagai selisih:
+    hanya kabupaten yang baris KPI-nya berubah / ditambah / dihapus yang diproses.
+    """
+    new = _people_values(people)
+    old = ledger["people"]
+    changed = [kab for kab in old.keys() | new.keys() if old.get(kab) != new.get(kab)]
+    years_by_kab = {}
+    for tahun, kab in ledger["stock"]:
+        years_by_kab.setdefault(kab, []).append(tahun)
+
+    for kab in changed:
+        before, after = old.get(kab), new.get(kab)
+        for tahun in years_by_kab.get(kab, []):
+            kpi = _kpi_year(ledger, tahun)
+            if before is None:
+                kpi["kabupaten"] += 1
+                kpi["total_stok"] += ledger["stock"][(tahun, kab)].sum().item()
+            elif after is None:
+                kpi["kabupaten"] -= 1
+                kpi["total_stok"] -= ledger["stock"][(tahun, kab)].sum().item()
+            kpi["tempat_kb"] += (after or (0, 0))[0] - (before or (0, 0))[0]
+            kpi["tenaga_kesehatan"] += (after or (0, 0))[1] - (before or (0, 0))[1]
+        if after is None:
+            old.pop(kab)
+        else:
+            old[kab] = after
+    return {"kabupaten_changed": len(changed)}
+
+
+def sync_ledger(ledger: dict, parts: dict, people: pd.DataFrame) -> dict:
+    """Sinkronkan DB2 lalu partisi DB1; ringkasan perubahan disimpan di ledger["last_sync"]."""
+    summary = sync_people(ledger, people)
+    summary.update(sync_stock_parts(ledger, parts))
+    ledger["last_sync"] = summary
+    return summary
+
+
+def ledger_years(ledger: dict) -> list:
+    """Tahun yang punya stok di ledger (urut naik)."""
+    return sorted({tahun for tahun, _ in ledger["stock"]})
+
+
+def yearly_stock_frame(ledger: dict, tahun: int) -> pd.DataFrame:
+    """Setara aggregate_stock_by_kabupaten untuk 1 tahun, dibaca dari total tersimpan (urut kabupaten)."""
+    keys = sorted(kab for t, kab in ledger["stock"] if t == tahun)
+    values = np.array([ledger["stock"][(tahun, kab)] for kab in keys]).reshape(len(keys), len(STOCK_METHODS))
+    # Partisi bertipe float tapi berisi bilangan bulat -> bilangan bulat, sama seperti frame stok dipadatkan
+    if values.dtype.kind == "f" and np.array_equal(values, np.round(values)):
+        values = values.astype(np.int64)
+    out = pd.DataFrame(values, columns=STOCK_METHODS)
+    out.insert(0, "KABUPATEN", pd.array(keys, dtype="str"))
+    out["TOTAL_STOK"] = out[STOCK_METHODS].sum(axis=1)
+    return out
+
+
+def ledger_kpi(ledger: dict, tahun: int) -> dict:
+    """KPI 1 tahun dalam format model terintegrasi (salinan, aman dibagi lintas sesi)."""
+    kpi = ledger["kpi"].get(tahun, {"kabupaten": 0, "tempat_kb": 0, "tenaga_kesehatan": 0, "total_stok": 0})
+    return {
+        "jumlah_kabupaten_terhubung": int(kpi["kabupaten"]),
+        "total_tempat_kb": int(kpi["tempat_kb"]),
+        "total_tenaga_kesehatan": int(kpi["tenaga_kesehatan"]),
+        "total_stok_setahun": float(kpi["total_stok"]),
+    }
@@ -0,0 +1,119 @@
+"""
+Model terintegrasi DB1 + DB2 per tahun (agregat stok, join, KPI, leaderboard, deskriptif)
+dan akses deret waktu stok. Fungsi murni tanpa Streamlit: bisa dipakai dashboard,
+benchmark, batch job maupun worker.
+
+Contoh batch (tanpa dashboard):
+    stock_all, people = load_sources(["data/db1/DB1 2025.xlsx"], "data/DB2.xlsx")
+    models = build_models(stock_all, people)
+"""
+import numpy as np
+import pandas as pd
+
+from kb_engine import sql_store
+from kb_engine.db1 import (
+    aggregate_stock_by_kabupaten, compact_stock_frame, get_stock_timeseries_for_kabupaten,
+    load_db1_stock_timeseries, timeseries_frame
+)
+from kb_engine.db2 import load_db2_people
+from kb_engine.leaderboard import build_leaderboard_index
+from kb_engine.ledger import ledger_kpi, yearly_stock_frame
+from kb_engine.paging import build_sort_index
+from kb_engine.profiling import stage
+from kb_engine.schema import (
+    DB1_REGION_COLUMNS, DESCRIBE_COLUMNS, LEADERBOARD_K_OPTIONS, LEADERBOARD_METRICS, SQL_PEOPLE_COLUMNS,
+    SQL_STOCK_COLUMNS, STOCK_METHODS
+)
+
+
+def integrated_model(
+    stock_all: pd.DataFrame, people: pd.DataFrame, tahun: int, analytics_db: str = None, ledger: dict = None
+) -> dict:
+    """
+    Model terintegrasi 1 tahun: agregat stok tahunan + join DB1/DB2 + daftar kabupaten + KPI.
+    Dengan analytics_db (path database analitik), agregasi stok & describe
+    dijalankan sebagai query SQL dan stock_all boleh None.
+    Dengan ledger (kb_engine.ledger, sudah disinkronkan), total stok per kabupaten & KPI
+    dibaca dari ledger, tanpa agregasi ulang semua baris stok. Ledger didahulukan dari
+    analytics_db: bila keduanya diberikan (dashboard), analytics_db hanya dipakai untuk
+    describe dan query sql_store.stock_by_kabupaten tidak dijalankan.
+    """
+    # Agregasi stok tahunan per kabupaten: ledger > query SQL > groupby pandas
+    if ledger is not None:
+        stock_yearly_by_kab = yearly_stock_frame(ledger, tahun)
+    elif analytics_db:
+        stock_yearly_by_kab = sql_store.stock_by_kabupaten(analytics_db, STOCK_METHODS, tahun)
+    else:
+        stock_yearly_by_kab = aggregate_stock_by_kabupaten(stock_all[stock_all["TAHUN"] == tahun])
+
+    # Gabungkan (join) DB1 + DB2 berdasarkan kabupaten yang sama
+    with stage("merge"):
+        integrated = people.merge(stock_yearly_by_kab, on="KABUPATEN", how="inner")
+
+    if ledger is not None:
+        kpi = ledger_kpi(ledger, tahun)
+    else:
+        kpi = {
+            "jumlah_kabupaten_terhubung": int(integrated["KABUPATEN"].nunique()),
+            "total_tempat_kb": int(integrated["tempat_kb"].fillna(0).sum()),
+            "total_tenaga_kesehatan": int(integrated["tenaga_kesehatan_total"].fillna(0).sum()),
+            "total_stok_setahun": float(integrated["TOTAL_STOK"].fillna(0).sum()),
+        }
+
+    # Ringkasan deskriptif (halaman PEOPLE)
+    if analytics_db:
+        source_sql = sql_store.integrated_sql(SQL_PEOPLE_COLUMNS, STOCK_METHODS)
+        describe_df = sql_store.describe(analytics_db, source_sql, DESCRIBE_COLUMNS, (tahun,))
+    else:
+        describe_df = integrated[DESCRIBE_COLUMNS].describe()
+
+    return {
+        "integrated_df": integrated,
+        "kabupaten_list": tuple(sorted(integrated["KABUPATEN"].unique().tolist())),
+        "kpi": kpi,
+        # Indeks leaderboard top-K per metrik (halaman SUMMARY)
+        "leaderboard": build_leaderboard_index(integrated, LEADERBOARD_METRICS, max(LEADERBOARD_K_OPTIONS)),
+        "describe_df": describe_df,
+        # Indeks sort tabel (halaman DATASET)
+        "sort_index": build_sort_index(integrated),
+    }
+
+
+def stock_timeseries_from(source, kabupaten: str) -> pd.DataFrame:
+    """Deret waktu 1 kabupaten dari indeks di memori (dict) atau database analitik (path)."""
+    if isinstance(source, dict):
+        return get_stock_timeseries_for_kabupaten(source, kabupaten)
+    sums = sql_store.stock_timeseries(source, kabupaten, STOCK_METHODS)
+    return timeseries_frame(
+        sums["TAHUN"].to_numpy(dtype=np.int64),
+        sums["BULAN_KE"].to_numpy(dtype=np.int64) - 1,
+        sums[STOCK_METHODS].to_numpy()
+    )
+
+
+def sql_stock_rows(stock: pd.DataFrame) -> pd.DataFrame:
+    """
+    Frame stok -> baris tabel stok SQL (SQL_STOCK_COLUMNS, BULAN teks + BULAN_KE 1..12,
+    0 = bukan nama bulan). Kolom wilayah yang tidak ada di partisi ini diisi NULL.
+    """
+    out = stock.reindex(columns=SQL_STOCK_COLUMNS)
+    text = {col: out[col].astype(object).where(out[col].notna(), None) for col in ["BULAN"] + DB1_REGION_COLUMNS}
+    out = out.assign(**text)
+    out.insert(3, "BULAN_KE", (stock["BULAN"].cat.codes + 1).astype("int64"))
+    return out
+
+
+def load_sources(db1_paths: list, db2_path: str) -> tuple:
+    """Baca langsung workbook DB1 (boleh beberapa file/tahun) & DB2 -> (stock_all, people)."""
+    stock_all = compact_stock_frame(pd.concat(
+        [load_db1_stock_timeseries(path) for path in db1_paths], ignore_index=True
+    ))
+    return stock_all, load_db2_people(db2_path)
+
+
+def build_models(stock_all: pd.DataFrame, people: pd.DataFrame) -> dict:
+    """Model terintegrasi untuk semua tahun di DB1: {tahun: model}."""
+    return {
+        tahun: integrated_model(stock_all, people, tahun)
+        for tahun in sorted(int(t) for t in stock_all["TAHUN"].unique())
+    }
@@ -0,0 +1,65 @@
+"""
+Tampilan tabel server-side: urut + cari + pilih kolom + halaman.
+Urutan tiap kolom dihitung sekali (indeks sort); per interaksi hanya satu
+halaman baris yang diambil dari frame dan dikirim ke browser.
+"""
+import numpy as np
+import pandas as pd
+
+
+def build_sort_index(df: pd.DataFrame, columns: list = None) -> dict:
+    """
+    Posisi baris terurut naik per kolom (stabil, nilai kosong di akhir).
+    Mengembalikan {kolom: (urutan, jumlah_nilai_tidak_kosong)}.
+    """
+    sort_index = {}
+    for col in columns or df.columns:
+        s = df[col]
+        ranked = s.reset_index(drop=True).sort_values(kind="stable", na_position="last")
+        order = ranked.index.to_numpy(dtype=np.int64)
+        sort_index[col] = (order, int(s.notna().sum()))
+    return sort_index
+
+
+def _ordered_rows(sort_index: dict, sort_col: str, descending: bool, n_rows: int) -> np.ndarray:
+    if sort_col is None or sort_col not in sort_index:
+        return np.arange(n_rows)
+    order, n_valid = sort_index[sort_col]
+    if not descending:
+        return order
+    # Turun: nilai terisi dibalik, nilai kosong tetap di akhir
+    return np.concatenate([order[:n_valid][::-1], order[n_valid:]])
+
+
+def search_mask(df: pd.DataFrame, search_col: str, query: str) -> np.ndarray:
+    """Mask baris yang kolom search_col-nya memuat query (tanpa beda huruf besar/kecil)."""
+    if not query:
+        return np.ones(len(df), dtype=bool)
+    text = df[search_col].astype(str).str.upper()
+    return text.str.contains(query.strip().upper(), regex=False).fillna(False).to_numpy(dtype=bool)
+
+
+def filtered_rows(
+    df: pd.DataFrame,
+    sort_index: dict,
+    sort_col: str = None,
+    descending: bool = False,
+    search_col: str = None,
+    query: str = "",
+) -> np.ndarray:
+    """Posisi baris yang lolos pencarian, sudah dalam urutan sort yang dipilih."""
+    rows = _ordered_rows(sort_index, sort_col, descending, len(df))
+    if search_col and query:
+        rows = rows[search_mask(df, search_col, query)[rows]]
+    return rows
+
+
+def page_count(n_rows: int, page_size: int) -> int:
+    return max(1, -(-n_rows // page_size))
+
+
+def page_view(df: pd.DataFrame, rows: np.ndarray, columns: list, page: int = 1, page_size: int = 50) -> pd.DataFrame:
+    """Ambil 1 halaman (hanya baris & kolom yang tampil) dari hasil filtered_rows."""
+    page = min(max(1, page), page_count(len(rows), page_size))
+    start = (page - 1) * page_size
+    return df.iloc[rows[start:start + page_size]][list(columns)]
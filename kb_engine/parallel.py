@@ -0,0 +1,66 @@
+"""Process pool bersama untuk komputasi berat (resampling, parsing, fitting model)."""
+import os
+import sys
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+# Batas atas worker pool bersama (1 pool per proses server untuk semua pekerjaan berat)
+MAX_POOL_WORKERS = 4
+# Modul yang dimuat sekali di proses forkserver; worker di-fork dari sana
+POOL_PRELOAD = ["kb_engine.parallel"]
+# Path script __main__ pemanggil (mis. app.py), diteruskan ke proses forkserver lewat environment
+MAIN_PATH_ENV = "KB_POOL_MAIN_PATH"
+# Folder induk kb_engine: proses forkserver harus bisa mengimpor POOL_PRELOAD dari cwd mana pun
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def default_workers() -> int:
+    """Jumlah worker default = jumlah core CPU, dibatasi MAX_POOL_WORKERS."""
+    return min(os.cpu_count() or 1, MAX_POOL_WORKERS)
+
+
+def _adopt_caller_main() -> None:
+    """
+    Dijalankan saat modul ini di-preload di proses forkserver (`python -c ...`).
+    Worker baru menjalankan ulang script __main__ pemanggil (seluruh dashboard) kecuali
+    __main__ worker sudah berasal dari file yang sama. Semua fungsi task ada di kb_engine,
+    jadi __main__ forkserver (modul "-c" kosong) cukup ditandai sebagai file itu.
+    """
+    main = sys.modules.get("__main__")
+    main_path = os.environ.get(MAIN_PATH_ENV)
+    if main_path and sys.argv[:1] == ["-c"] and main is not None and not hasattr(main, "__file__"):
+        main.__file__ = main_path
+
+
+_adopt_caller_main()
+
+
+def make_process_pool(workers: int = None):
+    """
+    Buat ProcessPoolExecutor dengan start method "forkserver": worker di-fork dari proses
+    server kecil yang single-thread, bukan dari server Streamlit yang multi-thread
+    (fork dari proses multi-thread bisa mewarisi lock yang sedang dipegang -> deadlock).
+    Proses forkserver hanya memuat POOL_PRELOAD, tidak pernah script __main__ pemanggil.
+    Mengembalikan None bila hanya 1 worker atau forkserver tidak tersedia (mis. Windows)
+    -> pemanggil jalan serial.
+    """
+    workers = workers or default_workers()
+    if workers <= 1 or "forkserver" not in multiprocessing.get_all_start_methods():
+        return None
+    main_path = getattr(sys.modules.get("__main__"), "__file__", None)
+    if main_path:
+        os.environ[MAIN_PATH_ENV] = os.path.abspath(main_path)
+    python_path = os.environ.get("PYTHONPATH", "").split(os.pathsep)
+    if PACKAGE_ROOT not in python_path:
+        os.environ["PYTHONPATH"] = os.pathsep.join([PACKAGE_ROOT] + [p for p in python_path if p])
+    context = multiprocessing.get_context("forkserver")
+    context.set_forkserver_preload(POOL_PRELOAD)
+    return ProcessPoolExecutor(max_workers=workers, mp_context=context)
+
+
+def run_tasks(fn, task_args: list, executor=None) -> list:
+    """Jalankan fn(*args) untuk tiap task; paralel bila ada executor, serial bila tidak."""
+    if executor is None or len(task_args) <= 1:
+        return [fn(*args) for args in task_args]
+    futures = [executor.submit(fn, *args) for args in task_args]
+    return [f.result() for f in futures]
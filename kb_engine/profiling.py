@@ -0,0 +1,211 @@
+"""
+Instrumentasi ringan per rerun dashboard:
+- timer per tahap (context manager `stage` / decorator `timed`)
+- counter hit/miss untuk loader ber-cache (`instrument_cache`)
+- memori proses (RSS sekarang & puncak)
+
+Tanpa import Streamlit. Data rerun disimpan di memori proses (riwayat terbatas)
+dan bisa diekspor sebagai JSON lines untuk monitoring.
+"""
+import os
+import json
+import time
+import uuid
+import threading
+import functools
+import collections
+from contextlib import contextmanager
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:  # Windows
+    HAS_RESOURCE = False
+
+# Jumlah rerun terakhir yang disimpan
+RUN_HISTORY_SIZE = 200
+
+_local = threading.local()
+_lock = threading.Lock()
+_run_history = collections.deque(maxlen=RUN_HISTORY_SIZE)
+_cache_stats = {}
+_stage_totals = {}
+
+
+def rss_bytes():
+    """RSS proses saat ini (byte); None bila tidak tersedia (non-Linux)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_bytes():
+    """RSS puncak proses sejak start (byte); None bila tidak tersedia."""
+    if not HAS_RESOURCE:
+        return None
+    # Linux: ru_maxrss dalam KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def begin_run(label: str = None) -> dict:
+    """Mulai rekaman 1 rerun di thread ini (rerun sebelumnya yang belum selesai dibuang)."""
+    run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "label": label,
+        "started_at": time.time(),
+        "rss_start": rss_bytes(),
+        "stages": [],
+        "cache": {},
+        "_t0": time.perf_counter(),
+    }
+    _local.run = run
+    return run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def annotate_run(**fields) -> None:
+    """Tambahkan keterangan ke rerun aktif (mis. label halaman yang sedang dibuka)."""
+    run = current_run()
+    if run is not None:
+        run.update(fields)
+
+
+def _record_stage(name: str, ms: float) -> None:
+    run = current_run()
+    if run is not None:
+        run["stages"].append({"stage": name, "ms": round(ms, 3)})
+    with _lock:
+        total = _stage_totals.setdefault(name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        total["count"] += 1
+        total["total_ms"] += ms
+        total["max_ms"] = max(total["max_ms"], ms)
+
+
+@contextmanager
+def stage(name: str):
+    """Ukur durasi blok kode sebagai tahap `name`."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record_stage(name, (time.perf_counter() - t0) * 1000.0)
+
+
+def timed(name: str = None):
+    """Decorator: setiap pemanggilan fungsi dicatat sebagai 1 tahap."""
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def _count_cache(name: str, key: str) -> None:
+    with _lock:
+        stats = _cache_stats.setdefault(name, {"calls": 0, "misses": 0})
+        stats[key] += 1
+    run = current_run()
+    if run is not None:
+        stats = run["cache"].setdefault(name, {"calls": 0, "misses": 0})
+        stats[key] += 1
+
+
+def instrument_cache(cache_decorator, name: str = None):
+    """
+    Bungkus loader ber-cache (mis. st.cache_data(...)) dengan counter hit/miss:
+    calls = semua pemanggilan, misses = isi fungsi benar-benar dijalankan.
+    Isi fungsi yang dijalankan juga dicatat sebagai tahap.
+    """
+    def decorator(fn):
+        label = name or fn.__name__
+
+        @functools.wraps(fn)
+        def body(*args, **kwargs):
+            _count_cache(label, "misses")
+            with stage(label):
+                return fn(*args, **kwargs)
+
+        cached = cache_decorator(body)
+
+        @functools.wraps(fn)
+        def call(*args, **kwargs):
+            _count_cache(label, "calls")
+            return cached(*args, **kwargs)
+        return call
+    return decorator
+
+
+def end_run(log_path: str = None, **extra) -> dict:
+    """Tutup rekaman rerun, simpan ke riwayat; tulis 1 baris JSON ke log_path bila diisi."""
+    run = current_run()
+    if run is None:
+        return None
+    _local.run = None
+
+    record = {k: v for k, v in run.items() if not k.startswith("_")}
+    record["total_ms"] = round((time.perf_counter() - run["_t0"]) * 1000.0, 3)
+    record["rss_end"] = rss_bytes()
+    record["peak_rss"] = peak_rss_bytes()
+    record.update(extra)
+
+    with _lock:
+        _run_history.append(record)
+    if log_path:
+        try:
+            with open(log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError:
+            pass  # log hanya pelengkap
+    return record
+
+
+def run_history() -> list:
+    with _lock:
+        return list(_run_history)
+
+
+def cache_stats_rows() -> list:
+    """Baris tabel hit/miss per loader."""
+    with _lock:
+        items = sorted(_cache_stats.items())
+    rows = []
+    for name, s in items:
+        hits = s["calls"] - s["misses"]
+        rows.append({
+            "loader": name,
+            "calls": s["calls"],
+            "hits": max(hits, 0),
+            "misses": s["misses"],
+            "hit_rate": hits / s["calls"] if s["calls"] else None,
+        })
+    return rows
+
+
+def stage_totals_rows() -> list:
+    """Baris tabel akumulasi durasi per tahap (sejak proses start)."""
+    with _lock:
+        items = sorted(_stage_totals.items(), key=lambda kv: -kv[1]["total_ms"])
+    return [
+        {
+            "stage": name,
+            "count": t["count"],
+            "total_ms": round(t["total_ms"], 3),
+            "mean_ms": round(t["total_ms"] / t["count"], 3),
+            "max_ms": round(t["max_ms"], 3),
+        }
+        for name, t in items
+    ]
+
+
+def runs_jsonl(runs: list) -> str:
+    """Riwayat rerun sebagai JSON lines (1 rerun per baris)."""
+    return "".join(json.dumps(r, default=str) + "\n" for r in runs)
@@ -0,0 +1,156 @@
+"""
+Mesin resampling untuk statistik berbasis rank:
+- bootstrap  -> interval kepercayaan (CI) persentil
+- permutasi  -> p-value "exact-style" (tidak bergantung pada pendekatan asimtotik)
+
+Resample diproses per chunk sebagai operasi rank NumPy ber-batch. Tiap chunk punya
+seed turunan dari SeedSequence(seed), jadi hasil identik berapapun jumlah worker.
+"""
+import numpy as np
+
+from kb_engine.parallel import run_tasks
+
+# Batas elemen per batch (baris resample x n) supaya memori per chunk tetap kecil
+MAX_BATCH_ELEMENTS = 2_000_000
+MAX_CHUNK_SIZE = 1_000
+
+
+def _chunk_sizes(n_resamples: int, n_obs: int) -> list:
+    """Bagi resample ke chunk berukuran tetap (hanya bergantung pada n, bukan jumlah worker)."""
+    size = max(1, min(MAX_CHUNK_SIZE, MAX_BATCH_ELEMENTS // max(n_obs, 1)))
+    full, rest = divmod(n_resamples, size)
+    return [size] * full + ([rest] if rest else [])
+
+
+def _row_spearman(rank_x: np.ndarray, rank_y: np.ndarray) -> np.ndarray:
+    """Korelasi Pearson per baris dari matriks rank (= Spearman per resample)."""
+    cx = rank_x - rank_x.mean(axis=1, keepdims=True)
+    cy = rank_y - rank_y.mean(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (cx * cy).sum(axis=1) / np.sqrt((cx ** 2).sum(axis=1) * (cy ** 2).sum(axis=1))
+
+
+def _kruskal_h_from_ranks(ranks: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    H Kruskal–Wallis per baris: (N-1) * sum n_g (mean_g - mean)^2 / sum (r - mean)^2.
+    Bentuk ini sudah memuat koreksi ties (sama dengan scipy.stats.kruskal).
+    """
+    n_obs = ranks.shape[1]
+    grand_mean = (n_obs + 1) / 2.0
+    between = np.zeros(ranks.shape[0])
+    for g in range(n_groups):
+        in_group = codes == g
+        n_g = in_group.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_g = np.where(in_group, ranks, 0.0).sum(axis=1) / n_g
+        between += np.where(n_g > 0, n_g * (mean_g - grand_mean) ** 2, 0.0)
+    total = ((ranks - grand_mean) ** 2).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (n_obs - 1) * between / total
+
+
+def _spearman_chunk(x: np.ndarray, y: np.ndarray, size: int, seed) -> tuple:
+    """1 chunk: `size` resample bootstrap + `size` permutasi untuk rho Spearman."""
+    from scipy.stats import rankdata  # import saat pertama dipakai (lihat kb_engine.stats)
+
+    rng = np.random.default_rng(seed)
+    n = len(x)
+
+    idx = rng.integers(0, n, size=(size, n))
+    boot = _row_spearman(rankdata(x[idx], axis=1), rankdata(y[idx], axis=1))
+
+    # Permutasi cukup mengacak rank Y (rank X tetap)
+    rank_x = np.broadcast_to(rankdata(x), (size, n))
+    rank_y = rng.permuted(np.tile(rankdata(y), (size, 1)), axis=1)
+    perm = _row_spearman(rank_x, rank_y)
+    return boot, perm
+
+
+def _kruskal_chunk(values: np.ndarray, codes: np.ndarray, n_groups: int, size: int, seed) -> tuple:
+    """1 chunk: bootstrap (resample di dalam tiap grup) + permutasi label grup untuk H."""
+    from scipy.stats import rankdata
+
+    rng = np.random.default_rng(seed)
+    n = len(values)
+
+    # Bootstrap berstrata: ukuran tiap grup tetap
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    parts = []
+    for g in range(n_groups):
+        members = order[sorted_codes == g]
+        if len(members):
+            parts.append(members[rng.integers(0, len(members), size=(size, len(members)))])
+    idx = np.concatenate(parts, axis=1)
+    boot_codes = np.broadcast_to(sorted_codes, (size, n))
+    boot = _kruskal_h_from_ranks(rankdata(values[idx], axis=1), boot_codes, n_groups)
+
+    # Permutasi: rank tetap, label grup diacak
+    ranks = np.broadcast_to(rankdata(values), (size, n))
+    perm_codes = rng.permuted(np.tile(codes, (size, 1)), axis=1)
+    perm = _kruskal_h_from_ranks(ranks, perm_codes, n_groups)
+    return boot, perm
+
+
+def _run_resampling(chunk_fn, data_args: tuple, n_obs: int, n_resamples: int, seed: int, executor) -> tuple:
+    sizes = _chunk_sizes(n_resamples, n_obs)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    results = run_tasks(chunk_fn, [data_args + (size, s) for size, s in zip(sizes, seeds)], executor)
+    boot = np.concatenate([r[0] for r in results])
+    perm = np.concatenate([r[1] for r in results])
+    return boot, perm
+
+
+def _summarize(observed: float, boot: np.ndarray, perm: np.ndarray, ci: float, two_sided: bool) -> dict:
+    alpha = (1.0 - ci) / 2.0
+    boot_ok = boot[~np.isnan(boot)]
+    if len(boot_ok):
+        ci_low, ci_high = np.quantile(boot_ok, [alpha, 1.0 - alpha])
+    else:
+        ci_low = ci_high = np.nan
+
+    # p = (1 + #ekstrem) / (B + 1) -> tidak pernah 0
+    eps = 1e-12
+    perm_ok = perm[~np.isnan(perm)]
+    if two_sided:
+        extreme = np.abs(perm_ok) >= abs(observed) - eps
+    else:
+        extreme = perm_ok >= observed - eps
+    p_perm = (1 + int(extreme.sum())) / (len(perm_ok) + 1) if not np.isnan(observed) else np.nan
+
+    return {
+        "statistic": float(observed),
+        "ci_low": float(ci_low),
+        "ci_high": float(ci_high),
+        "p_permutation": float(p_perm),
+        "n_resamples": int(len(perm_ok)),
+    }
+
+
+def spearman_resampling(x, y, n_resamples: int = 10_000, seed: int = 0, ci: float = 0.95, executor=None) -> dict:
+    """
+    Bootstrap CI + p-value permutasi (dua sisi) untuk rho Spearman.
+    x, y: array 1-D tanpa NaN dengan panjang sama.
+    """
+    from scipy.stats import rankdata
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    observed = _row_spearman(rankdata(x)[None, :], rankdata(y)[None, :])[0]
+    boot, perm = _run_resampling(_spearman_chunk, (x, y), len(x), n_resamples, seed, executor)
+    return _summarize(observed, boot, perm, ci, two_sided=True)
+
+
+def kruskal_resampling(groups: list, n_resamples: int = 10_000, seed: int = 0, ci: float = 0.95, executor=None) -> dict:
+    """
+    Bootstrap CI + p-value permutasi (satu sisi, H besar = beda) untuk H Kruskal–Wallis.
+    groups: list array 1-D (satu array per kategori, tanpa NaN).
+    """
+    from scipy.stats import rankdata
+
+    groups = [np.asarray(g, dtype=float) for g in groups if len(g) > 0]
+    values = np.concatenate(groups)
+    codes = np.repeat(np.arange(len(groups)), [len(g) for g in groups])
+    observed = _kruskal_h_from_ranks(rankdata(values)[None, :], codes[None, :], len(groups))[0]
+    boot, perm = _run_resampling(_kruskal_chunk, (values, codes, len(groups)), len(values), n_resamples, seed, executor)
+    return _summarize(observed, boot, perm, ci, two_sided=False)
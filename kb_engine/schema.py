@@ -0,0 +1,66 @@
+"""
+Skema data dashboard KB: nama kolom DB1/DB2, urutan bulan & variabel analisis.
+Dipakai bersama oleh app.py dan modul kb_engine lainnya.
+"""
+
+MONTH_ORDER = [
+    "JANUARI","FEBRUARI","MARET","APRIL","MEI","JUNI",
+    "JULI","AGUSTUS","SEPTEMBER","OKTOBER","NOVEMBER","DESEMBER"
+]
+
+# Tahun untuk file/sheet DB1 yang tidak menyebut tahun (data bawaan: TAHUN 2025, sesuai DB2)
+DB1_DEFAULT_YEAR = 2025
+
+# Provinsi untuk DB1 tanpa kolom PROVINSI (data bawaan: Jawa Timur, sesuai DB2)
+DB1_DEFAULT_PROVINCE = "JAWA TIMUR"
+
+# Kolom detail stok pada DB1 (dipakai untuk hitung agregat SUNTIK/PIL/IMPLAN)
+DB1_NUMERIC_COLUMNS = [
+    "SUNTIKAN 1 BULANAN",
+    "SUNTIKAN 3 BULANAN KOMBINASI",
+    "SUNTIKAN 3 BULANAN PROGESTIN",
+    "PIL KOMBINASI",
+    "PIL PROGESTIN",
+    "KONDOM",
+    "IMPLAN 1 BATANG",
+    "IMPLAN 2 BATANG",
+    "IUD"
+]
+
+# Kolom identitas DB1; hanya kolom ini + DB1_NUMERIC_COLUMNS yang dibaca dari Excel
+DB1_ID_COLUMNS = ["KODE", "KABUPATEN"]
+# Kolom wilayah opsional DB1 (data per kecamatan/fasilitas, atau beberapa provinsi)
+DB1_REGION_COLUMNS = ["PROVINSI", "KECAMATAN", "FASILITAS"]
+# Hierarki wilayah rollup cube, dari atas ke bawah
+REGION_LEVELS = ["PROVINSI", "KABUPATEN", "KECAMATAN", "FASILITAS"]
+DB1_READ_COLUMNS = DB1_ID_COLUMNS + DB1_REGION_COLUMNS + DB1_NUMERIC_COLUMNS
+
+# Kolom stok agregat yang dipakai di dashboard
+STOCK_METHODS = ["SUNTIK", "PIL", "IMPLAN", "KONDOM", "IUD"]
+STOCK_METHODS_WITH_TOTAL = ["TOTAL_STOK"] + STOCK_METHODS
+
+# Variabel people (DB2) yang bisa dikaitkan dengan stok
+PEOPLE_X_OPTIONS = ["tempat_kb", "tenaga_kesehatan_total", "administrasi", "sdm_per_tempat", "admin_per_tempat"]
+
+# Leaderboard halaman SUMMARY: metrik yang bisa diperingkat, kolom tampilan & pilihan K
+LEADERBOARD_METRICS = STOCK_METHODS_WITH_TOTAL + PEOPLE_X_OPTIONS
+LEADERBOARD_STOCK_COLUMNS = ["KABUPATEN"] + STOCK_METHODS_WITH_TOTAL
+LEADERBOARD_PEOPLE_COLUMNS = ["KABUPATEN"] + PEOPLE_X_OPTIONS
+LEADERBOARD_K_OPTIONS = [5, 10, 20, 50]
+
+# Variabel kunci untuk tabel deskriptif halaman PEOPLE
+DESCRIBE_COLUMNS = ["tempat_kb", "tenaga_kesehatan_total", "administrasi", "sdm_per_tempat", "admin_per_tempat", "TOTAL_STOK"]
+
+# Kategori 3 level untuk uji Kruskal–Wallis (kode 0, 1, 2)
+KRUSKAL_LABELS = ["Rendah", "Sedang", "Tinggi"]
+
+# Kolom yang dimuat ke database analitik
+# (DB2 tanpa "kabupaten" huruf kecil: nama kolom SQL tidak membedakan huruf besar/kecil)
+# (kolom wilayah opsional selalu ada di tabel stok; NULL bila tidak ada di file DB1)
+SQL_STOCK_COLUMNS = ["KABUPATEN", "TAHUN", "BULAN"] + STOCK_METHODS + DB1_REGION_COLUMNS
+SQL_PEOPLE_COLUMNS = ["KABUPATEN"] + PEOPLE_X_OPTIONS
+
+
+def normalize_text(x) -> str:
+    """Rapikan teks: hapus spasi depan/belakang + ubah jadi HURUF BESAR."""
+    return str(x).strip().upper()
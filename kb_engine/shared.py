@@ -0,0 +1,65 @@
+"""
+Model data bersama lintas sesi Streamlit (1 salinan per proses).
+
+Objek di cache_resource dibekukan sekali (array NumPy & kolom NumPy DataFrame read-only).
+Sesi tidak menulis ke objek bersama secara langsung, tapi ke view dangkal (session_view).
+DataFrame/Series memakai Copy-on-Write pandas (selalu aktif sejak pandas 3, lihat
+requirements.txt), jadi perubahan di satu sesi hanya menyalin kolom yang diubah dan
+tidak pernah menyentuh salinan bersama.
+"""
+import numpy as np
+import pandas as pd
+
+
+def _freeze_array(arr: np.ndarray) -> None:
+    # View dari pandas menunjuk ke array kolom lewat .base: bekukan seluruh rantainya
+    while isinstance(arr, np.ndarray):
+        arr.setflags(write=False)
+        arr = arr.base
+
+
+def _column_array(col: pd.Series):
+    """Array NumPy penyimpan 1 kolom; None untuk kolom Arrow/string (memang tidak bisa diubah)."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return col.array.codes
+    if isinstance(col.dtype, np.dtype):
+        return col.to_numpy()
+    return None
+
+
+def freeze(obj):
+    """
+    Tandai semua array NumPy di dalam obj (dict/list/tuple bertingkat) sebagai read-only,
+    termasuk array kolom DataFrame/Series bertipe NumPy (angka, kategori): penulisan in-place
+    ke kolom itu gagal. Kolom extension (string Arrow, Int64, ...) tidak bisa dikunci dan
+    tetap bisa diubah lewat .iloc/.loc -> halaman hanya memakai objek bersama lewat session_view.
+    """
+    if isinstance(obj, np.ndarray):
+        _freeze_array(obj)
+    elif isinstance(obj, (pd.DataFrame, pd.Series)):
+        frame = obj.to_frame() if isinstance(obj, pd.Series) else obj
+        for i in range(frame.shape[1]):
+            _freeze_array(_column_array(frame.iloc[:, i]))
+    elif isinstance(obj, dict):
+        for value in obj.values():
+            freeze(value)
+    elif isinstance(obj, (list, tuple)):
+        for value in obj:
+            freeze(value)
+    return obj
+
+
+def session_view(obj):
+    """
+    View per sesi atas objek bersama: container disalin dangkal, DataFrame/Series
+    jadi copy(deep=False) (tanpa menyalin data), array & skalar dipakai apa adanya.
+    """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return obj.copy(deep=False)
+    if isinstance(obj, dict):
+        return {key: session_view(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [session_view(value) for value in obj]
+    if isinstance(obj, tuple):
+        return tuple(session_view(value) for value in obj)
+    return obj
@@ -0,0 +1,22 @@
+"""
+Baca sheet Excel sebagai task terpisah (1 task = 1 sheet dari 1 file).
+Parsing xlsx (openpyxl) berat di CPU & single-thread, jadi sheet/file
+dipecah ke process pool lalu hasilnya dikembalikan sesuai urutan task.
+"""
+import pandas as pd
+
+from kb_engine.parallel import run_tasks
+
+
+def read_sheet(path: str, sheet_name: str, usecols: list = None) -> pd.DataFrame:
+    """Baca 1 sheet; usecols = daftar nama header yang dipertahankan (None = semua)."""
+    pick = None if usecols is None else (lambda c: c in usecols)
+    return pd.read_excel(path, sheet_name=sheet_name, usecols=pick)
+
+
+def read_sheets(tasks: list, usecols: list = None, executor=None) -> list:
+    """
+    tasks: list (path, nama_sheet). Mengembalikan list DataFrame dengan urutan sama.
+    executor None -> serial.
+    """
+    return run_tasks(read_sheet, [(path, sheet, usecols) for path, sheet in tasks], executor)
@@ -0,0 +1,221 @@
+"""
+Database analitik embedded (file, tanpa server) untuk agregasi dashboard.
+Default SQLite (bawaan Python); DuckDB hanya dipakai bila diminta eksplisit
+(KB_SQL_ENGINE=duckdb) dan terpasang.
+
+Data bersih DB1/DB2 dimuat sekali ke 1 file per versi data; agregasi dijalankan
+sebagai query SQL ber-indeks yang hanya mengembalikan hasil kecil, jadi frame stok
+mentah tidak perlu ada di memori worker.
+"""
+import os
+import uuid
+import sqlite3
+from urllib.parse import quote
+
+import pandas as pd
+
+# Optional: DuckDB (kolumnar, lebih cepat untuk agregasi besar), opt-in lewat KB_SQL_ENGINE=duckdb
+USE_DUCKDB = os.environ.get("KB_SQL_ENGINE", "sqlite").strip().lower() == "duckdb"
+if USE_DUCKDB:
+    try:
+        import duckdb
+    except ImportError:
+        USE_DUCKDB = False
+
+SQL_BACKEND = "duckdb" if USE_DUCKDB else "sqlite"
+STORE_EXT = "duckdb" if USE_DUCKDB else "sqlite"
+# Naikkan bila skema tabel berubah (file database versi lama otomatis diabaikan)
+SCHEMA_VERSION = 2
+
+STOCK_TABLE = "stock"
+PEOPLE_TABLE = "people"
+
+DESCRIBE_STATS = ["count", "mean", "std", "min", "25%", "50%", "75%", "max"]
+
+
+def _quote(name: str) -> str:
+    """Kutip nama kolom (nama DB1 memuat spasi)."""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _connect(path: str, read_only: bool = True):
+    if USE_DUCKDB:
+        return duckdb.connect(path, read_only=read_only)
+    if read_only:
+        return sqlite3.connect(f"file:{quote(path)}?mode=ro", uri=True, check_same_thread=False)
+    return sqlite3.connect(path)
+
+
+def _run(con, sql: str, params: tuple = ()) -> pd.DataFrame:
+    if USE_DUCKDB:
+        return con.execute(sql, list(params)).df()
+    return pd.read_sql_query(sql, con, params=tuple(params))
+
+
+def query_df(path: str, sql: str, params: tuple = ()) -> pd.DataFrame:
+    """Jalankan 1 query (placeholder ?) dan kembalikan hasilnya sebagai DataFrame."""
+    con = _connect(path)
+    try:
+        return _run(con, sql, params)
+    finally:
+        con.close()
+
+
+def _append(con, table: str, df: pd.DataFrame, created: bool) -> None:
+    if USE_DUCKDB:
+        con.register("_chunk", df)
+        if created:
+            con.execute(f"INSERT INTO {table} SELECT * FROM _chunk")
+        else:
+            con.execute(f"CREATE TABLE {table} AS SELECT * FROM _chunk")
+        con.unregister("_chunk")
+    else:
+        df.to_sql(table, con, if_exists="append", index=False)
+
+
+def build_store(path: str, stock_frames, people: pd.DataFrame) -> str:
+    """
+    Tulis file database baru secara atomik (file sementara lalu os.replace).
+    stock_frames: iterable DataFrame stok (mis. 1 partisi per sheet) -> dimuat
+    satu per satu, jadi memori puncak = 1 partisi, bukan seluruh DB1.
+    """
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    con = _connect(tmp_path, read_only=False)
+    try:
+        created = False
+        for df in stock_frames:
+            _append(con, STOCK_TABLE, df, created)
+            created = True
+        _append(con, PEOPLE_TABLE, people, False)
+
+        con.execute(f"CREATE INDEX idx_stock_kab_periode ON {STOCK_TABLE} (KABUPATEN, TAHUN, BULAN_KE)")
+        con.execute(f"CREATE INDEX idx_stock_tahun ON {STOCK_TABLE} (TAHUN)")
+        con.execute(f"CREATE INDEX idx_people_kab ON {PEOPLE_TABLE} (KABUPATEN)")
+        if not USE_DUCKDB:
+            con.commit()  # DuckDB: autocommit per statement
+    except Exception:
+        con.close()
+        os.remove(tmp_path)
+        raise
+    con.close()
+    os.replace(tmp_path, path)
+    return path
+
+
+def stock_by_kabupaten_sql(methods: list) -> str:
+    """Subquery stok setahun per kabupaten (parameter: TAHUN)."""
+    sums = ", ".join(f"SUM({_quote(m)}) AS {_quote(m)}" for m in methods)
+    total = " + ".join(f"SUM({_quote(m)})" for m in methods)
+    return (
+        f"SELECT KABUPATEN, {sums}, {total} AS TOTAL_STOK "
+        f"FROM {STOCK_TABLE} WHERE TAHUN = ? AND KABUPATEN IS NOT NULL GROUP BY KABUPATEN"
+    )
+
+
+def integrated_sql(people_columns: list, methods: list) -> str:
+    """Join DB2 + stok setahun per kabupaten (parameter: TAHUN)."""
+    people_cols = ", ".join(f"p.{_quote(c)}" for c in people_columns)
+    stock_cols = ", ".join(f"s.{_quote(c)}" for c in methods + ["TOTAL_STOK"])
+    return (
+        f"SELECT {people_cols}, {stock_cols} FROM {PEOPLE_TABLE} p "
+        f"JOIN ({stock_by_kabupaten_sql(methods)}) s ON p.KABUPATEN = s.KABUPATEN"
+    )
+
+
+def stock_by_kabupaten(path: str, methods: list, tahun: int) -> pd.DataFrame:
+    """Setara aggregate_stock_by_kabupaten untuk 1 tahun (urut kabupaten)."""
+    return query_df(path, f"{stock_by_kabupaten_sql(methods)} ORDER BY KABUPATEN", (tahun,))
+
+
+def stock_timeseries(path: str, kabupaten: str, methods: list) -> pd.DataFrame:
+    """Stok per periode (TAHUN, BULAN_KE) untuk 1 kabupaten; periode tanpa bulan valid dibuang."""
+    sums = ", ".join(f"SUM({_quote(m)}) AS {_quote(m)}" for m in methods)
+    return query_df(
+        path,
+        f"SELECT TAHUN, BULAN_KE, {sums} FROM {STOCK_TABLE} "
+        f"WHERE KABUPATEN = ? AND BULAN_KE > 0 GROUP BY TAHUN, BULAN_KE ORDER BY TAHUN, BULAN_KE",
+        (kabupaten,),
+    )
+
+
+def stock_leaf_sums(path: str, methods: list, levels: list, fill: dict) -> pd.DataFrame:
+    """
+    Stok per (level wilayah, TAHUN, BULAN_IDX 0..11) untuk rollup cube.
+    Sel wilayah kosong diganti fill[level] sebelum dijumlahkan (sama seperti
+    kb_engine.cube.stock_leaf_sums); baris tanpa kabupaten / bulan valid dibuang.
+    """
+    keys = [f"COALESCE({_quote(lvl)}, ?)" if lvl in fill else _quote(lvl) for lvl in levels]
+    params = tuple(fill[lvl] for lvl in levels if lvl in fill)
+    select = ", ".join(f"{key} AS {_quote(lvl)}" for key, lvl in zip(keys, levels))
+    group = ", ".join(str(i + 1) for i in range(len(levels) + 2))
+    sums = ", ".join(f"SUM({_quote(m)}) AS {_quote(m)}" for m in methods)
+    return query_df(
+        path,
+        f"SELECT {select}, TAHUN, BULAN_KE - 1 AS BULAN_IDX, {sums} FROM {STOCK_TABLE} "
+        f"WHERE KABUPATEN IS NOT NULL AND BULAN_KE > 0 "
+        f"GROUP BY {group} ORDER BY {group}",
+        params,
+    )
+
+
+def non_empty_columns(path: str, table: str, columns: list) -> list:
+    """Kolom (dari columns) yang punya minimal 1 nilai tidak NULL."""
+    counts = ", ".join(f"COUNT({_quote(c)}) AS {_quote(c)}" for c in columns)
+    row = query_df(path, f"SELECT {counts} FROM {table}").iloc[0]
+    return [c for c in columns if int(row[c]) > 0]
+
+
+def distinct_values(path: str, table: str, column: str) -> list:
+    """Nilai unik 1 kolom (urut naik, tanpa NULL)."""
+    col = _quote(column)
+    df = query_df(path, f"SELECT DISTINCT {col} AS v FROM {table} WHERE {col} IS NOT NULL ORDER BY v")
+    return df["v"].tolist()
+
+
+def _quantile(con, source_sql: str, col: str, count: int, q: float, params: tuple) -> float:
+    # Interpolasi linier (sama dengan pandas describe): ambil 2 nilai di sekitar posisi q*(n-1)
+    pos = q * (count - 1)
+    lo = int(pos)
+    vals = _run(
+        con,
+        f"SELECT {col} AS v FROM ({source_sql}) t WHERE {col} IS NOT NULL "
+        f"ORDER BY {col} LIMIT 2 OFFSET {lo}",
+        params,
+    )["v"].astype(float).tolist()
+    if len(vals) == 1 or pos == lo:
+        return vals[0]
+    return vals[0] + (vals[1] - vals[0]) * (pos - lo)
+
+
+def describe(path: str, source_sql: str, columns: list, params: tuple = ()) -> pd.DataFrame:
+    """Setara DataFrame.describe() (count, mean, std, min, kuartil, max) dihitung di database."""
+    con = _connect(path)
+    try:
+        out = {}
+        for column in columns:
+            col = _quote(column)
+            base = _run(
+                con,
+                f"SELECT COUNT({col}) AS n, AVG({col}) AS mean, MIN({col}) AS min, MAX({col}) AS max "
+                f"FROM ({source_sql}) t",
+                params,
+            ).iloc[0]
+            count = int(base["n"])
+            if count == 0:
+                out[column] = [0.0] + [float("nan")] * 7
+                continue
+
+            mean = float(base["mean"])
+            # Varians 2 lintasan (lebih stabil daripada sum kuadrat - kuadrat sum)
+            ss = _run(
+                con,
+                f"SELECT SUM(({col} - ?) * ({col} - ?)) AS ss FROM ({source_sql}) t WHERE {col} IS NOT NULL",
+                (mean, mean) + tuple(params),
+            )["ss"].iloc[0]
+            std = (float(ss) / (count - 1)) ** 0.5 if count > 1 else float("nan")
+
+            quartiles = [_quantile(con, source_sql, col, count, q, params) for q in (0.25, 0.5, 0.75)]
+            out[column] = [float(count), mean, std, float(base["min"])] + quartiles + [float(base["max"])]
+        return pd.DataFrame(out, index=DESCRIBE_STATS)
+    finally:
+        con.close()
@@ -0,0 +1,231 @@
+"""
+Statistik halaman dashboard KB: Spearman, Mann–Whitney, Kruskal–Wallis & ADF.
+Semua fungsi murni (input frame/array -> hasil), tanpa state & tanpa Streamlit.
+
+scipy.stats & statsmodels mahal di-import (detik + puluhan MB RSS), jadi baru
+di-import saat fungsi statistik pertama kali dipanggil (halaman TS/LINK/KRUSKAL);
+halaman SUMMARY/DATASET tidak pernah memuatnya.
+"""
+import functools
+
+import numpy as np
+import pandas as pd
+
+from kb_engine.profiling import timed
+from kb_engine.schema import KRUSKAL_LABELS, PEOPLE_X_OPTIONS, STOCK_METHODS, STOCK_METHODS_WITH_TOTAL
+
+
+@functools.lru_cache(maxsize=None)
+def _load_adfuller():
+    """adfuller statsmodels (di-import sekali saat pertama dipakai); None bila statsmodels tidak ada."""
+    # Optional: ADF test (butuh statsmodels)
+    try:
+        from statsmodels.tsa.stattools import adfuller
+    except Exception:
+        return None
+    return adfuller
+
+
+def has_statsmodels() -> bool:
+    return _load_adfuller() is not None
+
+
+def __getattr__(name):
+    # HAS_STATSMODELS ditentukan saat pertama kali dibaca (bukan saat modul di-import)
+    if name == "HAS_STATSMODELS":
+        return has_statsmodels()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def spearman_strength_label(rho: float) -> str:
+    """Label kekuatan korelasi Spearman (berdasar nilai absolut rho)."""
+    a = abs(rho)
+    if a < 0.2: return "sangat lemah"
+    if a < 0.4: return "lemah"
+    if a < 0.6: return "sedang"
+    if a < 0.8: return "kuat"
+    return "sangat kuat"
+
+
+@timed("spearman")
+def spearman_matrix(df: pd.DataFrame, x_cols: list, y_cols: list, required_cols: list = ()) -> pd.DataFrame:
+    """
+    Korelasi Spearman untuk SEMUA pasangan (X, Y) sekaligus.
+    Baris kosong dibuang per pasangan (sama seperti dropna per pasangan); pasangan dengan
+    baris valid yang sama diranking sekali lalu dihitung dalam satu perkalian matriks.
+    Mengembalikan frame ber-index (x_var, y_var) dengan kolom rho, p_value, n.
+    """
+    from scipy.stats import rankdata, t as t_dist
+
+    cols = list(x_cols) + list(y_cols)
+    values = df[cols].to_numpy(dtype=float, na_value=np.nan)
+    valid = ~np.isnan(values)
+    base = df[list(required_cols)].notna().all(axis=1).to_numpy()
+
+    # Kelompokkan pasangan berdasarkan pola baris valid
+    mask_groups = {}
+    for i in range(len(x_cols)):
+        for j in range(len(x_cols), len(cols)):
+            mask = base & valid[:, i] & valid[:, j]
+            mask_groups.setdefault(mask.tobytes(), (mask, []))[1].append((i, j))
+
+    rho = np.full((len(x_cols), len(y_cols)), np.nan)
+    n = np.zeros((len(x_cols), len(y_cols)), dtype=int)
+    for mask, pairs in mask_groups.values():
+        used = sorted({c for pair in pairs for c in pair})
+        ranks = rankdata(values[mask][:, used], axis=0)
+        centered = ranks - ranks.mean(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            z = centered / np.sqrt((centered ** 2).sum(axis=0))
+        corr = z.T @ z
+        pos = {c: k for k, c in enumerate(used)}
+        for i, j in pairs:
+            rho[i, j - len(x_cols)] = corr[pos[i], pos[j]]
+            n[i, j - len(x_cols)] = int(mask.sum())
+
+    # p-value dua sisi (uji t, sama dengan scipy.stats.spearmanr)
+    rho = np.clip(rho, -1.0, 1.0)
+    dof = n - 2
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t_stat = rho * np.sqrt(dof / ((1.0 - rho) * (1.0 + rho)))
+        p_value = np.where(dof > 0, 2 * t_dist.sf(np.abs(t_stat), np.maximum(dof, 1)), np.nan)
+
+    index = pd.MultiIndex.from_product([x_cols, y_cols], names=["x_var", "y_var"])
+    return pd.DataFrame(
+        {"rho": rho.ravel(), "p_value": p_value.ravel(), "n": n.ravel()},
+        index=index
+    )
+
+
+@timed("mannwhitney")
+def mannwhitney_by_admin(df: pd.DataFrame, y_cols: list) -> pd.DataFrame:
+    """
+    Uji Mann–Whitney (admin > 0 vs admin = 0) untuk semua variabel Y dalam satu panggilan.
+    Mengembalikan frame ber-index y_var: U, p_value, median & jumlah data per grup.
+    """
+    from scipy.stats import mannwhitneyu
+
+    admin = df["administrasi"].to_numpy(dtype=float, na_value=np.nan)
+    values = df[list(y_cols)].to_numpy(dtype=float, na_value=np.nan)
+    group_exists = values[admin > 0]
+    group_none = values[admin == 0]
+
+    n_exists = (~np.isnan(group_exists)).sum(axis=0)
+    n_none = (~np.isnan(group_none)).sum(axis=0)
+    u_stat = np.full(len(y_cols), np.nan)
+    p_value = np.full(len(y_cols), np.nan)
+    median_exists = np.full(len(y_cols), np.nan)
+    median_none = np.full(len(y_cols), np.nan)
+
+    ok = (n_exists > 0) & (n_none > 0)
+    if ok.any():
+        u_stat[ok], p_value[ok] = mannwhitneyu(
+            group_exists[:, ok], group_none[:, ok],
+            alternative="two-sided", axis=0, nan_policy="omit"
+        )
+        median_exists[ok] = np.nanmedian(group_exists[:, ok], axis=0)
+        median_none[ok] = np.nanmedian(group_none[:, ok], axis=0)
+
+    return pd.DataFrame({
+        "U": u_stat,
+        "p_value": p_value,
+        "median_admin_ada": median_exists,
+        "median_admin_tidak": median_none,
+        "n_admin_ada": n_exists,
+        "n_admin_tidak": n_none,
+    }, index=pd.Index(list(y_cols), name="y_var"))
+
+
+def link_valid_rows(df: pd.DataFrame, x_var: str, y_var: str) -> pd.DataFrame:
+    """Baris valid untuk analisis keterkaitan (X, Y, kabupaten & administrasi tidak kosong)."""
+    return df[list(dict.fromkeys([x_var, y_var, "KABUPATEN", "administrasi"]))].dropna()
+
+
+def tercile_codes(values: pd.Series) -> np.ndarray:
+    """
+    Kode kategori Rendah/Sedang/Tinggi (0/1/2, -1 = kosong) tanpa menambah kolom ke frame.
+    Pakai kuantil (qcut); bila batas kuantil bentrok, pakai rentang sama lebar (cut).
+    """
+    v = values.astype(float)
+    try:
+        kategori = pd.qcut(v, q=3, labels=KRUSKAL_LABELS)
+    except Exception:
+        kategori = pd.cut(v, bins=3, labels=KRUSKAL_LABELS)
+    return kategori.cat.codes.to_numpy().astype(np.int8)
+
+
+def partition_by_codes(values: np.ndarray, codes: np.ndarray, n_groups: int = 3) -> list:
+    """
+    Pecah values per kode grup dengan satu argsort stabil + bincount.
+    Baris dengan kode -1 atau nilai NaN dibuang. Mengembalikan list array (urut kode).
+    """
+    keep = (codes >= 0) & ~np.isnan(values)
+    kept_codes = codes[keep]
+    order = np.argsort(kept_codes, kind="stable")
+    bounds = np.cumsum(np.bincount(kept_codes, minlength=n_groups))[:-1]
+    return np.split(values[keep][order], bounds)
+
+
+def link_statistics(integrated: pd.DataFrame) -> dict:
+    """
+    Semua statistik halaman Keterkaitan: matriks Spearman PEOPLE_X_OPTIONS x
+    STOCK_METHODS_WITH_TOTAL + Mann–Whitney per variabel stok.
+    """
+    return {
+        "spearman": spearman_matrix(
+            integrated, PEOPLE_X_OPTIONS, STOCK_METHODS_WITH_TOTAL,
+            required_cols=["KABUPATEN", "administrasi"]
+        ),
+        "mannwhitney": mannwhitney_by_admin(integrated, STOCK_METHODS_WITH_TOTAL),
+    }
+
+
+@timed("kruskal")
+def kruskal_by_codes(values: np.ndarray, codes: np.ndarray) -> dict:
+    """
+    Uji Kruskal–Wallis values per kategori (kode 0/1/2 dari tercile_codes).
+    Mengembalikan groups (grup tidak kosong, untuk resampling), median per kategori
+    (urut KRUSKAL_LABELS, NaN bila kosong), h_stat & p_value (NaN bila < 2 grup).
+    """
+    from scipy.stats import kruskal
+
+    groups = partition_by_codes(values, codes, len(KRUSKAL_LABELS))
+    used = [g for g in groups if len(g) > 0]
+    h_stat, p_value = kruskal(*used) if len(used) >= 2 else (np.nan, np.nan)
+    return {
+        "groups": used,
+        "median": np.array([np.median(g) if len(g) else np.nan for g in groups]),
+        "h_stat": float(h_stat),
+        "p_value": float(p_value),
+    }
+
+
+@timed("adfuller")
+def adf_test_result(series: pd.Series):
+    """
+    Uji stasioneritas ADF untuk deret waktu.
+    Mengembalikan (p_value, kesimpulan).
+    """
+    adfuller = _load_adfuller()
+    if adfuller is None:
+        return np.nan, "statsmodels belum terpasang"
+
+    s = series.dropna().astype(float)
+    if len(s) < 6:
+        return np.nan, "data terlalu sedikit"
+
+    p_value = adfuller(s)[1]
+    conclusion = "stasioner" if p_value < 0.05 else "tidak stasioner (perlu differencing)"
+    return p_value, conclusion
+
+
+def compute_ts_statistics(ts_df: pd.DataFrame) -> dict:
+    """
+    Statistik halaman TS untuk 1 kabupaten, semua metode sekaligus:
+    - ma3: moving average 3 bulan (array per metode)
+    - adf: (p_value, kesimpulan) per metode
+    """
+    return {
+        "ma3": {v: ts_df[v].rolling(3).mean().to_numpy() for v in STOCK_METHODS},
+        "adf": {v: adf_test_result(ts_df[v]) for v in STOCK_METHODS},
+    }
@@ -0,0 +1,168 @@
+"""
+Generator workbook sintetis DB1 (stok alokon per bulan) & DB2 (tempat KB + SDM)
+dengan skema yang sama seperti data asli, untuk benchmark di berbagai skala
+(jumlah kabupaten × jumlah bulan).
+
+Susunan folder hasil make_dataset sama dengan folder data/ dashboard:
+    <root>/data/db1/DB1 <tahun>.xlsx   (1 sheet per bulan: "Januari", ...)
+    <root>/data/Jumlah tempat pelayanan kb ... .xlsx
+"""
+import os
+import string
+
+import numpy as np
+import pandas as pd
+
+from kb_engine.schema import DB1_NUMERIC_COLUMNS
+
+MONTH_SHEETS = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember",
+]
+DB2_FILE_NAME = "Jumlah tempat pelayanan kb yang memiliki tenaga kesehatan dan administrasi.xlsx"
+DB2_HEADER_ROWS = [
+    ["KODE", "KABUPATEN", "JUMLAH TEMPAT PELAYANAN KB", "MEMILIKI TENAGA KESEHATAN DAN ADMINISTRASI",
+     None, None, None, None, None],
+    [None, None, None, "DOKTER", None, None, "BIDAN", "PERAWAT", "ADMINISTRASI"],
+    [None, None, None, "KEBIDANAN DAN KANDUNGAN", "BEDAH/UROLOGI", "UMUM", None, None, None],
+    [1, 2, 3, 4, 5, 6, 7, 8, 9],
+]
+# Layout DB2 per fasilitas (1 baris header, 1 baris per fasilitas, tanpa kolom jumlah tempat)
+DB2_FACILITY_HEADER = [
+    "KABUPATEN", "KECAMATAN", "NAMA FASKES", "DOKTER KANDUNGAN", "DOKTER UROLOGI",
+    "DOKTER UMUM", "BIDAN", "PERAWAT", "TENAGA ADMINISTRASI",
+]
+LAST_YEAR = 2025
+
+
+def kabupaten_names(n: int) -> list:
+    """
+    n nama kabupaten unik, mis. KABAA, KABAB, ... (DB2 hanya membaca baris yang nama
+    kabupatennya memuat huruf; kode huruf juga membuat urutan nama = urutan pembuatan).
+    """
+    letters = string.ascii_uppercase
+    width = 1
+    while 26 ** width < n:
+        width += 1
+    names = []
+    for i in range(n):
+        code = ""
+        for _ in range(width):
+            i, r = divmod(i, 26)
+            code = letters[r] + code
+        names.append("KAB" + code)
+    return names
+
+
+def make_db1_workbook(
+    path: str, kabupaten: list, months: int = 12, seed: int = 0, facilities_per_kabupaten: int = 0,
+    first_month: int = 0
+) -> str:
+    """
+    1 workbook DB1 (1 tahun): `months` sheet bulan mulai bulan ke-first_month (0 = Januari),
+    1 baris per kabupaten, atau per fasilitas (+ kolom KECAMATAN & FASILITAS) bila
+    facilities_per_kabupaten > 0.
+    """
+    rng = np.random.default_rng(seed)
+    per_kab = max(facilities_per_kabupaten, 1)
+    kab = np.repeat(np.asarray(kabupaten, dtype=object), per_kab)
+    n = len(kab)
+    ids = {"KODE": [f"{i // per_kab + 1:04d}" for i in range(n)], "KABUPATEN": kab}
+    if facilities_per_kabupaten > 0:
+        kecamatan = rng.integers(1, 25, n)
+        ids["KECAMATAN"] = [f"{k} KEC{c:02d}" for k, c in zip(kab, kecamatan)]
+        ids["FASILITAS"] = [f"FASKES {i + 1:06d}" for i in range(n)]
+    # Tiap kabupaten punya level stok sendiri supaya statistik antar-kelompok tidak datar
+    level = np.repeat(rng.gamma(2.0, 150.0, size=(len(kabupaten), 1)), per_kab, axis=0) / per_kab
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        for sheet in MONTH_SHEETS[first_month:first_month + months]:
+            df = pd.DataFrame(ids)
+            stock = rng.poisson(level * rng.uniform(0.2, 1.8, size=(n, len(DB1_NUMERIC_COLUMNS))))
+            for j, col in enumerate(DB1_NUMERIC_COLUMNS):
+                df[col] = stock[:, j]
+            df.to_excel(writer, sheet_name=sheet, index=False)
+    return path
+
+
+def make_db2_workbook(path: str, kabupaten: list, seed: int = 0, tahun: int = LAST_YEAR) -> str:
+    """Workbook DB2 dengan judul, header bertingkat & baris total seperti file asli."""
+    rng = np.random.default_rng(seed + 1)
+    n = len(kabupaten)
+    tempat = rng.integers(5, 600, n)
+    rows = [
+        ["JUMLAH TEMPAT PELAYANAN KB YANG MEMILIKI TENAGA KESEHATAN DAN ADMINISTRASI"] + [None] * 8,
+        [f"TAHUN:   {tahun}"] + [None] * 8,
+        ["Prov :  SINTETIS"] + [None] * 8,
+        [None] * 9,
+        [None] * 9,
+        [None] * 9,
+    ] + DB2_HEADER_ROWS
+    body = np.column_stack([
+        tempat,
+        rng.binomial(tempat, 0.05),   # dokter kandungan
+        rng.binomial(tempat, 0.005),  # dokter urologi
+        rng.binomial(tempat, 0.1),    # dokter umum
+        rng.binomial(tempat, 0.9),    # bidan
+        rng.binomial(tempat, 0.15),   # perawat
+        rng.binomial(tempat, 0.04),   # administrasi
+    ])
+    for i, name in enumerate(kabupaten):
+        rows.append([f"{i + 1:04d}", name] + body[i].tolist())
+    rows.append(["Jumlah Total", None] + body.sum(axis=0).tolist())
+    pd.DataFrame(rows).to_excel(path, index=False, header=False)
+    return path
+
+
+def make_db2_facility_workbook(path: str, kabupaten: list, facilities_per_kabupaten: int, seed: int = 0) -> str:
+    """Workbook DB2 per fasilitas: facilities_per_kabupaten baris per kabupaten (kecamatan & nama faskes acak)."""
+    rng = np.random.default_rng(seed + 2)
+    n = len(kabupaten) * facilities_per_kabupaten
+    kab = np.repeat(np.asarray(kabupaten, dtype=object), facilities_per_kabupaten)
+    kecamatan = rng.integers(1, 25, n)
+    df = pd.DataFrame({
+        "KABUPATEN": kab,
+        "KECAMATAN": [f"{k} KEC{c:02d}" for k, c in zip(kab, kecamatan)],
+        "NAMA FASKES": [f"FASKES {i + 1:06d}" for i in range(n)],
+        "DOKTER KANDUNGAN": rng.binomial(1, 0.05, n),
+        "DOKTER UROLOGI": rng.binomial(1, 0.005, n),
+        "DOKTER UMUM": rng.binomial(2, 0.1, n),
+        "BIDAN": rng.poisson(1.0, n),
+        "PERAWAT": rng.poisson(0.2, n),
+        "TENAGA ADMINISTRASI": rng.binomial(1, 0.04, n),
+    }, columns=DB2_FACILITY_HEADER)
+    df.to_excel(path, index=False)
+    return path
+
+
+def make_dataset(
+    root: str, n_kabupaten: int, n_months: int = 12, seed: int = 0, facilities_per_kabupaten: int = 0
+) -> dict:
+    """
+    Tulis folder data/ sintetis di bawah root: n_months bulan DB1 berurutan yang
+    berakhir di tahun LAST_YEAR (tahun pertama bisa tidak penuh), plus DB2
+    (ringkasan per kabupaten). Dengan facilities_per_kabupaten > 0, DB1 & DB2 per fasilitas.
+    """
+    kabupaten = kabupaten_names(n_kabupaten)
+    data_dir = os.path.join(root, "data")
+    db1_dir = os.path.join(data_dir, "db1")
+    os.makedirs(db1_dir, exist_ok=True)
+
+    n_years = -(-n_months // 12)
+    db1_paths = []
+    remaining = n_months
+    for k in range(n_years):
+        tahun = LAST_YEAR - k
+        months = min(12, remaining)
+        path = os.path.join(db1_dir, f"DB1 {tahun}.xlsx")
+        # Tahun terbaru penuh; sisa bulan diambil dari akhir tahun paling lama (deret tetap bersambung)
+        make_db1_workbook(path, kabupaten, months=months, seed=seed + k,
+                          facilities_per_kabupaten=facilities_per_kabupaten, first_month=12 - months)
+        db1_paths.append(path)
+        remaining -= months
+
+    db2_path = os.path.join(data_dir, DB2_FILE_NAME)
+    if facilities_per_kabupaten > 0:
+        make_db2_facility_workbook(db2_path, kabupaten, facilities_per_kabupaten, seed=seed)
+    else:
+        make_db2_workbook(db2_path, kabupaten, seed=seed)
+    return {"data_dir": data_dir, "db1_paths": sorted(db1_paths), "db2_path": db2_path, "kabupaten": kabupaten}
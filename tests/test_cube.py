@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+
+from kb_engine.cube import (
+    UNKNOWN_REGION, build_rollup_cube, child_names, children_table, node_timeseries, node_year_totals,
+    stock_leaf_sums,
+)
+from kb_engine.schema import DB1_DEFAULT_PROVINCE, MONTH_ORDER, STOCK_METHODS
+
+
+def _stock_all(n: int = 400, seed: int = 0, provinsi: bool = True) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame(rng.integers(0, 50, size=(n, len(STOCK_METHODS))), columns=STOCK_METHODS)
+    if provinsi:
+        df["PROVINSI"] = rng.choice(["JAWA TIMUR", "BALI"], size=n)
+    df["KABUPATEN"] = rng.choice(["MALANG", "BLITAR", "BADUNG"], size=n)
+    kecamatan = rng.choice(["K1", "K2", "K3"], size=n).astype(object)
+    kecamatan[rng.random(n) < 0.1] = None
+    df["KECAMATAN"] = kecamatan
+    df["TAHUN"] = rng.choice([2024, 2025], size=n)
+    df["BULAN"] = pd.Categorical(rng.choice(MONTH_ORDER[:4], size=n), categories=MONTH_ORDER, ordered=True)
+    return df
+
+
+def _expected(stock: pd.DataFrame, levels: list, tahun: int) -> pd.Series:
+    year = stock[stock["TAHUN"] == tahun].assign(KECAMATAN=stock["KECAMATAN"].fillna(UNKNOWN_REGION))
+    return year.groupby(levels)[STOCK_METHODS].sum().sum(axis=1)
+
+
+def test_rollup_levels_match_groupby():
+    stock = _stock_all()
+    cube = build_rollup_cube(stock_leaf_sums(stock))
+    assert cube["levels"] == ["PROVINSI", "KABUPATEN", "KECAMATAN"]
+    for depth in range(1, 4):
+        levels = cube["levels"][:depth]
+        for tahun in (2024, 2025):
+            for key, total in _expected(stock, levels, tahun).items():
+                path = key if isinstance(key, tuple) else (key,)
+                assert node_year_totals(cube, path, tahun)["TOTAL_STOK"] == total
+
+    root = node_year_totals(cube, (), 2025)
+    year = stock[stock["TAHUN"] == 2025]
+    assert root["TOTAL_STOK"] == year[STOCK_METHODS].to_numpy().sum()
+    assert node_year_totals(cube, (), 2030)["TOTAL_STOK"] == 0
+
+
+def test_children_and_timeseries():
+    stock = _stock_all(seed=1)
+    cube = build_rollup_cube(stock_leaf_sums(stock))
+    assert child_names(cube, ()) == ["BALI", "JAWA TIMUR"]
+
+    table = children_table(cube, ("BALI",), 2024)
+    assert list(table.columns) == ["KABUPATEN", "TOTAL_STOK"] + STOCK_METHODS
+    assert table["TOTAL_STOK"].is_monotonic_decreasing
+    assert table["TOTAL_STOK"].sum() == node_year_totals(cube, ("BALI",), 2024)["TOTAL_STOK"]
+
+    ts = node_timeseries(cube, ("JAWA TIMUR", "MALANG"))
+    rows = stock[(stock["PROVINSI"] == "JAWA TIMUR") & (stock["KABUPATEN"] == "MALANG")]
+    expected = rows.groupby(["TAHUN", "BULAN"], observed=True)[STOCK_METHODS].sum()
+    np.testing.assert_array_equal(ts[STOCK_METHODS].to_numpy(), expected.to_numpy())
+
+
+def test_missing_province_column_uses_default():
+    cube = build_rollup_cube(stock_leaf_sums(_stock_all(provinsi=False)))
+    assert child_names(cube, ()) == [DB1_DEFAULT_PROVINCE]
+    assert cube["kabupaten_paths"]["MALANG"] == [(DB1_DEFAULT_PROVINCE, "MALANG")]
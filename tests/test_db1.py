@@ -0,0 +1,23 @@
+import pytest
+
+from kb_engine.db1 import parse_period
+from kb_engine.schema import DB1_DEFAULT_YEAR
+
+
+@pytest.mark.parametrize("sheet_name, source_name, expected", [
+    ("Januari", "", (DB1_DEFAULT_YEAR, "JANUARI")),
+    (" januari ", "", (DB1_DEFAULT_YEAR, "JANUARI")),
+    ("JANUARI 2024", "", (2024, "JANUARI")),
+    ("2024-Januari", "", (2024, "JANUARI")),
+    ("Maret", "stok_kontrasepsi_2023.xlsx", (2023, "MARET")),
+    # Tahun di nama sheet lebih diutamakan daripada tahun di nama file
+    ("Desember 2022", "stok_2023.xlsx", (2022, "DESEMBER")),
+])
+def test_parse_period(sheet_name, source_name, expected):
+    assert parse_period(sheet_name, source_name) == expected
+
+
+def test_parse_period_without_month_keeps_sheet_name():
+    # Bukan nama bulan -> BULAN = nama sheet (jadi kosong di kategori bulan)
+    assert parse_period("Rekap", "stok_2023.xlsx") == (2023, "REKAP")
+    assert parse_period("Des 2023") == (2023, "DES 2023")
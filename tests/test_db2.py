@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+from kb_engine.db2 import detect_db2_header, load_db2_people, summarize_db2
+from kb_engine.synthetic import make_db2_facility_workbook
+
+DB2_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data", "Jumlah tempat pelayanan kb yang memiliki tenaga kesehatan dan administrasi.xlsx",
+)
+
+
+def _raw() -> pd.DataFrame:
+    return pd.read_excel(DB2_PATH, header=None, dtype=object)
+
+
+def test_header_detected_from_labels():
+    data_row, positions = detect_db2_header(_raw())
+    assert data_row == 10
+    assert positions == {
+        "kode": 0, "kabupaten": 1, "tempat_kb": 2, "dok_kandungan": 3, "dok_urologi": 4,
+        "dok_umum": 5, "bidan": 6, "perawat": 7, "administrasi": 8,
+    }
+
+
+def test_bundled_workbook_matches_total_row():
+    people = load_db2_people(DB2_PATH)
+    assert len(people) == 38
+    assert people["KABUPATEN"].is_unique
+    assert people["KABUPATEN"].iloc[0] == "PACITAN"
+    assert people["KABUPATEN"].iloc[-1] == "KOTA BATU"
+
+    # Baris "Jumlah Total" tidak ikut dibaca, tapi jumlah kolomnya harus sama
+    raw = _raw()
+    total = raw[raw[0].astype(str).str.startswith("Jumlah")].iloc[0, 2:].astype(int).tolist()
+    columns = ["tempat_kb", "dok_kandungan", "dok_urologi", "dok_umum", "bidan", "perawat", "administrasi"]
+    assert [int(people[c].sum()) for c in columns] == total
+    assert int(people["tenaga_kesehatan_total"].sum()) == sum(total[1:6])
+
+
+def test_facility_layout_detected_from_header(tmp_path):
+    path = make_db2_facility_workbook(os.path.join(tmp_path, "db2.xlsx"), ["KOTA A", "KOTA B"], 5)
+    people = load_db2_people(path)
+    assert people["KABUPATEN"].tolist() == ["KOTA A", "KOTA B"]
+    # Tanpa kolom tempat KB: tiap baris fasilitas = 1 tempat pelayanan
+    assert people["tempat_kb"].tolist() == [5, 5]
+
+
+def test_summary_layout_rejects_duplicate_kabupaten():
+    rows = pd.DataFrame({
+        "kabupaten": ["Malang", "MALANG", "Blitar"],
+        **{c: [1.0, 2.0, 3.0] for c in ["tempat_kb", "dok_kandungan", "dok_urologi", "dok_umum",
+                                          "bidan", "perawat", "administrasi"]},
+    })
+    with pytest.raises(ValueError, match="MALANG"):
+        summarize_db2(rows)
@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+
+from kb_engine.leaderboard import build_leaderboard_index, leaderboard, leaderboard_columns, top_k_positions
+from kb_engine.schema import LEADERBOARD_METRICS
+
+
+def _full_sort_positions(values: np.ndarray, k: int) -> np.ndarray:
+    s = pd.Series(values).dropna()
+    return s.sort_values(ascending=False, kind="stable").index.to_numpy()[:k]
+
+
+def test_top_k_matches_full_sort():
+    rng = np.random.default_rng(0)
+    # Banyak nilai seri & NaN supaya batas ke-k sering jatuh di tengah nilai seri
+    values = rng.integers(0, 20, size=500).astype(float)
+    values[rng.random(500) < 0.1] = np.nan
+    for k in (0, 1, 5, 37, 450, 1000):
+        np.testing.assert_array_equal(top_k_positions(values, k), _full_sort_positions(values, k))
+
+
+def test_all_nan_gives_empty_result():
+    assert len(top_k_positions(np.full(5, np.nan), 3)) == 0
+
+
+def test_leaderboard_slices_index():
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({metric: rng.integers(0, 30, size=50) for metric in LEADERBOARD_METRICS})
+    df.insert(0, "KABUPATEN", [f"K{i}" for i in range(50)])
+    df["administrasi"] = pd.array(df["administrasi"], dtype="Int64")
+    df.loc[3, "administrasi"] = pd.NA
+    index = build_leaderboard_index(df, LEADERBOARD_METRICS, k_max=20)
+    for metric in LEADERBOARD_METRICS:
+        out = leaderboard(df, index, metric, 10)
+        assert list(out.columns) == ["PERINGKAT"] + leaderboard_columns(metric)
+        expected = df.iloc[_full_sort_positions(df[metric].to_numpy(dtype=float, na_value=np.nan), 10)]
+        assert out["PERINGKAT"].tolist() == list(range(1, 11))
+        assert out["KABUPATEN"].tolist() == expected["KABUPATEN"].tolist()
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+
+from kb_engine.ledger import ledger_kpi, ledger_years, new_ledger, sync_ledger, yearly_stock_frame
+from kb_engine.schema import STOCK_METHODS
+
+
+def _partition(seed: int, tahun: int, kabupaten: list) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = 3 * len(kabupaten)
+    df = pd.DataFrame(rng.integers(0, 100, size=(n, len(STOCK_METHODS))), columns=STOCK_METHODS)
+    df.insert(0, "KABUPATEN", rng.choice(kabupaten, size=n))
+    df.insert(1, "TAHUN", tahun)
+    return df
+
+
+def _people(kabupaten: list, seed: int) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "KABUPATEN": kabupaten,
+        "tempat_kb": rng.integers(1, 50, size=len(kabupaten)),
+        "tenaga_kesehatan_total": rng.integers(1, 80, size=len(kabupaten)),
+    })
+
+
+def _full_recompute(parts: dict, people: pd.DataFrame) -> tuple:
+    stock = pd.concat([make() for make in parts.values()], ignore_index=True)
+    yearly = stock.groupby(["TAHUN", "KABUPATEN"], sort=True)[STOCK_METHODS].sum().reset_index()
+    kpi = {}
+    for tahun, year in yearly.groupby("TAHUN"):
+        joined = year.merge(people, on="KABUPATEN", how="inner")
+        kpi[int(tahun)] = {
+            "jumlah_kabupaten_terhubung": len(joined),
+            "total_tempat_kb": int(joined["tempat_kb"].sum()),
+            "total_tenaga_kesehatan": int(joined["tenaga_kesehatan_total"].sum()),
+            "total_stok_setahun": float(joined[STOCK_METHODS].to_numpy().sum()),
+        }
+    return yearly, kpi
+
+
+def _assert_matches_full(ledger: dict, parts: dict, people: pd.DataFrame) -> None:
+    yearly, kpi = _full_recompute(parts, people)
+    assert ledger_years(ledger) == sorted(kpi)
+    for tahun in kpi:
+        expected = yearly[yearly["TAHUN"] == tahun].drop(columns="TAHUN").reset_index(drop=True)
+        got = yearly_stock_frame(ledger, tahun)
+        assert got["KABUPATEN"].tolist() == expected["KABUPATEN"].tolist()
+        np.testing.assert_array_equal(got[STOCK_METHODS].to_numpy(), expected[STOCK_METHODS].to_numpy())
+        assert ledger_kpi(ledger, tahun) == kpi[tahun]
+
+
+def test_incremental_sync_matches_full_recompute():
+    kabupaten = ["A", "B", "C", "D", "E"]
+    parts = {
+        f"p{i}": (lambda i=i: _partition(i, 2024 + i % 2, kabupaten[: 3 + i % 3]))
+        for i in range(6)
+    }
+    people = _people(["A", "B", "C", "X"], seed=1)
+    ledger = new_ledger()
+    summary = sync_ledger(ledger, parts, people)
+    assert summary["parts_added"] == 6
+    _assert_matches_full(ledger, parts, people)
+
+    # 1 partisi berubah (id baru), 1 dibuang, 1 ditambah; DB2: 1 kabupaten dikoreksi, 1 baru, 1 hilang
+    parts.pop("p0")
+    parts.pop("p3")
+    parts["p3b"] = lambda: _partition(33, 2025, kabupaten)
+    parts["p9"] = lambda: _partition(9, 2026, ["B", "E"])
+    people = pd.concat([_people(["A", "C", "X"], seed=1), _people(["B", "E"], seed=2)], ignore_index=True)
+    summary = sync_ledger(ledger, parts, people)
+    assert (summary["parts_added"], summary["parts_removed"]) == (2, 2)
+    _assert_matches_full(ledger, parts, people)
+
+
+def test_unchanged_parts_are_not_read_again():
+    calls = []
+
+    def make():
+        calls.append(1)
+        return _partition(0, 2024, ["A", "B"])
+
+    parts, people = {"p0": make}, _people(["A"], seed=0)
+    ledger = new_ledger()
+    sync_ledger(ledger, parts, people)
+    summary = sync_ledger(ledger, parts, people)
+    assert len(calls) == 1
+    assert summary == {"kabupaten_changed": 0, "parts_added": 0, "parts_removed": 0, "stock_keys_touched": 0}
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from kb_engine.paging import build_sort_index, filtered_rows, page_count, page_view
+
+
+def _frame() -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    stok = rng.integers(0, 10, size=120).astype(float)
+    stok[rng.random(120) < 0.1] = np.nan
+    return pd.DataFrame({
+        "KABUPATEN": [f"KAB {i:03d}" for i in range(120)],
+        "STOK": stok,
+    })
+
+
+def test_sorted_search_matches_pandas():
+    df = _frame()
+    sort_index = build_sort_index(df)
+    for descending in (False, True):
+        rows = filtered_rows(df, sort_index, "STOK", descending, "KABUPATEN", "kab 0")
+        subset = df[df["KABUPATEN"].str.contains("KAB 0", regex=False)]
+        if descending:
+            # Turun: nilai terisi dibalik dari urutan naik stabil, nilai kosong tetap di akhir
+            valid = subset["STOK"].dropna().sort_values(kind="stable").index[::-1]
+            expected = valid.append(subset.index[subset["STOK"].isna()])
+        else:
+            expected = subset["STOK"].sort_values(kind="stable", na_position="last").index
+        np.testing.assert_array_equal(rows, expected.to_numpy())
+
+
+def test_unsorted_without_query_keeps_row_order():
+    df = _frame()
+    np.testing.assert_array_equal(filtered_rows(df, build_sort_index(df)), np.arange(len(df)))
+
+
+def test_pages_cover_rows_once():
+    df = _frame()
+    rows = filtered_rows(df, build_sort_index(df), "STOK", True)
+    assert page_count(len(rows), 50) == 3
+    assert page_count(0, 50) == 1
+    pages = [page_view(df, rows, ["KABUPATEN"], page, 50) for page in range(1, 4)]
+    assert [len(p) for p in pages] == [50, 50, 20]
+    assert pd.concat(pages).index.tolist() == rows.tolist()
+    # Nomor halaman di luar rentang dijepit ke halaman pertama / terakhir
+    assert page_view(df, rows, ["KABUPATEN"], 99, 50).index.tolist() == pages[-1].index.tolist()
+    assert page_view(df, rows, ["KABUPATEN"], 0, 50).index.tolist() == pages[0].index.tolist()
@@ -0,0 +1,33 @@
+import numpy as np
+
+from kb_engine.parallel import make_process_pool
+from kb_engine.resampling import kruskal_resampling, spearman_resampling
+
+
+def _data():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=60)
+    y = x + rng.normal(scale=2.0, size=60)
+    groups = [rng.normal(loc=i * 0.3, size=15 + i) for i in range(3)]
+    return x, y, groups
+
+
+def test_same_seed_same_result():
+    x, y, groups = _data()
+    assert spearman_resampling(x, y, n_resamples=2000, seed=7) == spearman_resampling(x, y, n_resamples=2000, seed=7)
+    assert kruskal_resampling(groups, n_resamples=2000, seed=7) == kruskal_resampling(groups, n_resamples=2000, seed=7)
+    assert spearman_resampling(x, y, n_resamples=2000, seed=8) != spearman_resampling(x, y, n_resamples=2000, seed=7)
+
+
+def test_result_independent_of_worker_pool():
+    x, y, groups = _data()
+    serial = (spearman_resampling(x, y, n_resamples=3000, seed=3), kruskal_resampling(groups, n_resamples=3000, seed=3))
+    pool = make_process_pool(2)
+    if pool is None:
+        return
+    with pool:
+        parallel = (
+            spearman_resampling(x, y, n_resamples=3000, seed=3, executor=pool),
+            kruskal_resampling(groups, n_resamples=3000, seed=3, executor=pool),
+        )
+    assert parallel == serial
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from kb_engine.shared import freeze, session_view
+
+
+def _shared_model():
+    df = pd.DataFrame({
+        "KABUPATEN": ["A", "B", "C"],
+        "KATEGORI": pd.Categorical(["x", "y", "x"]),
+        "STOK": [1.0, 2.0, 3.0],
+        "JUMLAH": pd.array([1, 2, 3], dtype="Int64"),
+    })
+    return freeze({"integrated_df": df, "arr": np.arange(3), "tahun": [2024]})
+
+
+def test_freeze_makes_numpy_columns_read_only():
+    model = _shared_model()
+    with pytest.raises(ValueError):
+        model["arr"][0] = 9
+    with pytest.raises(ValueError):
+        model["integrated_df"]["STOK"].to_numpy()[0] = 9.0
+    with pytest.raises(ValueError):
+        model["integrated_df"].iloc[0, 2] = 9.0
+
+
+def test_session_view_write_does_not_reach_shared_model():
+    model = _shared_model()
+    before = model["integrated_df"].copy()
+    view = session_view(model)
+    df = view["integrated_df"]
+    for col in range(df.shape[1]):
+        df.iloc[0, col] = df.iloc[1, col]
+    df["BARU"] = 1
+    view["tahun"].append(2025)
+
+    pd.testing.assert_frame_equal(model["integrated_df"], before)
+    assert model["tahun"] == [2024]
+    assert df["KABUPATEN"].iloc[0] == "B"
@@ -0,0 +1,48 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from kb_engine import sql_store
+from kb_engine.cube import build_rollup_cube, cube_levels, region_fill_values, stock_leaf_sums
+from kb_engine.model import sql_stock_rows
+from kb_engine.schema import MONTH_ORDER, REGION_LEVELS, SQL_PEOPLE_COLUMNS, STOCK_METHODS
+
+
+def _partition(seed: int, regions: bool) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = 60
+    df = pd.DataFrame(rng.integers(0, 40, size=(n, len(STOCK_METHODS))), columns=STOCK_METHODS)
+    df["KABUPATEN"] = rng.choice(["MALANG", "BLITAR", "BADUNG"], size=n)
+    if regions:
+        provinsi = rng.choice(["JAWA TIMUR", "BALI"], size=n).astype(object)
+        provinsi[rng.random(n) < 0.1] = None
+        kecamatan = rng.choice(["K1", "K2"], size=n).astype(object)
+        kecamatan[rng.random(n) < 0.1] = None
+        df["PROVINSI"], df["KECAMATAN"] = provinsi, kecamatan
+    df["TAHUN"] = 2024 + seed % 2
+    # None = sheet tanpa nama bulan (mis. rekap): tidak ikut cube
+    bulan = rng.choice(np.array(MONTH_ORDER[:3] + [None], dtype=object), size=n)
+    df["BULAN"] = pd.Categorical(bulan, categories=MONTH_ORDER, ordered=True)
+    return df
+
+
+def test_sql_cube_has_same_levels_and_values(tmp_path):
+    # Partisi tanpa kolom wilayah (file lama) bercampur dengan partisi per provinsi/kecamatan
+    parts = [_partition(0, regions=False), _partition(1, regions=True), _partition(2, regions=True)]
+    people = pd.DataFrame({c: [1.0, 2.0] for c in SQL_PEOPLE_COLUMNS}).assign(KABUPATEN=["MALANG", "BLITAR"])
+    path = sql_store.build_store(
+        os.path.join(tmp_path, f"kb.{sql_store.STORE_EXT}"), (sql_stock_rows(p) for p in parts), people
+    )
+
+    optional = [lvl for lvl in REGION_LEVELS if lvl not in ("PROVINSI", "KABUPATEN")]
+    levels = cube_levels(sql_store.non_empty_columns(path, sql_store.STOCK_TABLE, optional))
+    sql_leaf = sql_store.stock_leaf_sums(path, STOCK_METHODS, levels, region_fill_values(levels))
+    sql_cube = build_rollup_cube(sql_leaf)
+    pandas_cube = build_rollup_cube(stock_leaf_sums(pd.concat(parts, ignore_index=True)))
+
+    assert sql_cube["levels"] == pandas_cube["levels"] == ["PROVINSI", "KABUPATEN", "KECAMATAN"]
+    np.testing.assert_array_equal(sql_cube["periods"], pandas_cube["periods"])
+    for level in sql_cube["levels"]:
+        assert sql_cube["nodes"][level]["keys"] == pandas_cube["nodes"][level]["keys"]
+        np.testing.assert_array_equal(sql_cube["nodes"][level]["values"], pandas_cube["nodes"][level]["values"])
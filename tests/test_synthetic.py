@@ -0,0 +1,16 @@
+import pandas as pd
+
+from kb_engine.synthetic import MONTH_SHEETS, kabupaten_names, make_dataset
+
+
+def test_kabupaten_names_unique():
+    names = kabupaten_names(700)
+    assert len(set(names)) == 700
+    assert names == sorted(names)
+
+
+def test_multi_year_months_are_contiguous(tmp_path):
+    dataset = make_dataset(str(tmp_path), 2, n_months=15)
+    sheets = [pd.ExcelFile(path).sheet_names for path in dataset["db1_paths"]]
+    # Tahun paling lama berisi bulan-bulan terakhir, tahun terbaru penuh
+    assert sheets == [MONTH_SHEETS[-3:], MONTH_SHEETS]